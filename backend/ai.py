@@ -5,7 +5,8 @@ AI routes for CSV-backed chatbot with rule-based + semantic search hybrid.
 Enhancements:
 - structured_answer(): handles best/worst/above/below style queries.
 - fallback: TF-IDF semantic retrieval across all CSVs.
-- caching: stores parsed docs, meta, vectorizer, and doc_vectors in results/cache.pkl
+- caching: stores parsed docs, meta and vectorizer in results/cache.pkl; the doc_vectors
+  matrix is kept as .npy files (shared_arrays.py) memory-mapped by every worker process
 - qa_cache: separate cache file (results/qa_cache.pkl) that stores asked Q&A pairs.
 - cache invalidates if ai.py code changes or CSV files change.
 - all replies include sources list, suitable for dropdown in frontend.
@@ -20,6 +21,9 @@ import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import linear_kernel
+from scipy.sparse import csr_matrix
+from snapshot import load_table
+from shared_arrays import share_arrays
 
 # Flask helpers
 from flask import request, jsonify, render_template
@@ -66,6 +70,25 @@ def csv_timestamps(csv_dir, csv_files):
             ts[fname] = os.path.getmtime(path)
     return ts
 
+def _doc_vectors_key(ai_hash, timestamps):
+    """Content key of a built index: the ai.py hash plus the CSV timestamps it was built from."""
+    return hashlib.sha256(repr((ai_hash, sorted(timestamps.items()))).encode("utf-8")).hexdigest()
+
+def _shared_doc_vectors(key, shape=None, doc_vectors=None):
+    """
+    CSR doc_vectors backed by memory-mapped data/indices/indptr arrays (one physical copy for all workers).
+    Publishes doc_vectors first when given; returns None when nothing is published under key.
+    """
+    arrays = None
+    if doc_vectors is not None:
+        doc_vectors = csr_matrix(doc_vectors)
+        shape = doc_vectors.shape
+        arrays = {"data": doc_vectors.data, "indices": doc_vectors.indices, "indptr": doc_vectors.indptr}
+    mapped = share_arrays("doc_vectors", key, arrays, BASE_DIR)
+    if mapped is None:
+        return None
+    return csr_matrix((mapped["data"], mapped["indices"], mapped["indptr"]), shape=tuple(shape), copy=False)
+
 # ----------------------------------------------------------------------
 # Data loading & caching (doc index)
 # ----------------------------------------------------------------------
@@ -93,13 +116,21 @@ def load_csvs_and_build_index(csv_dir, csv_files):
                         break
 
             if valid:
-                print("ai.py: Loaded data from cache")
-                return (
-                    cache["docs"],
-                    cache["meta"],
-                    cache["vectorizer"],
-                    cache["doc_vectors"],
-                )
+                key = cache.get("doc_vectors_key") or _doc_vectors_key(cache["ai_hash"], cache["timestamps"])
+                try:
+                    # older caches pickled the matrix itself; publish it once as shared arrays
+                    doc_vectors = _shared_doc_vectors(key, cache.get("doc_vectors_shape"), cache.get("doc_vectors"))
+                except Exception as e:
+                    print("ai.py: Shared doc vectors unavailable, using a private copy:", e)
+                    doc_vectors = cache.get("doc_vectors")
+                if doc_vectors is not None:
+                    print("ai.py: Loaded data from cache")
+                    return (
+                        cache["docs"],
+                        cache["meta"],
+                        cache["vectorizer"],
+                        doc_vectors,
+                    )
         except Exception as e:
             print("ai.py: Failed to load cache:", e)
 
@@ -116,7 +147,7 @@ def load_csvs_and_build_index(csv_dir, csv_files):
         timestamps[fname] = os.path.getmtime(path)
 
         try:
-            df = pd.read_csv(path, dtype=str).fillna("")
+            df = load_table(path).fillna("")
         except Exception:
             df = pd.read_csv(
                 path, dtype=str, engine="python", encoding="utf-8", errors="ignore"
@@ -148,8 +179,15 @@ def load_csvs_and_build_index(csv_dir, csv_files):
         stop_words="english", ngram_range=(1, 2), max_features=20000
     )
     doc_vectors = vectorizer.fit_transform(docs)
+    key = _doc_vectors_key(ai_hash, timestamps)
+    shape = doc_vectors.shape
+    try:
+        doc_vectors = _shared_doc_vectors(key, doc_vectors=doc_vectors)  # swap the private matrix for the mapped one
+    except Exception as e:
+        print("ai.py: Failed to share doc vectors:", e)
+        key = None
 
-    # Save to cache with ai.py hash
+    # Save to cache with ai.py hash (the matrix itself lives in the shared arrays)
     try:
         with open(CACHE_FILE, "wb") as f:
             pickle.dump(
@@ -157,7 +195,9 @@ def load_csvs_and_build_index(csv_dir, csv_files):
                     "docs": docs,
                     "meta": meta,
                     "vectorizer": vectorizer,
-                    "doc_vectors": doc_vectors,
+                    "doc_vectors": None if key else doc_vectors,
+                    "doc_vectors_key": key,
+                    "doc_vectors_shape": shape,
                     "timestamps": timestamps,
                     "ai_hash": ai_hash,
                 },
@@ -170,7 +210,15 @@ def load_csvs_and_build_index(csv_dir, csv_files):
     return docs, meta, vectorizer, doc_vectors
 
 
-DOCS, META, VECTORIZER, DOC_VECS = load_csvs_and_build_index(CSV_DIR, CSV_FILES)
+def build_ai_index(csv_dir=CSV_DIR):
+    """Load (or rebuild) the TF-IDF index and return it as one dict: docs, meta, vectorizer, doc_vectors."""
+    docs, meta, vectorizer, doc_vectors = load_csvs_and_build_index(csv_dir, CSV_FILES)
+    return {"docs": docs, "meta": meta, "vectorizer": vectorizer, "doc_vectors": doc_vectors}
+
+
+# Current index; replaced as a whole by set_index() when the data manager reloads the CSVs
+_INDEX = build_ai_index(CSV_DIR)
+DOCS, META, VECTORIZER, DOC_VECS = _INDEX["docs"], _INDEX["meta"], _INDEX["vectorizer"], _INDEX["doc_vectors"]
 
 # ----------------------------------------------------------------------
 # QA cache (question → answer) with invalidation
@@ -217,19 +265,29 @@ def save_qa_cache(qa_dict, ai_hash=None, timestamps=None):
 
 QA_CACHE = load_qa_cache()
 
+
+def set_index(index):
+    """Swap in an index from build_ai_index(); cached answers came from the old data, so start a new QA cache."""
+    global _INDEX, QA_CACHE
+    _INDEX = index
+    QA_CACHE = {}
+    save_qa_cache(QA_CACHE)
+
 # ----------------------------------------------------------------------
 # Retrieval
 # ----------------------------------------------------------------------
 def retrieve_top_rows(query, top_k=3):
-    if VECTORIZER is None or DOC_VECS is None or not query.strip():
+    index = _INDEX  # one index for the whole call, even if a reload swaps it meanwhile
+    vectorizer, doc_vectors = index["vectorizer"], index["doc_vectors"]
+    if vectorizer is None or doc_vectors is None or not query.strip():
         return []
-    qv = VECTORIZER.transform([query])
-    sims = linear_kernel(qv, DOC_VECS).flatten()
+    qv = vectorizer.transform([query])
+    sims = linear_kernel(qv, doc_vectors).flatten()
     if np.all(sims == 0):
         return []
     top_idx = sims.argsort()[::-1][:top_k]
     return [
-        {"score": float(sims[i]), "doc": DOCS[i], "meta": META[i]} for i in top_idx
+        {"score": float(sims[i]), "doc": index["docs"][i], "meta": index["meta"][i]} for i in top_idx
     ]
 
 # ----------------------------------------------------------------------
@@ -243,7 +301,7 @@ def structured_answer(query: str):
         path = os.path.join(CSV_DIR, "placement.csv")
         if not os.path.exists(path):
             return None
-        df = pd.read_csv(path).fillna("")
+        df = load_table(path, typed=True).fillna("")
 
         # Ensure numeric columns
         for col in ["placement_percentage", "highest_ctc", "average_ctc"]:
@@ -294,7 +352,7 @@ def structured_answer(query: str):
             fname = f"rank_{year}.csv"
             path = os.path.join(CSV_DIR, fname)
             if os.path.exists(path):
-                df = pd.read_csv(path).fillna("")
+                df = load_table(path, typed=True).fillna("")
                 if "Rank" in df.columns and "Institute" in df.columns:
                     if "best" in q or "top" in q:
                         row = df.loc[df["Rank"].astype(int).idxmin()]
@@ -372,9 +430,10 @@ def register_ai(app):
                 200,
             )
 
+        qa_cache = QA_CACHE  # the cache of the index this request answers from
         # Check QA cache first
-        if query in QA_CACHE:
-            cached = QA_CACHE[query]
+        if query in qa_cache:
+            cached = qa_cache[query]
             return jsonify({
                 "ok": True,
                 "answer": cached["answer"],
@@ -390,8 +449,9 @@ def register_ai(app):
                 "answer": ans,
                 "sources": [{"note": "Rule-based answer (no direct CSV rows used)"}],
             }
-            QA_CACHE[query] = result
-            save_qa_cache(QA_CACHE)
+            qa_cache[query] = result
+            if qa_cache is QA_CACHE:  # do not persist answers from an index swapped out meanwhile
+                save_qa_cache(qa_cache)
             return jsonify(result), 200
 
         # Fallback semantic search
@@ -408,8 +468,9 @@ def register_ai(app):
             for r in top
         ]
         result = {"ok": True, "answer": answer, "sources": sources}
-        QA_CACHE[query] = result
-        save_qa_cache(QA_CACHE)
+        qa_cache[query] = result
+        if qa_cache is QA_CACHE:
+            save_qa_cache(qa_cache)
         return jsonify(result), 200
 
     return app
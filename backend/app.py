@@ -1,6 +1,8 @@
 # app.py
 import os
 import sys
+import time
+import multiprocessing
 from flask import Flask, render_template, request, jsonify, send_from_directory, abort
 from werkzeug.utils import safe_join
 
@@ -16,6 +18,10 @@ except Exception as e:
     CollegeRecommender = None # Set the class to None if the import fails.
     print("Error importing recommendation module:", e) # Print the error for debugging.
 
+from timing import collect as collect_timings # Per-request stage timings for debug_timings.
+from shared_arrays import memory_status # Per-process RSS figures for /memory.
+from worker_pool import RecommenderPool, PoolSaturated, PoolTimeout # Optional process pool for recommend().
+
 # initialize recommender (safe)
 recommender = None # Initialize recommender instance to None.
 if CollegeRecommender is not None: # Check if the class was successfully imported.
@@ -104,6 +110,103 @@ except Exception as _e:
     ai_module = None
     print("Could not import ai module (AI routes may not be available):", _e)
 
+# --- NEW: content-addressed image service (/images/<sha>.<ext>) for the base64 college pictures ---
+try:
+    from images import register_images
+    register_images(app) # Serves pictures decoded by images.picture_url() with immutable cache headers.
+except Exception as _e:
+    print("Warning: could not register image routes:", _e)
+# ----------------------------------------------------------------------
+
+# --- NEW: warm process pool for the recommender (backend/worker_pool.py) ---
+# RECOMMENDER_WORKERS=N runs /recommend_colleges and /recommend_colleges/batch in N worker processes,
+# so their pandas work does not hold the GIL of the server serving /explore and /top.
+# RECOMMENDER_QUEUE bounds the calls queued or running (503 + Retry-After beyond it, default 4 per worker);
+# RECOMMENDER_TIMEOUT is the per-call timeout in seconds (504, default 30).
+# Created before the hot-reload thread starts, so forked workers inherit the loaded recommender.
+recommender_pool = None # RecommenderPool instance (None: recommend() runs on the request thread).
+_pool_workers = int(os.environ.get('RECOMMENDER_WORKERS', '0') or 0) # Number of worker processes (0 = disabled).
+if recommender is not None and _pool_workers > 0 and multiprocessing.parent_process() is None: # Never inside a worker process.
+    try:
+        recommender_pool = RecommenderPool(
+            PROJECT_ROOT, workers=_pool_workers,
+            max_pending=int(os.environ.get('RECOMMENDER_QUEUE', '0') or 0) or None, # Calls queued or running at most.
+            timeout=float(os.environ.get('RECOMMENDER_TIMEOUT', 30)), # Seconds a request waits for its worker.
+            recommender=recommender) # Inherited by forked workers.
+    except Exception as _e:
+        print("Warning: recommender process pool not available, running in-process:", _e)
+        recommender_pool = None
+
+def _run_recommender(rec, method, kwargs, collect_stages=False):
+    """
+    rec.<method>(**kwargs) in the process pool when enabled, else on this thread.
+    Returns (result, per-stage milliseconds or None). Raises PoolSaturated / PoolTimeout from the pool.
+    """
+    if recommender_pool is not None:
+        return recommender_pool.call(method, kwargs, collect_stages=collect_stages) # Workers hold the current recommender (replaced on hot reload).
+    if not collect_stages:
+        return getattr(rec, method)(**kwargs), None
+    with collect_timings() as stages: # Record every stage for this request only.
+        result = getattr(rec, method)(**kwargs)
+    return result, stages
+
+def _saturated_response(e):
+    response = jsonify({'status': 'error', 'message': str(e)}) # Pool full: tell the client when to retry.
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after) # Seconds, estimated from recent call durations.
+    return response
+# ----------------------------------------------------------------------
+
+# --- NEW: hot reload of csv/ (backend/data_manager.py) ---
+# A background thread rebuilds the recommender, explore maps and AI index when a CSV changes,
+# then swaps them in; handlers bind the current objects once per request, so in-flight
+# requests finish on the old data. Disable with DATA_WATCH=0.
+data_manager = None # DataManager instance (None when unavailable).
+try:
+    from data_manager import DataManager
+
+    def _swap_data(snapshot):
+        global recommender, recommender_pool
+        parts = snapshot.parts
+        if 'explore' in parts:
+            explore.set_data(parts['explore']) # Swap the explore maps.
+        if 'ai' in parts:
+            ai_module.set_index(parts['ai']) # Swap the TF-IDF index (and start a new QA cache).
+        new_rec = parts.get('recommender')
+        if recommender_pool is not None and new_rec is not None and new_rec is not recommender:
+            try:
+                recommender_pool.replace(new_rec) # New workers inherit the new recommender; nothing loads on a request.
+            except Exception as e:
+                print("Warning: could not restart the recommender pool, running in-process:", e)
+                pool, recommender_pool = recommender_pool, None
+                pool.shutdown()
+        recommender = parts.get('recommender', recommender) # Swap the recommender last.
+
+    def _warm_data(new_parts, old_parts):
+        if new_parts.get('recommender') is not None and old_parts.get('recommender') is not None:
+            built = new_parts['recommender'].warm_from(old_parts['recommender']) # Prebuild recently used candidate pools.
+            print(f"Data manager: warmed {built} candidate pools.")
+
+    _builders, _initial = {}, {}
+    if CollegeRecommender is not None and recommender is not None:
+        _builders['recommender'] = lambda root: CollegeRecommender(data_root_dir=root) # Full rebuild from csv/.
+        _initial['recommender'] = recommender
+    if 'explore' in sys.modules and hasattr(explore, 'build_explore_data'):
+        _builders['explore'] = lambda root: explore.build_explore_data(os.path.join(root, 'csv'))
+        _initial['explore'] = explore._DATA
+    if ai_module is not None and hasattr(ai_module, 'build_ai_index'):
+        _builders['ai'] = lambda root: ai_module.build_ai_index(os.path.join(root, 'csv'))
+        _initial['ai'] = ai_module._INDEX
+
+    data_manager = DataManager(PROJECT_ROOT, _builders, poll_interval=float(os.environ.get('DATA_WATCH_INTERVAL', 5)),
+                               warm=_warm_data, on_swap=_swap_data)
+    data_manager.publish(_initial) # Adopt the objects built above as snapshot v1 (no second build).
+    if os.environ.get('DATA_WATCH', '1') != '0':
+        data_manager.start() # Start polling csv/ for changes.
+except Exception as _e:
+    print("Warning: CSV hot reload not available:", _e)
+# ----------------------------------------------------------------------
+
 # Serve CSVs from project-root/csv at /csv/<filename>
 CSV_FOLDER = os.path.join(PROJECT_ROOT, 'csv') # Define the path to the CSV data folder.
 
@@ -218,18 +321,20 @@ def ai_guidance():
 def metadata():
     """
     Returns dropdown metadata for the frontend:
-      programs, streams, quotas, categories, locations, sort options
+      programs, streams, quotas, categories, locations, counselling rounds, sort options
     """
-    if recommender is None:
+    rec = recommender # Bind once: a hot reload may swap the global mid-request.
+    if rec is None:
         return jsonify({'error': 'Recommender not available'}), 503 # Return error if recommender is not initialized.
 
     try:
         # gather lists (they are lowercased in recommender; frontend can display them)
-        programs = sorted(recommender.master_rank_df['Program'].dropna().unique().tolist()) if not recommender.master_rank_df.empty else [] # Extract and sort unique program names.
-        streams = sorted(recommender.master_rank_df['Stream'].dropna().unique().tolist()) if not recommender.master_rank_df.empty else [] # Extract and sort unique stream names.
-        quotas = sorted(recommender.master_rank_df['Quota'].dropna().unique().tolist()) if not recommender.master_rank_df.empty else [] # Extract and sort unique quota names.
-        categories = sorted(recommender.master_rank_df['Category'].dropna().unique().tolist()) if not recommender.master_rank_df.empty else [] # Extract and sort unique category names.
-        locations = sorted(recommender.merged_df['District'].dropna().unique().tolist()) if not recommender.merged_df.empty else [] # Extract and sort unique location names.
+        programs = sorted(rec.master_rank_df['Program'].dropna().unique().tolist()) if not rec.master_rank_df.empty else [] # Extract and sort unique program names.
+        streams = sorted(rec.master_rank_df['Stream'].dropna().unique().tolist()) if not rec.master_rank_df.empty else [] # Extract and sort unique stream names.
+        quotas = sorted(rec.master_rank_df['Quota'].dropna().unique().tolist()) if not rec.master_rank_df.empty else [] # Extract and sort unique quota names.
+        categories = sorted(rec.master_rank_df['Category'].dropna().unique().tolist()) if not rec.master_rank_df.empty else [] # Extract and sort unique category names.
+        locations = sorted(rec.merged_df['District'].dropna().unique().tolist()) if not rec.merged_df.empty else [] # Extract and sort unique location names.
+        rounds = rec.get_counselling_rounds() # Round numbers accepted by counselling_round.
 
         sort_options = [
             {'value': 'Predicted Closing Rank', 'label': 'Predicted Closing Rank (asc)'}, # Sort option for rank.
@@ -246,12 +351,58 @@ def metadata():
             'quotas': quotas, # Return list of quotas.
             'categories': categories, # Return list of categories.
             'locations': locations, # Return list of locations.
+            'rounds': rounds, # Return list of counselling rounds.
             'sort_options': sort_options # Return list of sort options.
         })
     except Exception as e:
         print("Error in /metadata:", e) # Log the error.
         return jsonify({'error': str(e)}), 500 # Return a JSON error response.
 
+def _parse_recommend_payload(data):
+    """
+    Turn one /recommend_colleges JSON body into recommend() keyword arguments.
+    Returns (kwargs, top_n, error_message); error_message is None when the payload is valid.
+    """
+    # accept both naming variants
+    user_rank = data.get('rank') or data.get('user_rank') # Get user rank, accepting 'rank' or 'user_rank'.
+    user_program = data.get('program') or data.get('user_program', '') # Get user program.
+    user_stream = data.get('stream') or data.get('user_stream', '') # Get user stream.
+    user_quota = data.get('quota') or data.get('user_quota', '') # Get user quota.
+    user_category = data.get('category') or data.get('user_category', '') # Get user category.
+    user_location = data.get('location') or data.get('user_location', '') # Get user location.
+    counselling_round = data.get('counselling_round') or data.get('round') # Optional round number; None = final round.
+
+    # optional numeric filters
+    try:
+        min_ctc = float(data.get('min_ctc', 0) or 0) # Convert min_ctc to float, default is 0.
+    except Exception:
+        min_ctc = 0.0 # Set min_ctc to 0.0 on conversion error.
+    try:
+        min_placements_score = float(data.get('min_placements_score', 0) or 0) # Convert min_placements_score to float, default is 0.
+    except Exception:
+        min_placements_score = 0.0 # Set min_placements_score to 0.0 on conversion error.
+
+    target_year = int(data.get('target_year', 2026)) # Convert target_year to int, default is 2026.
+    top_n = int(data.get('top_n', 10)) # Convert top_n to int, default is 10.
+
+    # validate required
+    if user_rank is None or str(user_rank).strip() == '' or str(user_program).strip() == '': # Check if required fields (rank and program) are missing.
+        return None, top_n, 'Required fields: rank and program.'
+
+    kwargs = {
+        'user_rank': user_rank,
+        'user_program': user_program,
+        'user_stream': user_stream,
+        'user_quota': user_quota,
+        'user_category': user_category,
+        'user_location': user_location,
+        'min_ctc': min_ctc,
+        'min_placements_score': min_placements_score,
+        'target_year': target_year,
+        'counselling_round': counselling_round
+    }
+    return kwargs, top_n, None
+
 @app.route('/recommend_colleges', methods=['POST'])
 def recommend_colleges():
     """
@@ -263,62 +414,233 @@ def recommend_colleges():
       - min_placements_score (optional numeric)
       - target_year (optional int)
       - top_n (optional int)
+      - counselling_round (optional int): closing ranks as of that counselling round instead of the final round
+      - debug_timings (optional bool): add per-stage milliseconds as 'debug_timings'
     Returns the dictionary result from recommender.recommend()
+    With RECOMMENDER_WORKERS set: 503 + Retry-After when the pool is saturated, 504 on timeout.
     """
-    if recommender is None:
+    rec = recommender # Bind once: a hot reload may swap the global mid-request.
+    if rec is None:
         return jsonify({'status': 'error', 'message': 'Recommender not available.'}), 503 # Return error if recommender is unavailable.
 
     try:
         data = request.get_json() or {} # Get JSON data from the request body.
 
-        # accept both naming variants
-        user_rank = data.get('rank') or data.get('user_rank') # Get user rank, accepting 'rank' or 'user_rank'.
-        user_program = data.get('program') or data.get('user_program', '') # Get user program.
-        user_stream = data.get('stream') or data.get('user_stream', '') # Get user stream.
-        user_quota = data.get('quota') or data.get('user_quota', '') # Get user quota.
-        user_category = data.get('category') or data.get('user_category', '') # Get user category.
-        user_location = data.get('location') or data.get('user_location', '') # Get user location.
+        kwargs, top_n, error = _parse_recommend_payload(data) # Parse and validate the request fields.
+        if error:
+            return jsonify({'status': 'error', 'message': error}), 400 # Return 400 error for missing required fields.
 
-        # optional numeric filters
-        try:
-            min_ctc = float(data.get('min_ctc', 0) or 0) # Convert min_ctc to float, default is 0.
-        except Exception:
-            min_ctc = 0.0 # Set min_ctc to 0.0 on conversion error.
-        try:
-            min_placements_score = float(data.get('min_placements_score', 0) or 0) # Convert min_placements_score to float, default is 0.
-        except Exception:
-            min_placements_score = 0.0 # Set min_placements_score to 0.0 on conversion error.
-
-        target_year = int(data.get('target_year', 2026)) # Convert target_year to int, default is 2026.
-        top_n = int(data.get('top_n', 10)) # Convert top_n to int, default is 10.
-
-        # validate required
-        if user_rank is None or str(user_rank).strip() == '' or str(user_program).strip() == '': # Check if required fields (rank and program) are missing.
-            return jsonify({'status': 'error', 'message': 'Required fields: rank and program.'}), 400 # Return 400 error for missing required fields.
-
-        # call recommender
-        result = recommender.recommend( # Call the recommend method with all user inputs.
-            user_rank=user_rank,
-            user_program=user_program,
-            user_stream=user_stream,
-            user_quota=user_quota,
-            user_category=user_category,
-            user_location=user_location,
-            min_ctc=min_ctc,
-            min_placements_score=min_placements_score,
-            target_year=target_year
-        )
-
-        # trim results to top_n if present
-        if isinstance(result, dict) and 'data' in result and isinstance(result['data'], list): # Check if the result is valid and contains a list of data.
-            result['data'] = result['data'][:top_n] # Trims the list of recommendations to the top_n results.
+        # call recommender (only top_n rows are enriched)
+        started = time.perf_counter() # Wall-clock start for the whole call.
+        result, stages = _run_recommender(rec, 'recommend', dict(kwargs, top_n=top_n), collect_stages=bool(data.get('debug_timings')))
+        if stages is not None:
+            result['debug_timings'] = {'stages_ms': stages, 'total_ms': round((time.perf_counter() - started) * 1000.0, 3)} # Attach the per-stage breakdown.
 
         return jsonify(result) # Return the final recommendation result as JSON.
 
+    except PoolSaturated as e:
+        return _saturated_response(e) # 503 + Retry-After.
+    except PoolTimeout as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 504 # The worker did not answer in time.
     except Exception as e:
         print("Error in recommendation API:", e) # Log the error.
         return jsonify({'status': 'error', 'message': str(e)}), 500 # Return a JSON error response.
 
+MAX_BATCH_PROFILES = 1000 # Upper bound on profiles accepted by one batch call.
+
+@app.route('/recommend_colleges/batch', methods=['POST'])
+def recommend_colleges_batch():
+    """
+    Accepts JSON:
+      - profiles (required): list of objects, each with the same fields as /recommend_colleges
+      - top_n (optional int): default trim for profiles that do not set their own
+    Returns {'status': 'success', 'results': [...]} with one recommend() result per profile, in order.
+    Invalid profiles get an error entry instead of failing the whole batch.
+    """
+    rec = recommender # Bind once: a hot reload may swap the global mid-request.
+    if rec is None:
+        return jsonify({'status': 'error', 'message': 'Recommender not available.'}), 503 # Return error if recommender is unavailable.
+
+    try:
+        data = request.get_json() or {} # Get JSON data from the request body.
+        profiles = data.get('profiles') # List of student profiles.
+        if not isinstance(profiles, list):
+            return jsonify({'status': 'error', 'message': 'Required field: profiles (list).'}), 400 # Return 400 if profiles is missing or not a list.
+        if len(profiles) > MAX_BATCH_PROFILES:
+            return jsonify({'status': 'error', 'message': f'At most {MAX_BATCH_PROFILES} profiles per batch.'}), 400 # Reject oversized batches.
+
+        default_top_n = int(data.get('top_n', 10)) # Batch-level default for top_n.
+        results = [None] * len(profiles) # One result slot per profile.
+        valid_kwargs, valid_positions = [], []
+        for i, profile in enumerate(profiles):
+            try:
+                profile = dict(profile or {})
+                profile.setdefault('top_n', default_top_n)
+                kwargs, top_n, error = _parse_recommend_payload(profile) # Same parsing/validation as the single endpoint.
+            except Exception as e:
+                kwargs, top_n, error = None, default_top_n, str(e)
+            if error:
+                results[i] = {'status': 'error', 'message': error} # Record the per-profile validation error.
+                continue
+            kwargs['top_n'] = top_n # Per-profile result size.
+            valid_kwargs.append(kwargs)
+            valid_positions.append(i)
+
+        # one call: profiles sharing filters are computed together
+        batch_results, _ = _run_recommender(rec, 'recommend_many', {'profiles': valid_kwargs}) # One pool slot for the whole batch.
+        for i, result in zip(valid_positions, batch_results):
+            results[i] = result
+
+        return jsonify({'status': 'success', 'results': results}) # Return all results in request order.
+
+    except PoolSaturated as e:
+        return _saturated_response(e) # 503 + Retry-After.
+    except PoolTimeout as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 504 # The worker did not answer in time.
+    except Exception as e:
+        print("Error in batch recommendation API:", e) # Log the error.
+        return jsonify({'status': 'error', 'message': str(e)}), 500 # Return a JSON error response.
+
+MAX_SWEEP_BUCKETS = 200 # Upper bound on rank buckets per sweep.
+MAX_SWEEP_CANDIDATES = 1000 # Upper bound on candidates listed per sweep.
+
+@app.route('/recommend_colleges/sweep', methods=['POST'])
+def recommend_colleges_sweep():
+    """
+    Admission curve: how the recommendations change over a rank range, in one call.
+    Accepts JSON:
+      - rank_from, rank_to (required): the rank range
+      - program (required), stream, quota, category, location, min_ctc, min_placements_score, target_year, counselling_round: as /recommend_colleges
+      - buckets (optional int, default 10): number of equal rank intervals to count
+      - limit (optional int, default 200): candidates listed at most
+    Returns status, rank_from, rank_to, total, candidates (with their eligible_to threshold)
+    and buckets (eligible_at_start, eligible_at_end, leaving); see CollegeRecommender.rank_sweep().
+    """
+    rec = recommender # Bind once: a hot reload may swap the global mid-request.
+    if rec is None:
+        return jsonify({'status': 'error', 'message': 'Recommender not available.'}), 503 # Return error if recommender is unavailable.
+
+    try:
+        data = request.get_json() or {} # Get JSON data from the request body.
+        rank_from, rank_to = data.get('rank_from'), data.get('rank_to') # The rank range to sweep.
+        if rank_from is None or rank_to is None or str(rank_from).strip() == '' or str(rank_to).strip() == '':
+            return jsonify({'status': 'error', 'message': 'Required fields: rank_from, rank_to and program.'}), 400 # Return 400 if the range is missing.
+
+        kwargs, _, error = _parse_recommend_payload(dict(data, rank=rank_from)) # Same filter parsing as the single endpoint.
+        if error:
+            return jsonify({'status': 'error', 'message': 'Required fields: rank_from, rank_to and program.'}), 400 # Return 400 if program is missing.
+        kwargs.pop('user_rank') # The range replaces the single rank.
+        try:
+            buckets = int(data.get('buckets', 10)) # Convert buckets to int, default is 10.
+            limit = int(data.get('limit', 200)) # Convert limit to int, default is 200.
+        except (TypeError, ValueError):
+            return jsonify({'status': 'error', 'message': 'Invalid value for buckets/limit.'}), 400 # Non-numeric values are a client error.
+        kwargs.update({
+            'rank_from': rank_from,
+            'rank_to': rank_to,
+            'buckets': min(max(buckets, 1), MAX_SWEEP_BUCKETS), # Clamp the bucket count.
+            'limit': min(max(limit, 0), MAX_SWEEP_CANDIDATES), # Clamp the candidate list.
+        })
+
+        result, _ = _run_recommender(rec, 'rank_sweep', kwargs) # One candidate pool for the whole range.
+        return jsonify(result), (400 if result.get('error') == 'invalid_input' else 200) # Bad range / round values are a client error.
+
+    except PoolSaturated as e:
+        return _saturated_response(e) # 503 + Retry-After.
+    except PoolTimeout as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 504 # The worker did not answer in time.
+    except Exception as e:
+        print("Error in rank sweep API:", e) # Log the error.
+        return jsonify({'status': 'error', 'message': str(e)}), 500 # Return a JSON error response.
+
+MAX_PAGE_SIZE = 100 # Upper bound on recommendations per page.
+
+@app.route('/recommend_colleges/page', methods=['POST'])
+def recommend_colleges_page():
+    """
+    Cursor-paginated recommendations.
+    Accepts JSON:
+      - first page: the same fields as /recommend_colleges, plus page_size (optional int, default 10)
+      - next pages: cursor (the next_cursor of the previous response) and optionally page_size
+    Returns recommend()'s result plus next_cursor (null on the last page) and total.
+    The ranked list behind a cursor is kept server-side for a few minutes; an expired cursor returns 410.
+    Always runs in this process (cursors live in this process's cache), also with RECOMMENDER_WORKERS set.
+    """
+    rec = recommender # Bind once: a hot reload may swap the global mid-request.
+    if rec is None:
+        return jsonify({'status': 'error', 'message': 'Recommender not available.'}), 503 # Return error if recommender is unavailable.
+
+    try:
+        data = request.get_json() or {} # Get JSON data from the request body.
+        page_size = min(max(int(data.get('page_size', 10)), 1), MAX_PAGE_SIZE) # Clamp the page size.
+        cursor = data.get('cursor') # Opaque cursor from the previous page, if any.
+
+        if cursor:
+            result = rec.recommend_page(cursor=str(cursor), page_size=page_size) # Slice + enrich the next page only.
+            if result.get('status') == 'error':
+                return jsonify(result), (410 if 'expired' in result.get('message', '') else 400) # Expired vs malformed cursor.
+            return jsonify(result)
+
+        kwargs, _, error = _parse_recommend_payload(data) # Same parsing/validation as the single endpoint.
+        if error:
+            return jsonify({'status': 'error', 'message': error}), 400 # Return 400 error for missing required fields.
+        return jsonify(rec.recommend_page(page_size=page_size, **kwargs)) # First page; stores the ranked list.
+
+    except Exception as e:
+        print("Error in paginated recommendation API:", e) # Log the error.
+        return jsonify({'status': 'error', 'message': str(e)}), 500 # Return a JSON error response.
+
+@app.route('/recommend_colleges/cache_stats', methods=['GET'])
+def recommend_cache_stats():
+    """
+    Returns the recommender's candidate-pool cache counters:
+      size, maxsize, ttl, hits, misses, hit_rate, evictions, expirations, invalidations, data_version
+    """
+    rec = recommender # Bind once: a hot reload may swap the global mid-request.
+    if rec is None:
+        return jsonify({'error': 'Recommender not available'}), 503 # Return error if recommender is not initialized.
+    return jsonify(rec.cache_stats()) # Return the cache counters as JSON.
+
+@app.route('/recommend_colleges/timings', methods=['GET'])
+def recommend_timings():
+    """
+    Returns per-stage recommend() histograms (count, total_ms, mean_ms, max_ms, histogram).
+    Stages are only aggregated when the server runs with RECOMMENDER_TIMINGS=1.
+    """
+    rec = recommender # Bind once: a hot reload may swap the global mid-request.
+    if rec is None:
+        return jsonify({'error': 'Recommender not available'}), 503 # Return error if recommender is not initialized.
+    return jsonify(rec.timing_stats()) # Return the stage histograms as JSON.
+
+@app.route('/recommend_colleges/pool', methods=['GET'])
+def recommend_pool_stats():
+    """
+    Returns the recommender process pool counters (RECOMMENDER_WORKERS): workers, start_method, pids, data_version,
+    pending, max_pending, timeout, completed, rejected, timeouts, failures, restarts, reloads, mean_ms
+    """
+    if recommender_pool is None:
+        return jsonify({'error': 'Recommender pool not enabled (set RECOMMENDER_WORKERS)'}), 503 # Return error if running in-process.
+    return jsonify(recommender_pool.stats()) # Return the pool counters as JSON.
+
+@app.route('/data/status', methods=['GET'])
+def data_status():
+    """
+    Returns the hot-reload state: snapshot version, created_at, files watched, reloads, failures,
+    last_error, last_build_seconds, watching, poll_interval
+    """
+    if data_manager is None:
+        return jsonify({'error': 'Data manager not available'}), 503 # Return error if hot reload is not set up.
+    return jsonify(data_manager.stats()) # Return the data manager counters as JSON.
+
+@app.route('/memory', methods=['GET'])
+def memory():
+    """
+    Returns this worker's memory (kB, from /proc/self/status): pid, VmRSS, VmHWM, RssAnon, RssFile, RssShmem,
+    plus shared_mapped_bytes. RssFile covers the memory-mapped arrays shared with the other workers;
+    RssAnon is the worker's private memory.
+    """
+    return jsonify(memory_status()) # Return the per-worker memory figures as JSON.
+
 # if __name__ == '__main__':
 #     app.run(debug=True) # Run the Flask application in debug mode.
 
@@ -0,0 +1,288 @@
+# backend/association_rules.py
+"""
+Association-rule helpers for the recommender.
+
+CompiledRules turns the rules table (antecedent / consequent strings such as
+"quota=all india;stream=b.e/b. tech" -> "category=open") into integer item ids once,
+indexed by antecedent itemset. At request time the user's filters produce at most
+2^5 - 1 antecedent lookups, whatever the number of rules, and the boosts of all
+candidates come out of one gather-and-sum over an item weight vector.
+
+Rule mining (generate_rules) uses vertical Eclat: every item keeps the set of rows
+(transactions) it appears in as a bitset (a Python int), frequent itemsets grow by
+intersecting bitsets, and the first-level subtrees can be counted on a process pool.
+The output keeps the associates_rules.csv schema: antecedent, consequent, support,
+confidence, lift.
+"""
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+RULE_ATTRIBUTES = ['Program', 'Stream', 'Quota', 'Category', 'District']
+RULE_COLUMNS = ['antecedent', 'consequent', 'support', 'confidence', 'lift']
+
+
+def _split_items(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    return [s.strip() for s in str(value).split(';') if s.strip()]
+
+
+class CompiledRules:
+    """
+    - item_ids: item string ("attr=value") -> integer id
+    - by_antecedent: frozenset of item ids -> (consequent key ids array, weight array)
+    - consequents: consequent key id -> tuple of item ids (almost always a single item)
+    Rule weight is confidence * support, as before.
+    """
+
+    def __init__(self, rules_df):
+        self.item_ids = {}
+        self.consequents = []
+        consequent_ids = {}
+        grouped = {}
+
+        if rules_df is not None and not rules_df.empty:
+            antecedents = rules_df['antecedent'].tolist() if 'antecedent' in rules_df.columns else []
+            consequent_col = rules_df['consequent'].tolist() if 'consequent' in rules_df.columns else [None] * len(antecedents)
+            confidence = pd.to_numeric(rules_df.get('confidence', pd.Series(0.0, index=rules_df.index)), errors='coerce').fillna(0.0).to_numpy(dtype=float)
+            support = pd.to_numeric(rules_df.get('support', pd.Series(0.0, index=rules_df.index)), errors='coerce').fillna(0.0).to_numpy(dtype=float)
+            weights = confidence * support
+
+            for ante, cons, weight in zip(antecedents, consequent_col, weights):
+                ante_items = _split_items(ante)
+                cons_items = _split_items(cons)
+                if not ante_items:
+                    continue
+                ante_key = frozenset(self._item_id(i) for i in ante_items)
+                cons_key = tuple(sorted(set(self._item_id(i) for i in cons_items)))
+                if cons_key not in consequent_ids:
+                    consequent_ids[cons_key] = len(self.consequents)
+                    self.consequents.append(cons_key)
+                per_consequent = grouped.setdefault(ante_key, {})
+                cid = consequent_ids[cons_key]
+                per_consequent[cid] = per_consequent.get(cid, 0.0) + float(weight)
+
+        self.by_antecedent = {
+            key: (np.fromiter(d.keys(), dtype=np.int64, count=len(d)), np.fromiter(d.values(), dtype=float, count=len(d)))
+            for key, d in grouped.items()
+        }
+        self.n_rules = sum(len(d) for d in grouped.values())
+
+    def _item_id(self, item):
+        if item not in self.item_ids:
+            self.item_ids[item] = len(self.item_ids)
+        return self.item_ids[item]
+
+    def encode_items(self, frame, attributes=RULE_ATTRIBUTES):
+        """
+        Item-id matrix (rows x attributes) for a candidates frame; -1 where the attribute
+        is empty or the "attr=value" item never appears in any rule.
+        """
+        out = np.full((len(frame), len(attributes)), -1, dtype=np.int64)
+        for j, attr in enumerate(attributes):
+            if attr not in frame.columns:
+                continue
+            values = frame[attr].astype(object).where(frame[attr].notna(), '').astype(str).str.strip().str.lower()
+            items = (attr.lower() + '=') + values
+            ids = items.map(self.item_ids)
+            ids = ids.where(values != '', np.nan)
+            out[:, j] = ids.fillna(-1).to_numpy(dtype=np.int64)
+        return out
+
+    def consequent_weights(self, user_items):
+        """Summed rule weight per consequent key for every rule whose antecedent is contained in user_items."""
+        weights = np.zeros(len(self.consequents), dtype=float)
+        user_ids = sorted(self.item_ids[i] for i in user_items if i in self.item_ids)
+        for size in range(1, len(user_ids) + 1):
+            for subset in itertools.combinations(user_ids, size):
+                hit = self.by_antecedent.get(frozenset(subset))
+                if hit is not None:
+                    np.add.at(weights, hit[0], hit[1])
+        return weights
+
+    def boosts(self, candidate_items, user_items):
+        """
+        Boost per candidate row: sum of weights of applicable rules whose consequent items
+        are all present in the candidate. candidate_items comes from encode_items().
+        """
+        n = candidate_items.shape[0]
+        scores = np.zeros(n, dtype=float)
+        if n == 0 or not self.by_antecedent:
+            return scores
+        cons_weights = self.consequent_weights(user_items)
+        active = np.flatnonzero(cons_weights)
+        if active.size == 0:
+            return scores
+
+        # single-item consequents: one weight per item, gathered through the candidates' item ids
+        item_weights = np.zeros(len(self.item_ids) + 1, dtype=float)  # last slot absorbs -1 (no item)
+        for cid in active:
+            key = self.consequents[cid]
+            if len(key) == 1:
+                item_weights[key[0]] += cons_weights[cid]
+            else:
+                # multi-item (or empty) consequent: the candidate must hold every item
+                present = np.ones(n, dtype=bool)
+                for item in key:
+                    present &= (candidate_items == item).any(axis=1)
+                scores += present * cons_weights[cid]
+        scores += item_weights[candidate_items].sum(axis=1)
+        return scores
+
+
+# -------------------------
+# Rule mining (vertical Eclat over bitsets)
+# -------------------------
+def build_transactions(df, attributes=RULE_ATTRIBUTES):
+    """
+    Vertical transaction layout built column by column (no per-row Python loop).
+    Each row of df is a transaction holding one "attr=value" item per non-empty attribute.
+    Returns (items, item_attr, tidsets, n_transactions):
+    - items: item strings, item_attr: attribute position of each item
+    - tidsets: one int bitset per item (bit r set when transaction r holds the item)
+    - n_transactions: rows with at least one item
+    """
+    items, item_attr, tidsets = [], [], []
+    has_item = np.zeros(len(df), dtype=bool)
+    for pos, attr in enumerate(attributes):
+        if attr not in df.columns:
+            continue
+        col = df[attr]
+        values = col.astype(object).where(col.notna(), '').astype(str).str.strip().str.lower()
+        present = (values != '').to_numpy()
+        if not present.any():
+            continue
+        has_item |= present
+        codes, uniques = pd.factorize(values.where(present, None))
+        for code, value in enumerate(uniques):
+            mask = codes == code
+            items.append(f"{attr.lower()}={value}")
+            item_attr.append(pos)
+            tidsets.append(int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little'))
+    return items, item_attr, tidsets, int(has_item.sum())
+
+
+def _eclat(prefix, extensions, item_attr, is_frequent, max_itemset_size, out, only=None):
+    """
+    Depth-first Eclat. extensions: list of (item, tidset of prefix + item, count), all frequent.
+    Appends (itemset tuple, count) to out. `only` restricts the walk to one position of extensions
+    (one independent subtree, used by the process-pool tasks).
+    """
+    positions = range(len(extensions)) if only is None else [only]
+    for i in positions:
+        item, tids, count = extensions[i]
+        itemset = prefix + (item,)
+        out.append((itemset, count))
+        if len(itemset) >= max_itemset_size:
+            continue
+        used_attrs = {item_attr[x] for x in itemset}
+        next_ext = []
+        for other, other_tids, _ in extensions[i + 1:]:
+            if item_attr[other] in used_attrs:
+                continue  # one item per attribute per transaction: the intersection is always empty
+            joint = tids & other_tids
+            joint_count = joint.bit_count()
+            if is_frequent(joint_count):
+                next_ext.append((other, joint, joint_count))
+        if next_ext:
+            _eclat(itemset, next_ext, item_attr, is_frequent, max_itemset_size, out)
+
+
+_WORKER_STATE = {}
+
+
+def _init_worker(extensions, item_attr, n_transactions, min_support, max_itemset_size):
+    _WORKER_STATE.update(
+        extensions=extensions, item_attr=item_attr, n_transactions=n_transactions,
+        min_support=min_support, max_itemset_size=max_itemset_size
+    )
+
+
+def _mine_subtree(start):
+    """Process-pool task: mine the subtree rooted at the start-th frequent item."""
+    st = _WORKER_STATE
+    n, min_support = st['n_transactions'], st['min_support']
+    out = []
+    _eclat((), st['extensions'], st['item_attr'], lambda c: c / n >= min_support, st['max_itemset_size'], out, only=start)
+    return out
+
+
+def mine_frequent_itemsets(tidsets, item_attr, n_transactions, min_support=0.02, max_itemset_size=3, n_jobs=1):
+    """
+    Frequent itemsets (support = count / n_transactions >= min_support) up to max_itemset_size.
+    Returns dict frozenset(item index) -> count. n_jobs > 1 splits the first-level subtrees
+    across a process pool (n_jobs=None uses every core).
+    """
+    if n_transactions == 0:
+        return {}
+
+    def is_frequent(count):
+        return count / n_transactions >= min_support
+
+    roots = []
+    for item, tids in enumerate(tidsets):
+        count = tids.bit_count()
+        if is_frequent(count):
+            roots.append((item, tids, count))
+
+    results = []
+    workers = (os.cpu_count() or 1) if n_jobs is None else int(n_jobs)
+    if workers > 1 and len(roots) > 1 and max_itemset_size > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(roots, item_attr, n_transactions, min_support, max_itemset_size)
+        ) as pool:
+            for part in pool.map(_mine_subtree, range(len(roots))):
+                results.extend(part)
+    else:
+        _eclat((), roots, item_attr, is_frequent, max_itemset_size, results)
+
+    return {frozenset(iset): count for iset, count in results}
+
+
+def generate_rules(df, attributes=RULE_ATTRIBUTES, min_support=0.02, max_itemset_size=3, n_jobs=1):
+    """
+    Mine single-consequent association rules from the rows of df.
+    Returns a DataFrame with RULE_COLUMNS sorted by confidence desc, then support desc.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+
+    items, item_attr, tidsets, n_transactions = build_transactions(df, attributes)
+    if n_transactions == 0:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+
+    frequent = mine_frequent_itemsets(tidsets, item_attr, n_transactions, min_support, max_itemset_size, n_jobs)
+    support_map = {iset: count / n_transactions for iset, count in frequent.items()}
+
+    # for each frequent itemset with size>=2, consider all splits where consequent size=1
+    rules = []
+    for iset, sup_ab in support_map.items():
+        if len(iset) < 2:
+            continue
+        for consequent_item in iset:
+            antecedent = iset - {consequent_item}
+            consequent = frozenset([consequent_item])
+            if antecedent in support_map and consequent in support_map:
+                sup_a = support_map[antecedent]
+                sup_b = support_map[consequent]
+                confidence = sup_ab / sup_a if sup_a > 0 else 0.0
+                lift = confidence / sup_b if sup_b > 0 else 0.0
+                rules.append({
+                    'antecedent': ';'.join(sorted(items[i] for i in antecedent)),
+                    'consequent': items[consequent_item],
+                    'support': round(sup_ab, 6),
+                    'confidence': round(confidence, 6),
+                    'lift': round(lift, 6)
+                })
+
+    if not rules:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+    rules_df = pd.DataFrame(rules, columns=RULE_COLUMNS)
+    # sort by confidence desc then support desc; stable, with the rule text as a final tie-breaker
+    return rules_df.sort_values(
+        by=['confidence', 'support', 'antecedent', 'consequent'], ascending=[False, False, True, True], kind='mergesort'
+    ).reset_index(drop=True)
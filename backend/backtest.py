@@ -0,0 +1,215 @@
+# backend/backtest.py
+"""
+Historical backtest of the closing-rank predictor (_predict_top_colleges_rank_only).
+
+For every test year Y (each data year that has at least one earlier year):
+ - a CollegeRecommender is built from the rank files of the years before Y only
+ - synthetic queries are generated from year Y's actual final-round rows: a program,
+   a random subset of stream / quota / category / district filters and a user rank drawn
+   around a real closing rank of that year
+ - every query is replayed against the past-only predictor with target_year=Y; each returned
+   candidate is "predicted admissible" when its predicted closing rank >= user rank and
+   "actually admissible" when its real year-Y closing rank >= user rank
+   (candidates whose group has no year-Y row only count towards coverage)
+ - reported per year and overall: precision, recall, f1, accuracy, coverage and per-query latency
+   (mean / p50 / p95 / max, milliseconds)
+
+Query chunks run on a process pool; each worker builds its own past-only recommender once.
+
+Usage:
+    python backend/backtest.py [--queries 2000] [--workers N] [--seed 0] [--out results/backtest.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from recommendation import CollegeRecommender  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILTER_PROBABILITY = {'stream': 0.6, 'quota': 0.5, 'category': 0.6, 'district': 0.2}
+CHUNK_SIZE = 100
+
+
+# -------------------------
+# Data helpers
+# -------------------------
+def available_years(data_root_dir):
+    csv_dir = os.path.join(data_root_dir, 'csv')
+    years = []
+    for fname in os.listdir(csv_dir) if os.path.isdir(csv_dir) else []:
+        if fname.startswith('rank_') and fname.endswith('.csv'):
+            try:
+                years.append(int(fname[5:-4]))
+            except ValueError:
+                continue
+    return sorted(years)
+
+
+def actual_table(data_root_dir, year):
+    """Year-Y final-round rows (decoded strings) with Closing Rank, from a recommender built on that year only."""
+    rec = CollegeRecommender(data_root_dir, years=[year], train_model=False)
+    df = rec._decode_text_columns(rec.final_round_df)
+    df = df[df['Closing Rank'].notna()]
+    cols = CollegeRecommender.GROUP_COLS + ['District', 'Closing Rank']
+    return df[cols].reset_index(drop=True)
+
+
+def make_queries(actual, n_queries, rng):
+    """Synthetic (filters, user_rank) queries drawn from the actual rows of the test year."""
+    if actual.empty:
+        return []
+    picks = rng.integers(0, len(actual), size=n_queries)
+    rank_rows = rng.integers(0, len(actual), size=n_queries)
+    noise = np.exp(rng.normal(0.0, 0.5, size=n_queries))
+    closing = actual['Closing Rank'].to_numpy(dtype=float)
+    queries = []
+    for k in range(n_queries):
+        row = actual.iloc[picks[k]]
+        q = {'program': row['Program'], 'stream': '', 'quota': '', 'category': '', 'district': ''}
+        for key, p in FILTER_PROBABILITY.items():
+            if rng.random() < p:
+                q[key] = row['District'] if key == 'district' else row[key.capitalize()]
+        q['user_rank'] = max(1.0, round(closing[rank_rows[k]] * noise[k]))
+        queries.append(q)
+    return queries
+
+
+# -------------------------
+# Worker side
+# -------------------------
+_WORKER = {}
+
+
+def _init_worker(data_root_dir, train_years, actual_records, year):
+    _WORKER['rec'] = CollegeRecommender(data_root_dir, years=train_years, train_model=False)
+    _WORKER['actual'] = {tuple(r[:5]): float(r[6]) for r in actual_records}
+    _WORKER['year'] = year
+
+
+def _run_chunk(queries):
+    """Replay a chunk of queries; returns confusion counts, coverage counts and per-query latencies (ms)."""
+    rec, actual, year = _WORKER['rec'], _WORKER['actual'], _WORKER['year']
+    tp = fp = fn = tn = covered = returned = 0
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        pred = rec._predict_top_colleges_rank_only(
+            program=q['program'], stream=q['stream'], quota=q['quota'],
+            category=q['category'], district=q['district'], target_year=year
+        )
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        if pred.empty:
+            continue
+        keys = list(zip(*(pred[c].astype(str) for c in CollegeRecommender.GROUP_COLS)))
+        predicted = pred['Predicted Closing Rank'].to_numpy(dtype=float)
+        for key, p in zip(keys, predicted):
+            returned += 1
+            real = actual.get(key)
+            if real is None:
+                continue
+            covered += 1
+            pred_ok, real_ok = p >= q['user_rank'], real >= q['user_rank']
+            if pred_ok and real_ok:
+                tp += 1
+            elif pred_ok:
+                fp += 1
+            elif real_ok:
+                fn += 1
+            else:
+                tn += 1
+    return {'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn, 'covered': covered, 'returned': returned, 'latencies': latencies}
+
+
+# -------------------------
+# Driver
+# -------------------------
+def _summarize(counts, latencies):
+    tp, fp, fn, tn = counts['tp'], counts['fp'], counts['fn'], counts['tn']
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    total = tp + fp + fn + tn
+    lat = np.asarray(latencies, dtype=float)
+    return {
+        'queries': int(lat.size),
+        'candidates': counts['returned'],
+        'coverage': round(counts['covered'] / counts['returned'], 4) if counts['returned'] else 0.0,
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+        'f1': round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        'accuracy': round((tp + tn) / total, 4) if total else 0.0,
+        'confusion': {'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn},
+        'latency_ms': {
+            'mean': round(float(lat.mean()), 3) if lat.size else 0.0,
+            'p50': round(float(np.percentile(lat, 50)), 3) if lat.size else 0.0,
+            'p95': round(float(np.percentile(lat, 95)), 3) if lat.size else 0.0,
+            'max': round(float(lat.max()), 3) if lat.size else 0.0,
+        },
+    }
+
+
+def run_backtest(data_root_dir=BASE_DIR, n_queries=2000, workers=None, seed=0, years=None):
+    """
+    Backtest every year that has earlier data (or just `years`). Returns
+    {'years': {year: summary}, 'overall': summary, 'settings': {...}}.
+    """
+    all_years = available_years(data_root_dir)
+    test_years = [y for y in (years or all_years) if any(p < y for p in all_years)]
+    workers = workers or os.cpu_count() or 1
+    rng = np.random.default_rng(seed)
+
+    report, total_counts, all_latencies = {}, {'tp': 0, 'fp': 0, 'fn': 0, 'tn': 0, 'covered': 0, 'returned': 0}, []
+    for year in test_years:
+        train_years = [y for y in all_years if y < year]
+        actual = actual_table(data_root_dir, year)
+        queries = make_queries(actual, n_queries, rng)
+        chunks = [queries[i:i + CHUNK_SIZE] for i in range(0, len(queries), CHUNK_SIZE)]
+        records = actual[CollegeRecommender.GROUP_COLS + ['District', 'Closing Rank']].astype(object).values.tolist()
+
+        started = time.perf_counter()
+        counts = {k: 0 for k in total_counts}
+        latencies = []
+        with ProcessPoolExecutor(max_workers=min(workers, max(1, len(chunks))), initializer=_init_worker,
+                                 initargs=(data_root_dir, train_years, records, year)) as pool:
+            for part in pool.map(_run_chunk, chunks):
+                for k in counts:
+                    counts[k] += part[k]
+                latencies.extend(part['latencies'])
+
+        summary = _summarize(counts, latencies)
+        summary['train_years'] = train_years
+        summary['wall_seconds'] = round(time.perf_counter() - started, 2)
+        report[str(year)] = summary
+        for k in total_counts:
+            total_counts[k] += counts[k]
+        all_latencies.extend(latencies)
+        print(f"Backtest {year} (trained on {train_years}): precision {summary['precision']:.4f}, "
+              f"recall {summary['recall']:.4f}, p50 {summary['latency_ms']['p50']:.2f} ms, {summary['wall_seconds']} s")
+
+    return {
+        'years': report,
+        'overall': _summarize(total_counts, all_latencies),
+        'settings': {'queries_per_year': n_queries, 'workers': workers, 'seed': seed},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backtest the closing-rank predictor year by year.")
+    parser.add_argument('--root', default=BASE_DIR, help="project root containing csv/")
+    parser.add_argument('--queries', type=int, default=2000, help="synthetic queries per test year")
+    parser.add_argument('--workers', type=int, default=None, help="process-pool size (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--years', type=int, nargs='*', default=None, help="test years (default: all with history)")
+    parser.add_argument('--out', default=os.path.join(BASE_DIR, 'results', 'backtest.json'))
+    args = parser.parse_args()
+
+    result = run_backtest(args.root, args.queries, args.workers, args.seed, args.years)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result['overall'], indent=2))
+    print("Backtest report written to", args.out)
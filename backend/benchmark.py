@@ -0,0 +1,229 @@
+# backend/benchmark.py
+"""
+Scaling benchmark for the recommender on synthetic data.
+
+generate_dataset(src_root, dst_root, scale) writes a copy of csv/ where every institute is
+replicated `scale` times ("<name> - Campus <k>" for k >= 1), with closing/opening ranks and
+CTC figures perturbed per copy, so rank_20xx.csv / placement.csv / reviews.csv / college.csv
+grow about `scale` times while keeping the existing schemas. associates_rules.csv is not
+copied, so rules are mined from the synthetic rows.
+
+For every scale the suite times:
+ - CollegeRecommender.__init__ (load, prepare, rule mining, admission-model training)
+ - recommend(): cold (candidate-pool cache miss) and warm (hit) latencies over sampled queries
+ - association-rule mining on its own (_generate_association_rules)
+ - GET /metadata through the Flask test client
+and writes everything to a JSON report (default results/benchmark.json).
+
+Usage:
+    python backend/benchmark.py [--scales 1 10 50] [--queries 200] [--out results/benchmark.json] [--keep-data]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from recommendation import CollegeRecommender  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# institute-name column of each CSV family
+NAME_COLUMNS = {'rank_': 'Institute', 'placement': 'Institute', 'college': 'Institute', 'reviews': 'college_name'}
+RANK_COLUMNS = ['Opening Rank', 'Closing Rank']
+CTC_COLUMNS = ['average_ctc', 'median_ctc', 'highest_ctc']
+
+
+# -------------------------
+# Synthetic data
+# -------------------------
+def _campus_name(name, k):
+    return name if k == 0 or pd.isna(name) else f"{name} - Campus {k}"
+
+
+def _replicate(df, name_col, scale, rng, rank_cols=(), ctc_cols=()):
+    parts = []
+    for k in range(scale):
+        part = df.copy()
+        if name_col in part.columns:
+            part[name_col] = part[name_col].map(lambda v, k=k: _campus_name(v, k))
+        if k:
+            for col in rank_cols:
+                if col in part.columns:
+                    values = pd.to_numeric(part[col], errors='coerce')
+                    part[col] = (values * rng.lognormal(0.0, 0.15, len(part))).round().astype('Int64')
+            for col in ctc_cols:
+                if col in part.columns:
+                    values = pd.to_numeric(part[col], errors='coerce')
+                    part[col] = (values * rng.lognormal(0.0, 0.1, len(part))).round(2)
+        parts.append(part)
+    out = pd.concat(parts, ignore_index=True)
+    for id_col in ('Sr.No', 'review_id', 'college_id'):
+        if id_col in out.columns:
+            out[id_col] = np.arange(1, len(out) + 1)
+    return out
+
+
+def generate_dataset(src_root, dst_root, scale, seed=0):
+    """Write dst_root/csv/*.csv at `scale` times the size of src_root/csv. Returns {file: rows}."""
+    rng = np.random.default_rng(seed)
+    src_csv, dst_csv = os.path.join(src_root, 'csv'), os.path.join(dst_root, 'csv')
+    os.makedirs(dst_csv, exist_ok=True)
+    rows = {}
+    for fname in sorted(os.listdir(src_csv)):
+        if not fname.endswith('.csv') or fname == CollegeRecommender.RULES_FILENAME:
+            continue
+        name_col = next((col for prefix, col in NAME_COLUMNS.items() if fname.startswith(prefix)), None)
+        df = pd.read_csv(os.path.join(src_csv, fname), dtype='object')
+        if name_col is not None:
+            df = _replicate(df, name_col, scale, rng,
+                            rank_cols=RANK_COLUMNS if fname.startswith('rank_') else (),
+                            ctc_cols=CTC_COLUMNS if fname.startswith('placement') else ())
+        df.to_csv(os.path.join(dst_csv, fname), index=False)
+        rows[fname] = int(len(df))
+    return rows
+
+
+# -------------------------
+# Timers
+# -------------------------
+def _latency_summary(seconds):
+    ms = np.asarray(seconds, dtype=float) * 1000.0
+    if not ms.size:
+        return {'n': 0}
+    return {
+        'n': int(ms.size),
+        'mean': round(float(ms.mean()), 3),
+        'p50': round(float(np.percentile(ms, 50)), 3),
+        'p95': round(float(np.percentile(ms, 95)), 3),
+        'max': round(float(ms.max()), 3),
+    }
+
+
+def _sample_queries(rec, n_queries, rng):
+    programs = rec.master_rank_df['Program'].dropna().astype(str).unique().tolist() if not rec.master_rank_df.empty else []
+    if not programs:
+        return []
+    closing = pd.to_numeric(rec.master_rank_df['Closing Rank'], errors='coerce').dropna().to_numpy()
+    categories = [''] + rec.master_rank_df['Category'].dropna().astype(str).unique().tolist()
+    queries = []
+    for _ in range(n_queries):
+        queries.append({
+            'user_rank': float(rng.choice(closing)) if closing.size else 10000.0,
+            'user_program': str(rng.choice(programs)),
+            'user_category': str(rng.choice(categories)),
+            'min_ctc': float(rng.choice([0, 0, 0, 5])),
+        })
+    return queries
+
+
+def _time_metadata(rec, repeats=5):
+    """GET /metadata through the Flask test client with `rec` as the app's recommender."""
+    try:
+        import app as app_module
+    except Exception as e:
+        print("Benchmark: app module unavailable, skipping /metadata:", e)
+        return None
+    previous = app_module.recommender
+    app_module.recommender = rec
+    try:
+        client = app_module.app.test_client()
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            response = client.get('/metadata')
+            timings.append(time.perf_counter() - t0)
+            if response.status_code != 200:
+                print("Benchmark: /metadata returned", response.status_code)
+        return _latency_summary(timings)
+    finally:
+        app_module.recommender = previous
+
+
+def benchmark_scale(scale, n_queries=200, seed=0, keep_data=False, src_root=BASE_DIR):
+    data_root = tempfile.mkdtemp(prefix=f"recommender-bench-x{scale}-")
+    try:
+        rows = generate_dataset(src_root, data_root, scale, seed)
+
+        t0 = time.perf_counter()
+        rec = CollegeRecommender(data_root)
+        init_seconds = time.perf_counter() - t0
+
+        rng = np.random.default_rng(seed)
+        queries = _sample_queries(rec, n_queries, rng)
+        cold, warm = [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            rec.recommend(**q)
+            cold.append(time.perf_counter() - t0)
+        for q in queries:  # same queries again: candidate pools are cached now
+            t0 = time.perf_counter()
+            rec.recommend(**q)
+            warm.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        rules = rec._generate_association_rules()
+        rules_seconds = time.perf_counter() - t0
+
+        result = {
+            'scale': scale,
+            'rows': rows,
+            'rank_rows': int(len(rec.merged_df)),
+            'groups': int(len(rec.prediction_table)),
+            'init_seconds': round(init_seconds, 3),
+            'recommend_cold_ms': _latency_summary(cold),
+            'recommend_warm_ms': _latency_summary(warm),
+            'rule_mining_seconds': round(rules_seconds, 3),
+            'rules': int(len(rules)),
+            'metadata_ms': _time_metadata(rec),
+        }
+        if keep_data:
+            result['data_root'] = data_root
+        return result
+    finally:
+        if not keep_data:
+            shutil.rmtree(data_root, ignore_errors=True)
+
+
+def run_benchmarks(scales=(1, 10), n_queries=200, seed=0, keep_data=False):
+    results = []
+    for scale in scales:
+        print(f"Benchmark: scale x{scale} ...")
+        result = benchmark_scale(scale, n_queries, seed, keep_data)
+        print(f"  init {result['init_seconds']} s, recommend p50 cold {result['recommend_cold_ms'].get('p50')} ms / "
+              f"warm {result['recommend_warm_ms'].get('p50')} ms, rules {result['rule_mining_seconds']} s")
+        results.append(result)
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'cpus': os.cpu_count(),
+            'platform': platform.platform(),
+        },
+        'settings': {'queries': n_queries, 'seed': seed},
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the recommender on synthetic data at several scales.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--queries', type=int, default=200, help="recommend() queries per scale")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep-data', action='store_true', help="keep the generated CSV directories")
+    parser.add_argument('--out', default=os.path.join(BASE_DIR, 'results', 'benchmark.json'))
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.scales, args.queries, args.seed, args.keep_data)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print("Benchmark report written to", args.out)
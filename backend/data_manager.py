@@ -0,0 +1,164 @@
+# backend/data_manager.py
+"""
+Hot reload of the CSV data with atomic snapshot swaps.
+
+A DataSnapshot is an immutable bundle of everything the request handlers read
+(app.py registers the parts):
+ - recommender: a fully built CollegeRecommender
+ - explore: the explore maps (explore.build_explore_data)
+ - ai: the TF-IDF index (ai.build_ai_index)
+plus the csv/ signature it was built from.
+
+DataManager keeps the current snapshot behind a single reference. A daemon thread polls
+the mtimes/sizes of csv/*.csv; once a change has been stable for one poll interval it
+builds a complete new snapshot off the request path (warming the new recommender's
+candidate-pool cache with the most recently used filters) and then swaps the reference.
+on_swap(snapshot) then hands the parts to the modules that serve them (one reference
+assignment each); handlers read that reference once per request and use it until they
+return, so in-flight requests finish on the old data and never see a half-built one.
+A failed build keeps serving the old snapshot.
+"""
+import os
+import time
+import threading
+from collections import namedtuple
+
+DataSnapshot = namedtuple('DataSnapshot', ['version', 'created_at', 'signature', 'parts'])
+
+IGNORED_FILES = {'associates_rules.csv'}  # derived from the rank data (and written by the recommender itself)
+
+
+def csv_signature(csv_dir):
+    """Sorted (file name, mtime_ns, size) of every data CSV; changes whenever a file is added, removed or rewritten."""
+    entries = []
+    try:
+        with os.scandir(csv_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.csv') and entry.name not in IGNORED_FILES:
+                    st = entry.stat()
+                    entries.append((entry.name, st.st_mtime_ns, st.st_size))
+    except FileNotFoundError:
+        pass
+    return tuple(sorted(entries))
+
+
+class DataManager:
+    """
+    - project_root: directory containing csv/
+    - builders: dict part name -> callable(project_root) -> part
+    - poll_interval: seconds between csv/ checks
+    - warm: callable(new parts, old parts) run before a swap (e.g. cache warm-up); optional
+    - on_swap: callable(snapshot) run after every publish; optional
+    """
+
+    def __init__(self, project_root, builders, poll_interval=5.0, warm=None, on_swap=None):
+        self.project_root = os.path.abspath(project_root)
+        self.csv_dir = os.path.join(self.project_root, 'csv')
+        self.builders = dict(builders)
+        self.poll_interval = poll_interval
+        self.warm = warm
+        self.on_swap = on_swap
+        self._snapshot = None
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_build_seconds = None
+
+    # -------------------------
+    # Snapshot access
+    # -------------------------
+    def current(self):
+        return self._snapshot
+
+    def publish(self, parts, signature=None):
+        """
+        Swap in a snapshot built from `parts` (dict) and run on_swap. Returns the new snapshot.
+        Also used to adopt parts that were already built at startup without building them twice.
+        """
+        snap = DataSnapshot(
+            version=(self._snapshot.version + 1) if self._snapshot is not None else 1,
+            created_at=time.time(),
+            signature=signature if signature is not None else csv_signature(self.csv_dir),
+            parts=dict(parts),
+        )
+        self._snapshot = snap  # reference assignment: atomic for readers
+        if self.on_swap is not None:
+            try:
+                self.on_swap(snap)
+            except Exception as e:
+                print("Data manager: on_swap failed:", e)
+        return snap
+
+    # -------------------------
+    # Building
+    # -------------------------
+    def load(self):
+        """Build and publish a snapshot synchronously. Returns the snapshot (None if the build failed)."""
+        with self._build_lock:
+            signature = csv_signature(self.csv_dir)
+            old = self._snapshot
+            started = time.perf_counter()
+            parts = {}
+            try:
+                for name, build in self.builders.items():
+                    parts[name] = build(self.project_root)
+                if old is not None and self.warm is not None:
+                    try:
+                        self.warm(parts, old.parts)
+                    except Exception as e:
+                        print("Data manager: warm-up failed:", e)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print("Data manager: snapshot build failed, keeping the current data:", e)
+                return None
+            self.last_build_seconds = round(time.perf_counter() - started, 3)
+            snap = self.publish(parts, signature)
+            if old is not None:
+                self.reloads += 1
+                print(f"Data manager: swapped in snapshot v{snap.version} ({self.last_build_seconds} s build)")
+            return snap
+
+    def _watch(self):
+        pending = None
+        while not self._stop.wait(self.poll_interval):
+            try:
+                signature = csv_signature(self.csv_dir)
+                current = self._snapshot.signature if self._snapshot is not None else None
+                if signature == current:
+                    pending = None
+                elif signature != pending:
+                    pending = signature  # changed: wait one more interval so half-written files settle
+                else:
+                    pending = None
+                    self.load()
+            except Exception as e:
+                print("Data manager: watcher error:", e)
+
+    def start(self):
+        """Start the csv/ watcher thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='data-manager-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            'version': snap.version if snap else None,
+            'created_at': snap.created_at if snap else None,
+            'files': len(snap.signature) if snap else 0,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_build_seconds': self.last_build_seconds,
+            'watching': bool(self._thread and self._thread.is_alive()),
+            'poll_interval': self.poll_interval,
+        }
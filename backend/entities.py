@@ -0,0 +1,323 @@
+# backend/entities.py
+"""
+Institute entity resolution: one integer institute_id per institute, shared by every join.
+
+The CSVs spell institute names differently ("Goverment" / "Govt." / "Government", "Engg." /
+"Engineering", with or without a ", District" suffix). compile_entities() reads the name
+column of every source in a fixed order (rank_<year>.csv oldest first, then college.csv,
+placement.csv, reviews.csv) and assigns ids:
+ - names are normalized to tokens: lowercase, punctuation dropped, '&' / 'of' / 'the' ... dropped,
+   common abbreviations and misspellings mapped (SYNONYMS)
+ - same normalized key -> same id
+ - otherwise, when one of the two spellings has no location suffix (text after the first comma),
+   the institute whose name matches the other without its suffix, if exactly one does
+ - otherwise difflib fuzzy matching (ratio >= FUZZY_CUTOFF, clear of the runner-up by
+   FUZZY_MARGIN) among known names with the same number tokens and the same first token
+ - otherwise a new id
+Two different names inside one source file are never merged automatically (a file lists each
+institute once); csv/institute_aliases.csv (columns: alias, institute) overrides any decision by
+resolving `alias` exactly like `institute`.
+
+The result is cached in results/snapshot/entities.json, keyed by the SHA256 of the sources and the
+override file. Every non-exact decision is listed there under "matches" for review; print them with:
+    python backend/entities.py [project_root]
+
+Pure Python (csv, difflib), so explore.py keeps working without pandas.
+"""
+import os
+import re
+import sys
+import csv
+import json
+import difflib
+import hashlib
+import threading
+
+ENTITIES_FORMAT = 1
+ENTITIES_FILENAME = 'entities.json'
+ALIASES_FILENAME = 'institute_aliases.csv'
+UNKNOWN_ID = -1
+
+FUZZY_CUTOFF = 0.9
+FUZZY_MARGIN = 0.03
+
+NAME_COLUMNS = ['Institute', 'College', 'institute_name', 'college_name', 'Name', 'name']
+STOPWORDS = {'of', 'and', 'the', 'at', 'for', 'in'}
+SYNONYMS = {
+    'govt': 'government', 'goverment': 'government', 'govenment': 'government', 'gov': 'government',
+    'engg': 'engineering', 'engineeing': 'engineering', 'engneering': 'engineering',
+    'collge': 'college', 'colege': 'college',
+    'univ': 'university', 'universty': 'university',
+    'inst': 'institute', 'institue': 'institute',
+    'mgmt': 'management', 'mngt': 'management',
+    'technlogy': 'technology', 'tech': 'technology',
+}
+
+_lock = threading.Lock()
+_memo = {}  # project root -> (fingerprint, EntityResolver)
+
+
+# -------------------------
+# Normalization
+# -------------------------
+def _tokens(text):
+    words = re.sub(r'[^0-9a-z]+', ' ', str(text).lower()).split()
+    return [SYNONYMS.get(w, w) for w in words if w not in STOPWORDS]
+
+
+def normalize_name(name):
+    """Normalized key of an institute name ('' for blank / NaN-like values)."""
+    if name is None:
+        return ''
+    text = str(name).strip()
+    if text.lower() in ('', 'nan', 'none'):
+        return ''
+    return ' '.join(_tokens(text))
+
+
+def core_key(name):
+    """Normalized key of the part before the first comma (the name without its location suffix)."""
+    if name is None:
+        return ''
+    return ' '.join(_tokens(str(name).split(',')[0]))
+
+
+def _digits(key):
+    return tuple(t for t in key.split() if t.isdigit())
+
+
+# -------------------------
+# Resolver
+# -------------------------
+class EntityResolver:
+    """
+    - names[id]: display name (first spelling seen)
+    - keys: normalized key -> id; cores: normalized key -> its core_key (from the original spelling)
+    - resolve(name) / ids(values): id lookups for request-time and load-time joins (UNKNOWN_ID when unmatched)
+    """
+
+    def __init__(self, names=None, keys=None, aliases=None, cores=None):
+        self.names = list(names or [])
+        self.keys = {}
+        self.cores = {}
+        self.aliases = dict(aliases or {})  # alias key -> target key
+        self.matches = []
+        self._cores = {}  # core -> ids
+        self._blocks = {}  # (first token, number tokens) -> keys, the fuzzy-match candidates
+        self._cache = {}
+        self._sources = 0
+        cores = cores or {}
+        for key, iid in (keys or {}).items():
+            self._index(key, iid, cores.get(key, key))
+
+    def _index(self, key, iid, core):
+        self.keys[key] = iid
+        self.cores[key] = core
+        self._cores.setdefault(core, set()).add(iid)
+        tokens = key.split()
+        if tokens:
+            self._blocks.setdefault((tokens[0], _digits(key)), []).append(key)
+
+    def _match(self, key, name, exclude=()):
+        """(id, method, score) for a key not known exactly; (None, ...) when nothing matches safely."""
+        # with / without a location suffix: "X, District" <-> "X", when exactly one institute fits
+        core = core_key(name)
+        ids = set()
+        if core and core != key and core in self.keys:
+            ids.add(self.keys[core])
+        if core == key:
+            ids |= self._cores.get(core, set())
+        if len(ids) == 1 and not ids & set(exclude):
+            return next(iter(ids)), 'core', 1.0
+        tokens = key.split()
+        if not tokens:
+            return None, None, 0.0
+        candidates = [k for k in self._blocks.get((tokens[0], _digits(key)), []) if self.keys[k] not in exclude]
+        best = difflib.get_close_matches(key, candidates, n=2, cutoff=FUZZY_CUTOFF - FUZZY_MARGIN)
+        if not best:
+            return None, None, 0.0
+        score = difflib.SequenceMatcher(None, key, best[0]).ratio()
+        runner_up = difflib.SequenceMatcher(None, key, best[1]).ratio() if len(best) > 1 else 0.0
+        if score >= FUZZY_CUTOFF and score - runner_up >= FUZZY_MARGIN:
+            return self.keys[best[0]], 'fuzzy', round(score, 4)
+        return None, None, 0.0
+
+    def add_source(self, source, names):
+        """Resolve every distinct name of one source file, creating ids for new institutes."""
+        claimed = {}  # id -> key that claimed it inside this source
+        for name in names:
+            key = normalize_name(name)
+            if not key:
+                continue
+            key = self.aliases.get(key, key)
+            if key in self.keys:
+                iid = self.keys[key]
+                claimed.setdefault(iid, key)
+                continue
+            exclude = {iid for iid, k in claimed.items() if k != key}
+            iid, method, score = self._match(key, name, exclude)
+            if iid is None:
+                iid, method, score = len(self.names), 'new', 1.0
+                self.names.append(str(name).strip())
+            if method != 'new' or self._sources:
+                # listed for review: every non-exact match, and new institutes found after the first source
+                self.matches.append({'source': source, 'name': str(name).strip(), 'institute_id': iid,
+                                     'institute': self.names[iid], 'method': method, 'score': score})
+            self._index(key, iid, core_key(name))
+            claimed.setdefault(iid, key)
+        self._sources += 1
+
+    def resolve(self, name):
+        """institute_id of a name (exact key, alias, core or fuzzy match); UNKNOWN_ID when unmatched."""
+        hit = self._cache.get(name)
+        if hit is not None:
+            return hit
+        key = normalize_name(name)
+        key = self.aliases.get(key, key)
+        iid = self.keys.get(key)
+        if iid is None:
+            iid = self._match(key, name)[0] if key else None
+        iid = UNKNOWN_ID if iid is None else iid
+        with _lock:
+            if len(self._cache) < 100000:
+                self._cache[name] = iid
+        return iid
+
+    def ids(self, values):
+        """institute_id for every value of an iterable (each distinct value resolved once)."""
+        lookup = {}
+        out = []
+        for v in values:
+            iid = lookup.get(v)
+            if iid is None:
+                iid = lookup[v] = self.resolve(v)
+            out.append(iid)
+        return out
+
+    def name(self, iid):
+        return self.names[iid] if 0 <= iid < len(self.names) else ''
+
+    def __len__(self):
+        return len(self.names)
+
+
+# -------------------------
+# Compile / load
+# -------------------------
+def _read_names(path):
+    """Institute names of one CSV, in file order (first matching column of NAME_COLUMNS)."""
+    names = []
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            column = next((c for c in NAME_COLUMNS if c in (reader.fieldnames or [])), None)
+            if column is None:
+                return names
+            seen = set()
+            for row in reader:
+                value = row.get(column)
+                if value and value not in seen:
+                    seen.add(value)
+                    names.append(value)
+    except Exception as e:
+        print(f"Entities: could not read names from {path}: {e}")
+    return names
+
+
+def source_files(project_root):
+    """Name sources in resolution order: rank files oldest first, then college, placement, reviews."""
+    csv_dir = os.path.join(project_root, 'csv')
+    files = sorted(f for f in os.listdir(csv_dir) if f.startswith('rank_') and f.endswith('.csv')) if os.path.isdir(csv_dir) else []
+    files += ['college.csv', 'placement.csv', 'reviews.csv']
+    return [os.path.join(csv_dir, f) for f in files if os.path.exists(os.path.join(csv_dir, f))]
+
+
+def read_aliases(project_root):
+    """alias key -> institute key from csv/institute_aliases.csv (columns: alias, institute)."""
+    path = os.path.join(project_root, 'csv', ALIASES_FILENAME)
+    aliases = {}
+    if not os.path.exists(path):
+        return aliases
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            alias, target = normalize_name(row.get('alias')), normalize_name(row.get('institute'))
+            if alias and target and alias != target:
+                aliases[alias] = target
+    return aliases
+
+
+def _fingerprint(paths):
+    h = hashlib.sha256(f"entities-v{ENTITIES_FORMAT}".encode('utf-8'))
+    for path in paths:
+        h.update(os.path.basename(path).encode('utf-8'))
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+    return h.hexdigest()
+
+
+def _entities_path(project_root):
+    return os.path.join(project_root, 'results', 'snapshot', ENTITIES_FILENAME)
+
+
+def compile_entities(project_root='.'):
+    """Resolve all sources and write results/snapshot/entities.json. Returns the EntityResolver."""
+    project_root = os.path.abspath(project_root)
+    sources = source_files(project_root)
+    fingerprint = _fingerprint(sources + [os.path.join(project_root, 'csv', ALIASES_FILENAME)])
+    resolver = EntityResolver(aliases=read_aliases(project_root))
+    for path in sources:
+        resolver.add_source(os.path.basename(path), _read_names(path))
+    out = {
+        'format': ENTITIES_FORMAT,
+        'fingerprint': fingerprint,
+        'institutes': resolver.names,
+        'keys': resolver.keys,
+        'cores': resolver.cores,
+        'aliases': resolver.aliases,
+        'matches': resolver.matches,
+    }
+    path = _entities_path(project_root)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + f".tmp{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(out, f, indent=1)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print("Entities: could not save", path, ":", e)
+    with _lock:
+        _memo[project_root] = (fingerprint, resolver)
+    return resolver
+
+
+def load_entities(project_root='.'):
+    """EntityResolver for project_root: memoized, else from entities.json when the sources are unchanged, else compiled."""
+    project_root = os.path.abspath(project_root)
+    fingerprint = _fingerprint(source_files(project_root) + [os.path.join(project_root, 'csv', ALIASES_FILENAME)])
+    with _lock:
+        hit = _memo.get(project_root)
+    if hit is not None and hit[0] == fingerprint:
+        return hit[1]
+    try:
+        with open(_entities_path(project_root), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') == ENTITIES_FORMAT and data.get('fingerprint') == fingerprint:
+            resolver = EntityResolver(data['institutes'], data['keys'], data.get('aliases'), data.get('cores'))
+            resolver.matches = data.get('matches', [])
+            with _lock:
+                _memo[project_root] = (fingerprint, resolver)
+            return resolver
+    except Exception:
+        pass
+    return compile_entities(project_root)
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    resolver = compile_entities(root)
+    print(f"{len(resolver)} institutes, {len(resolver.keys)} spellings, {len(resolver.matches)} entries to review (non-exact matches and new institutes after the first source)")
+    for m in resolver.matches:
+        print(f"  [{m['method']} {m['score']}] {m['source']}: {m['name']!r} -> {m['institute']!r} (id {m['institute_id']})")
+    print(f"Override a match with a row in csv/{ALIASES_FILENAME}: alias,institute")
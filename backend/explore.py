@@ -7,6 +7,8 @@ Explore endpoints for the frontend. Reads CSV files from project-root/csv and ex
  - /explore/api/placement?name=...     -> aggregated placement stats for institute
 This module will try to auto-register routes if an `app` Flask instance is available
 in `sys.modules['app']`. Otherwise use register_explore(app) to register manually.
+The maps are keyed by institute_id (entities.py), so ?name= accepts any spelling the resolver
+knows ("Govt." / "Government", with or without the district suffix).
 """
 import os
 import sys
@@ -19,6 +21,18 @@ try:
     import pandas as pd
 except Exception:
     pd = None
+try:
+    from snapshot import load_table  # binary snapshots of the CSVs (needs pandas/numpy)
+except Exception:
+    load_table = None
+try:
+    from entities import load_entities, UNKNOWN_ID  # institute ids shared with the recommender
+except Exception:
+    load_entities, UNKNOWN_ID = None, -1
+try:
+    from images import picture_url  # base64 pictures -> /images/<sha> URLs
+except Exception:
+    picture_url = lambda value: value
 
 CSV_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'csv')
 # expected files
@@ -32,7 +46,8 @@ def _safe_read_csv(path):
         return []
     if pd is not None:
         try:
-            df = pd.read_csv(path, dtype=str).fillna('')
+            df = load_table(path) if load_table is not None else pd.read_csv(path, dtype=str)
+            df = df.fillna('')
             return df.to_dict(orient='records')
         except Exception:
             pass
@@ -75,48 +90,93 @@ def _parse_latlon(val):
             pass
     return None, None
 
-# Load CSVs in memory for quick responses (reloaded on import)
-_COLLEGES = _safe_read_csv(COLLEGE_CSV)
-_REVIEWS = _safe_read_csv(REVIEWS_CSV)
-_PLACEMENTS = _safe_read_csv(PLACEMENT_CSV)
-
 # Create mapping by institute name (case-insensitive key)
 def _key(name):
     return (name or '').strip().lower()
 
-COLLEGE_MAP = {}
-for r in _COLLEGES:
-    name = r.get('Institute') or r.get('College') or r.get('institute_name') or r.get('Name') or r.get('institute_name')
-    if not name:
-        continue
-    keyn = _key(name)
-    COLLEGE_MAP[keyn] = r
-
-# REVIEWS: build two structures:
-#  - REVIEWS_BY: list of simplified review entries for display
-#  - REVIEWS_RAW_BY: raw rows for aggregating numeric score columns
-REVIEWS_BY = defaultdict(list)
-REVIEWS_RAW_BY = defaultdict(list)
-for r in _REVIEWS:
-    # try multiple possible columns for institute name
-    name = r.get('Institute') or r.get('College') or r.get('institute_name') or r.get('name') or r.get('college_name')
-    if not name:
-        continue
-    k = _key(name)
-    REVIEWS_RAW_BY[k].append(r)
-    REVIEWS_BY[k].append({
-        'source': r.get('source') or r.get('Source') or r.get('reviewed_by') or '',
-        'date': r.get('date') or r.get('Date') or '',
-        'rating': r.get('rating') or r.get('Rating') or '',
-        'review_text': r.get('review_text') or r.get('review') or r.get('text') or ''
-    })
-
-PLACEMENT_BY = defaultdict(list)
-for r in _PLACEMENTS:
-    name = r.get('Institute') or r.get('College') or r.get('institute_name') or r.get('name') or r.get('college_name')
-    if not name:
-        continue
-    PLACEMENT_BY[_key(name)].append(r)
+def _entity_key(resolver, name):
+    """Map key of an institute name: its institute_id, else (no resolver / unknown name) the case-insensitive name."""
+    if resolver is not None:
+        iid = resolver.resolve(name)
+        if iid != UNKNOWN_ID:
+            return iid
+    return _key(name)
+
+def _load_resolver(csv_dir):
+    if load_entities is None:
+        return None
+    try:
+        return load_entities(os.path.dirname(os.path.abspath(csv_dir)))
+    except Exception as e:
+        print("explore.py: entity resolution unavailable, matching names exactly:", e)
+        return None
+
+def build_explore_data(csv_dir=CSV_DIR):
+    """
+    Read college/reviews/placement CSVs from csv_dir and build the lookup maps used by the routes:
+      COLLEGES (rows), COLLEGE_MAP, REVIEWS_BY, REVIEWS_RAW_BY, PLACEMENT_BY (keyed by institute_id),
+      COLLEGE_KEYS ((lowercase name, key) per college, for "contains" lookups) and RESOLVER
+    Returns a new dict every call (the data manager swaps it in as a whole on reload).
+    """
+    resolver = _load_resolver(csv_dir)
+    colleges = _safe_read_csv(os.path.join(csv_dir, 'college.csv'))
+    reviews = _safe_read_csv(os.path.join(csv_dir, 'reviews.csv'))
+    placements = _safe_read_csv(os.path.join(csv_dir, 'placement.csv'))
+
+    college_map = {}
+    college_keys = []
+    for r in colleges:
+        name = r.get('Institute') or r.get('College') or r.get('institute_name') or r.get('Name') or r.get('institute_name')
+        if not name:
+            continue
+        keyn = _entity_key(resolver, name)
+        college_map[keyn] = r
+        college_keys.append((_key(name), keyn))
+
+    # REVIEWS: build two structures:
+    #  - REVIEWS_BY: list of simplified review entries for display
+    #  - REVIEWS_RAW_BY: raw rows for aggregating numeric score columns
+    reviews_by = defaultdict(list)
+    reviews_raw_by = defaultdict(list)
+    for r in reviews:
+        # try multiple possible columns for institute name
+        name = r.get('Institute') or r.get('College') or r.get('institute_name') or r.get('name') or r.get('college_name')
+        if not name:
+            continue
+        k = _entity_key(resolver, name)
+        reviews_raw_by[k].append(r)
+        reviews_by[k].append({
+            'source': r.get('source') or r.get('Source') or r.get('reviewed_by') or '',
+            'date': r.get('date') or r.get('Date') or '',
+            'rating': r.get('rating') or r.get('Rating') or '',
+            'review_text': r.get('review_text') or r.get('review') or r.get('text') or ''
+        })
+
+    placement_by = defaultdict(list)
+    for r in placements:
+        name = r.get('Institute') or r.get('College') or r.get('institute_name') or r.get('name') or r.get('college_name')
+        if not name:
+            continue
+        placement_by[_entity_key(resolver, name)].append(r)
+
+    return {
+        'COLLEGES': colleges,
+        'COLLEGE_MAP': college_map,
+        'REVIEWS_BY': reviews_by,
+        'REVIEWS_RAW_BY': reviews_raw_by,
+        'PLACEMENT_BY': placement_by,
+        'COLLEGE_KEYS': college_keys,
+        'RESOLVER': resolver,
+    }
+
+# Load CSVs in memory for quick responses (built on import, replaced by set_data() on hot reload).
+# Everything is read through _DATA so a reload can never leave a stale map behind.
+_DATA = build_explore_data(CSV_DIR)
+
+def set_data(data):
+    """Swap in maps from build_explore_data(); requests already running keep the dict they started with."""
+    global _DATA
+    _DATA = data
 
 # helper aggregator for placements
 def _aggregate_placement(rows):
@@ -231,7 +291,7 @@ def _extract_placement_lists(rows):
         'job_profiles': profs
     }
 
-# helper to aggregate review numeric scores from REVIEWS_RAW_BY
+# helper to aggregate review numeric scores from _DATA['REVIEWS_RAW_BY']
 def _aggregate_review_scores(raw_rows):
     """
     Look for these columns (case-insensitive variants):
@@ -292,8 +352,9 @@ def register_explore(app):
     @app.route('/explore/api/colleges')
     def _api_colleges():
         # return alphabetically sorted list of institute names
+        data = _DATA # one snapshot for the whole request
         names = []
-        for r in _COLLEGES:
+        for r in data['COLLEGES']:
             name = r.get('Institute') or r.get('College') or r.get('institute_name') or r.get('Name') or r.get('name')
             if name:
                 names.append(name.strip())
@@ -305,13 +366,14 @@ def register_explore(app):
         q = request.args.get('name', '').strip()
         if not q:
             return jsonify({'error': 'name required'}), 400
-        key = _key(q)
-        row = COLLEGE_MAP.get(key)
+        data = _DATA # one snapshot for the whole request
+        key = _entity_key(data['RESOLVER'], q)
+        row = data['COLLEGE_MAP'].get(key)
         if not row:
             # attempt fuzzy: match where name contains query
-            for k,v in COLLEGE_MAP.items():
-                if q.lower() in k:
-                    row = v
+            for namek, k in data['COLLEGE_KEYS']:
+                if q.lower() in namek:
+                    key, row = k, data['COLLEGE_MAP'][k]
                     break
         if not row:
             return jsonify({'error': 'institute not found'}), 404
@@ -322,8 +384,8 @@ def register_explore(app):
         inst['district'] = row.get('District') or row.get('district') or ''
         inst['website'] = row.get('Website') or row.get('website') or row.get('site') or ''
         # images
-        inst['logo_image'] = row.get('logo_image') or row.get('Logo') or row.get('Logo_URL') or row.get('logo_url') or ''
-        inst['picture'] = row.get('Picture') or row.get('picture') or row.get('image') or row.get('Photo') or ''
+        inst['logo_image'] = picture_url(row.get('logo_image') or row.get('Logo') or row.get('Logo_URL') or row.get('logo_url') or '')
+        inst['picture'] = picture_url(row.get('Picture') or row.get('picture') or row.get('image') or row.get('Photo') or '')
         # keep placeholder programs (we will override using placement.csv)
         inst['programs'] = []
         # scores from college.csv (legacy) preserved but we'll override from reviews aggregation
@@ -346,7 +408,7 @@ def register_explore(app):
         inst['longitude'] = lon
 
         # placement-derived aggregates (num programs, recruiters, job profiles, program names)
-        placement_rows = PLACEMENT_BY.get(key, [])
+        placement_rows = data['PLACEMENT_BY'].get(key, [])
         placement_info = _extract_placement_lists(placement_rows)
         inst['num_programs'] = placement_info['num_programs']
         inst['programs'] = placement_info['programs']
@@ -357,13 +419,13 @@ def register_explore(app):
         inst['placement_summary'] = _aggregate_placement(placement_rows)
 
         # aggregated review scores (from reviews.csv)
-        raw_rev_rows = REVIEWS_RAW_BY.get(key, [])
+        raw_rev_rows = data['REVIEWS_RAW_BY'].get(key, [])
         review_scores = _aggregate_review_scores(raw_rev_rows)
         # attach these fields explicitly
         inst.update(review_scores)
 
         # also return a small convenience list for quick frontend display
-        inst['sample_review_count'] = len(REVIEWS_BY.get(key, []))
+        inst['sample_review_count'] = len(data['REVIEWS_BY'].get(key, []))
 
         return jsonify(inst)
 
@@ -373,8 +435,8 @@ def register_explore(app):
         q = request.args.get('name', '').strip()
         if not q:
             return jsonify({'reviews': []})
-        key = _key(q)
-        rows = REVIEWS_BY.get(key, [])
+        data = _DATA
+        rows = data['REVIEWS_BY'].get(_entity_key(data['RESOLVER'], q), [])
         return jsonify({'reviews': rows})
 
     @app.route('/explore/api/placement')
@@ -383,8 +445,8 @@ def register_explore(app):
         q = request.args.get('name', '').strip()
         if not q:
             return jsonify({})
-        key = _key(q)
-        rows = PLACEMENT_BY.get(key, [])
+        data = _DATA
+        rows = data['PLACEMENT_BY'].get(_entity_key(data['RESOLVER'], q), [])
         agg = _aggregate_placement(rows)
         # also include recruiters and job profiles and program count + program names
         lists = _extract_placement_lists(rows)
@@ -407,4 +469,4 @@ except Exception:
     pass
 
 # export for explicit registration
-__all__ = ['register_explore']
+__all__ = ['register_explore', 'build_explore_data', 'set_data']
@@ -0,0 +1,121 @@
+# backend/filter_index.py
+"""
+Inverted index over dictionary-encoded columns.
+
+For every indexed column, each dictionary code maps to the sorted array of row ids
+(positions) that carry that code. The recommender's filter cascade then becomes a
+handful of sorted-array intersections whose cost follows the number of matching rows,
+not the size of the table.
+"""
+import re
+import numpy as np
+
+_EMPTY = np.array([], dtype=np.int64)
+
+
+def intersect_rows(a, b):
+    """Intersect two sorted, unique row-id arrays. None stands for "all rows"."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.size == 0 or b.size == 0:
+        return _EMPTY
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+class InvertedIndex:
+    """
+    Postings lists for a set of integer-coded columns.
+
+    - columns: dict column -> 1-D array of non-negative integer codes (all the same length)
+    - postings[col][code] is a sorted int64 array of row ids; codes that never occur map to an empty array
+    """
+
+    def __init__(self, columns):
+        self.n_rows = 0
+        self.postings = {}
+        for col, codes in columns.items():
+            codes = np.asarray(codes, dtype=np.int64)
+            self.n_rows = len(codes)
+            valid = np.flatnonzero(codes >= 0)  # -1 (missing) never matches a filter
+            if valid.size == 0:
+                self.postings[col] = []
+                continue
+            # stable sort keeps row ids ascending inside each code
+            order = valid[np.argsort(codes[valid], kind='stable')]
+            counts = np.bincount(codes[valid])
+            self.postings[col] = np.split(order, np.cumsum(counts)[:-1])
+
+    def rows(self, col, codes):
+        """Sorted row ids whose `col` holds any of `codes` (a single int or an iterable of ints)."""
+        lists = self.postings.get(col, [])
+        if np.isscalar(codes):
+            codes = [codes]
+        parts = [lists[c] for c in codes if 0 <= c < len(lists) and lists[c].size]
+        if not parts:
+            return _EMPTY
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def count(self, col, code):
+        lists = self.postings.get(col, [])
+        return lists[code].size if 0 <= code < len(lists) else 0
+
+
+# characters that give a pattern regex meaning under Series.str.contains (regex=True by default)
+_REGEX_META = set('.^$*+?{}[]\\|()')
+
+
+class TrigramIndex:
+    """
+    Substring index over the distinct values of one dictionary-encoded column.
+
+    contains(query) returns the sorted codes of the values matching `query` with the
+    same semantics as pandas' Series.str.contains(query) (case-sensitive, regex=True):
+    - plain queries of 3+ characters intersect the trigram postings, then verify candidates
+    - shorter queries scan the (small) dictionary
+    - queries containing regex metacharacters are evaluated with re.search over the dictionary;
+      an invalid pattern is matched as a literal substring instead of raising
+    Results are memoized, so repeated queries cost one dict lookup.
+    """
+
+    MAX_MEMO = 4096
+
+    def __init__(self, values):
+        self.values = [str(v) for v in values]
+        self._grams = {}
+        for code, value in enumerate(self.values):
+            for i in range(len(value) - 2):
+                self._grams.setdefault(value[i:i + 3], set()).add(code)
+        self._memo = {}
+
+    def contains(self, query):
+        hit = self._memo.get(query)
+        if hit is not None:
+            return hit
+        result = np.array(sorted(self._search(query)), dtype=np.int64)
+        if len(self._memo) >= self.MAX_MEMO:
+            self._memo.clear()
+        self._memo[query] = result
+        return result
+
+    def _search(self, query):
+        if any(ch in _REGEX_META for ch in query):
+            try:
+                pattern = re.compile(query)
+            except re.error:
+                return [c for c, v in enumerate(self.values) if query in v]
+            return [c for c, v in enumerate(self.values) if pattern.search(v)]
+        if len(query) < 3:
+            return [c for c, v in enumerate(self.values) if query in v]
+        candidates = None
+        for i in range(len(query) - 2):
+            codes = self._grams.get(query[i:i + 3])
+            if not codes:
+                return []
+            candidates = set(codes) if candidates is None else candidates & codes
+            if not candidates:
+                return []
+        return [c for c in candidates if query in self.values[c]]
@@ -0,0 +1,142 @@
+# backend/forecast.py
+"""
+Closing-rank forecasting for every (Institute, Program, Stream, Quota, Category) group at once.
+
+Input is the long table of final-round closing ranks (one row per group and year).
+For each group, using only NumPy reductions (np.bincount over group ids, no Python loop):
+ - least-squares trend: closing_rank ~ intercept + slope * (year - base_year)
+ - volatility: residual standard deviation of that fit (ddof=2); for short histories,
+   the spread of the available ranks
+ - fallback: groups with fewer than MIN_TREND_YEARS years of data use the mean of their
+   two most recent closing ranks (the previous predictor) and a slope of 0
+
+ClosingRankForecast keeps the coefficients and a per-target-year table of forecasts,
+so lookups at request time are plain array reads. arrays()/use_arrays() let the caller
+swap them for read-only shared copies (memory-mapped, see shared_arrays.py).
+"""
+import numpy as np
+
+MIN_TREND_YEARS = 3
+METHOD_TREND = 'trend'
+METHOD_RECENT_MEAN = 'recent_mean'
+
+
+def _recent_mean(group_ids, years, ranks, n_groups):
+    """Mean of the two most recent closing ranks per group (NaN when a group has none)."""
+    order = np.lexsort((-years, group_ids))  # group asc, most recent year first
+    g = group_ids[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(g)) + 1]
+    position = np.arange(g.size) - np.repeat(starts, np.diff(np.r_[starts, g.size]))
+    recent = order[position < 2]
+    total = np.bincount(group_ids[recent], weights=ranks[recent], minlength=n_groups)
+    count = np.bincount(group_ids[recent], minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total / count
+
+
+def fit_trends(group_ids, years, ranks, n_groups, min_years=MIN_TREND_YEARS):
+    """
+    Vectorized per-group least squares.
+    - group_ids: int array in [0, n_groups); years, ranks: float arrays (rows with NaN rank are ignored)
+    Returns dict of per-group arrays: intercept, slope, volatility, n_years, method (bool: uses trend),
+    last_year, base_year (scalar).
+    """
+    group_ids = np.asarray(group_ids, dtype=np.int64)
+    years = np.asarray(years, dtype=float)
+    ranks = np.asarray(ranks, dtype=float)
+    valid = ~np.isnan(ranks) & ~np.isnan(years)
+    group_ids, years, ranks = group_ids[valid], years[valid], ranks[valid]
+
+    base_year = float(years.min()) if years.size else 0.0
+    x = years - base_year
+
+    def gsum(weights=None):
+        return np.bincount(group_ids, weights=weights, minlength=n_groups).astype(float)
+
+    n = gsum()
+    sx, sy = gsum(x), gsum(ranks)
+    sxx, sxy = gsum(x * x), gsum(x * ranks)
+    denom = n * sxx - sx * sx
+    use_trend = (n >= min_years) & (denom > 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(use_trend, (n * sxy - sx * sy) / np.where(denom > 0, denom, 1.0), 0.0)
+        intercept = np.where(use_trend, (sy - slope * sx) / np.where(n > 0, n, 1.0), np.nan)
+
+        # residual spread of the trend fit; plain spread of the ranks for short histories
+        fitted = intercept[group_ids] + slope[group_ids] * x
+        mean_y = sy / np.where(n > 0, n, 1.0)
+        resid = np.where(use_trend[group_ids], ranks - fitted, ranks - mean_y[group_ids])
+        dof = np.where(use_trend, n - 2, n - 1)
+        volatility = np.sqrt(gsum(resid * resid) / np.where(dof > 0, dof, np.nan))
+    volatility = np.where(n > 1, volatility, 0.0)
+    volatility = np.where(n > 0, volatility, np.nan)
+
+    last_year = np.full(n_groups, np.nan)
+    if group_ids.size:
+        np.fmax.at(last_year, group_ids, years)
+
+    recent = _recent_mean(group_ids, years, ranks, n_groups)
+    # fallback groups forecast a constant: the mean of their two most recent closing ranks
+    intercept = np.where(use_trend, intercept, recent)
+
+    return {
+        'intercept': intercept,
+        'slope': slope,
+        'volatility': volatility,
+        'n_years': n.astype(np.int64),
+        'uses_trend': use_trend,
+        'last_year': last_year,
+        'base_year': base_year,
+    }
+
+
+class ClosingRankForecast:
+    """
+    Forecast table built once per data load.
+    - forecast(year): per-group predicted closing ranks for that year (floored at 1; NaN without data)
+    - `table` is prefilled for the `horizon` years following the latest data year and never changes
+      afterwards (it is read by many threads, and the year comes from the request); other years are
+      computed from the stored coefficients on every call
+    """
+
+    def __init__(self, group_ids, years, ranks, n_groups, horizon=3, min_years=MIN_TREND_YEARS):
+        self.n_groups = int(n_groups)
+        self.coef = fit_trends(group_ids, years, ranks, self.n_groups, min_years)
+        known = self.coef['last_year'][~np.isnan(self.coef['last_year'])]
+        self.first_forecast_year = int(known.max()) + 1 if known.size else None
+        self.table = {}
+        if self.first_forecast_year is not None:
+            for year in range(self.first_forecast_year, self.first_forecast_year + horizon):
+                self.table[year] = self._compute(year)
+
+    def _compute(self, year):
+        c = self.coef
+        values = c['intercept'] + c['slope'] * (year - c['base_year'])
+        values = np.where(np.isnan(values), np.nan, np.maximum(values, 1.0))
+        values.setflags(write=False)
+        return values
+
+    def forecast(self, year):
+        year = int(year)
+        hit = self.table.get(year)
+        return hit if hit is not None else self._compute(year)
+
+    def arrays(self):
+        """Per-group coefficient arrays and the prefilled forecasts ('forecast_<year>'), by name."""
+        out = {name: values for name, values in self.coef.items() if name != 'base_year'}
+        out.update({f'forecast_{year}': values for year, values in self.table.items()})
+        return out
+
+    def use_arrays(self, arrays):
+        """Replace the arrays from arrays() with equal read-only copies (e.g. memory-mapped)."""
+        for name in list(self.coef):
+            if name in arrays:
+                self.coef[name] = arrays[name]
+        for year in list(self.table):
+            if f'forecast_{year}' in arrays:
+                self.table[year] = arrays[f'forecast_{year}']
+
+    def method(self):
+        """Per-group method label: 'trend' or 'recent_mean'."""
+        return np.where(self.coef['uses_trend'], METHOD_TREND, METHOD_RECENT_MEAN)
@@ -0,0 +1,141 @@
+# backend/images.py
+"""
+Content-addressed image service for the college pictures.
+
+college.csv embeds pictures as base64 data URIs ("data:image/jpeg;base64,...").
+Instead of shipping them inside every JSON payload:
+ - picture_url(value) decodes a data URI once, stores the bytes as
+   results/images/<sha256>.<ext> and returns "/images/<sha256>.<ext>"
+   (plain http(s) URLs and empty values are returned unchanged)
+ - GET /images/<name> serves the file with a strong ETag (the content hash) and
+   "Cache-Control: public, max-age=31536000, immutable"; If-None-Match gets a 304
+ - thumbnails (THUMB_WIDTHS) are generated next to the original on the first
+   /images/<name>?w=<width> request (needs Pillow), so loading the data only decodes and
+   hashes; a width without a thumbnail redirects to the original
+
+Use register_images(app) to add the route.
+"""
+import os
+import re
+import base64
+import hashlib
+import threading
+
+# optional dependency (thumbnails only)
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except Exception:
+    PIL_AVAILABLE = False
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES_DIR = os.path.join(BASE_DIR, 'results', 'images')
+URL_PREFIX = '/images/'
+THUMB_WIDTHS = (160, 480)
+MAX_AGE = 31536000  # one year; names are content hashes so they never change
+
+_DATA_URI = re.compile(r'^data:(image/[\w.+-]+);base64,(.*)$', re.S | re.I)
+_NAME = re.compile(r'^([0-9a-f]{64})\.(\w+)$')
+_EXTENSIONS = {'image/jpeg': 'jpg', 'image/jpg': 'jpg', 'image/png': 'png', 'image/gif': 'gif', 'image/webp': 'webp', 'image/svg+xml': 'svg'}
+
+_lock = threading.Lock()
+_url_by_value = {}  # data URI -> served URL (each picture is decoded once per process)
+
+
+def _thumb_name(digest, width):
+    return f"{digest}-w{int(width)}.jpg"
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _make_thumbnail(path, digest, width, images_dir):
+    """Write the thumbnail of one width (THUMB_WIDTHS) next to the original; True when it exists afterwards."""
+    thumb_path = os.path.join(images_dir, _thumb_name(digest, width))
+    if os.path.exists(thumb_path):
+        return True
+    if not PIL_AVAILABLE or width not in THUMB_WIDTHS:
+        return False
+    try:
+        with Image.open(path) as img:
+            img = img.convert('RGB')
+            # pictures narrower than the width are re-encoded at their own size
+            thumb_width = min(width, img.width)
+            thumb = img.resize((thumb_width, max(1, round(img.height * thumb_width / img.width))))
+            tmp_path = f"{thumb_path}.tmp{os.getpid()}-{threading.get_ident()}.jpg"
+            thumb.save(tmp_path, 'JPEG', quality=82)
+            os.replace(tmp_path, thumb_path)
+        return True
+    except Exception as e:
+        print("Images: thumbnail generation failed:", e)
+        return False
+
+
+def store_image(data, mime='image/jpeg', images_dir=None):
+    """Store raw image bytes under their SHA256; returns the file name (<sha>.<ext>)."""
+    images_dir = images_dir or IMAGES_DIR
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{digest}.{_EXTENSIONS.get(mime.lower(), 'img')}"
+    path = os.path.join(images_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(images_dir, exist_ok=True)
+        _write_atomic(path, data)
+    return name
+
+
+def picture_url(value, images_dir=None):
+    """
+    URL to use in JSON payloads for a picture value:
+    - base64 data URI -> /images/<sha>.<ext> (decoded and stored once)
+    - anything else (http(s) URL, relative path, '') -> unchanged
+    A data URI that fails to decode is returned unchanged.
+    """
+    if not isinstance(value, str) or not value.startswith('data:'):
+        return value
+    url = _url_by_value.get(value)
+    if url is not None:
+        return url
+    m = _DATA_URI.match(value.strip())
+    if not m:
+        return value
+    try:
+        data = base64.b64decode(re.sub(r'\s+', '', m.group(2)), validate=False)
+        url = URL_PREFIX + store_image(data, m.group(1), images_dir)
+    except Exception as e:
+        print("Images: could not store picture:", e)
+        return value
+    with _lock:
+        _url_by_value[value] = url
+    return url
+
+
+def register_images(app, images_dir=None):
+    from flask import request, send_from_directory, abort, redirect
+
+    images_dir = images_dir or IMAGES_DIR
+
+    @app.route(URL_PREFIX + '<name>')
+    def _serve_image(name):
+        m = _NAME.match(name)
+        if not m:
+            abort(404)
+        digest = m.group(1)
+        etag = digest
+        if not os.path.exists(os.path.join(images_dir, name)):
+            abort(404)
+        if 'w' in request.args:
+            width = request.args.get('w', type=int)
+            if not width or not _make_thumbnail(os.path.join(images_dir, name), digest, width, images_dir):
+                # never serve the original as immutable under a ?w= URL
+                return redirect(URL_PREFIX + name, code=302)
+            name = _thumb_name(digest, width)
+            etag = f"{digest}-w{width}"
+        response = send_from_directory(images_dir, name, conditional=True, etag=False, max_age=MAX_AGE)
+        response.set_etag(etag)  # strong ETag: the content hash
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response.make_conditional(request)
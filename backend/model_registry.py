@@ -0,0 +1,136 @@
+# backend/model_registry.py
+"""
+Admission model registry for the recommender.
+
+The decision-tree admission model used to be re-trained inside every
+/recommend_colleges call. This module keeps one trained "bundle" per data
+version instead:
+
+ - the bundle is trained once (at startup, or in a background thread)
+ - it is pickled to results/admission_model.pkl together with a fingerprint of the
+   CSV files it was trained on and MODEL_VERSION
+ - on the next startup the artifact is reused as long as the fingerprint still matches
+
+A bundle is a plain dict:
+    {
+      'fingerprint': str,
+      'chosen': 'heuristic' | 'decision_tree',
+      'model': fitted estimator or None,
+      'label_encoders': {feature: LabelEncoder or None},
+      'metrics': {'heuristic': {...}, 'decision_tree': {...}},
+    }
+"""
+import os
+import pickle
+import hashlib
+import threading
+
+# bump whenever the feature layout or training procedure changes so old artifacts are retrained
+MODEL_VERSION = 3
+
+MODEL_FILENAME = 'admission_model.pkl'  # stored under data_root_dir/results/
+
+
+def fingerprint_files(paths, extra=''):
+    """Return a SHA256 over the content of the given files (missing files are skipped) plus `extra`."""
+    h = hashlib.sha256()
+    h.update(str(extra).encode('utf-8'))
+    for path in sorted(paths):
+        if not os.path.exists(path):
+            continue
+        h.update(os.path.basename(path).encode('utf-8'))
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+        except Exception:
+            continue
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Holds the current admission-model bundle.
+
+    - train_fn: zero-argument callable returning a bundle dict (without 'fingerprint')
+    - fingerprint: data-version string; an artifact is only reused when it matches
+    - artifact_path: where the pickled bundle lives (None disables persistence)
+    """
+
+    def __init__(self, train_fn, fingerprint, artifact_path=None):
+        self._train_fn = train_fn
+        self.fingerprint = fingerprint
+        self.artifact_path = artifact_path
+        self._bundle = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # -------------------------
+    # Persistence helpers
+    # -------------------------
+    def _load_artifact(self):
+        if not self.artifact_path or not os.path.exists(self.artifact_path):
+            return None
+        try:
+            with open(self.artifact_path, 'rb') as f:
+                bundle = pickle.load(f)
+        except Exception as e:
+            print("Model registry: failed to load artifact:", e)
+            return None
+        if not isinstance(bundle, dict) or bundle.get('fingerprint') != self.fingerprint:
+            return None
+        return bundle
+
+    def _save_artifact(self, bundle):
+        if not self.artifact_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.artifact_path), exist_ok=True)
+            tmp_path = self.artifact_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(bundle, f)
+            os.replace(tmp_path, self.artifact_path)  # atomic, so readers never see a half-written file
+        except Exception as e:
+            print("Model registry: failed to save artifact:", e)
+
+    # -------------------------
+    # Training
+    # -------------------------
+    def _train_and_store(self):
+        with self._lock:
+            if self._bundle is not None:
+                return self._bundle
+            bundle = self._load_artifact()
+            if bundle is not None:
+                print("Model registry: loaded admission model from", self.artifact_path)
+            else:
+                bundle = dict(self._train_fn() or {})
+                bundle['fingerprint'] = self.fingerprint
+                self._save_artifact(bundle)
+            self._bundle = bundle
+            return bundle
+
+    def ensure(self, background=False):
+        """
+        Make a bundle available. Loads the persisted artifact when its fingerprint matches,
+        otherwise trains. With background=True training happens on a daemon thread and
+        get() returns None until it finishes (callers fall back to the heuristic).
+        """
+        if self._bundle is not None:
+            return self._bundle
+        if not background:
+            return self._train_and_store()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._train_and_store, name='admission-model-trainer', daemon=True)
+            self._thread.start()
+        return None
+
+    def get(self):
+        """Return the current bundle, or None while it is still being trained."""
+        return self._bundle
+
+    def wait(self, timeout=None):
+        """Block until background training finishes (mainly for scripts)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self._bundle
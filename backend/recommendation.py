@@ -2,8 +2,20 @@
 import pandas as pd
 import numpy as np
 import os
-import itertools
-from collections import Counter, defaultdict
+import base64
+import warnings
+import secrets
+
+from model_registry import ModelRegistry, fingerprint_files, MODEL_VERSION, MODEL_FILENAME
+from filter_index import InvertedIndex, TrigramIndex, intersect_rows
+from association_rules import CompiledRules, RULE_ATTRIBUTES, generate_rules
+from result_cache import LRUCache
+from snapshot import load_table
+from images import picture_url
+from forecast import ClosingRankForecast
+from timing import StageTimings
+from shared_arrays import share_arrays, content_key
+from entities import load_entities, EntityResolver, ALIASES_FILENAME, UNKNOWN_ID
 
 # New imports for ML evaluation/training
 try:
@@ -29,13 +41,36 @@ class CollegeRecommender:
     """
 
     RULES_FILENAME = 'associates_rules.csv'  # stored under data_root_dir/csv/
+    DATA_FILES = [
+        'college.csv', 'rank_2021.csv', 'rank_2022.csv', 'rank_2023.csv',
+        'rank_2024.csv', 'rank_2025.csv', 'placement.csv', 'reviews.csv'
+    ]
 
-    def __init__(self, data_root_dir="."):
+    def __init__(self, data_root_dir=".", train_in_background=False, cache_size=256, cache_ttl=600, cursor_ttl=300,
+                 years=None, train_model=True, timings_enabled=None):
+        """
+        - years: only load rank_<year>.csv for these years (None = all); used by backtest.py to train on the past only
+        - train_model: False skips the admission model (heuristic ordering), e.g. for backtests
+        - timings_enabled: aggregate per-stage recommend() histograms (default: env RECOMMENDER_TIMINGS=1)
+        """
         self.data_root_dir = os.path.abspath(data_root_dir)
+        self.years = sorted(int(y) for y in years) if years is not None else None
         self.dataframes = {}
+        # candidate pools keyed by normalized filters; stamped with data_version so new data invalidates them
+        self.pool_cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+        # ranked candidate lists behind pagination cursors (short-lived)
+        self.cursor_cache = LRUCache(maxsize=cache_size, ttl=cursor_ttl)
+        # per-stage timings of recommend(); a no-op unless enabled or collected for one request (timing.collect)
+        if timings_enabled is None:
+            timings_enabled = os.environ.get('RECOMMENDER_TIMINGS', '') not in ('', '0', 'false')
+        self.timings = StageTimings(enabled=timings_enabled)
         self._load_all_data()
+        self._load_entities()
         self._prepare_master_rank_df()
+        self._prepare_prediction_table()
+        self._prepare_round_index()
         self._prepare_quality_data()
+        self._prepare_enrichment_table()
 
         # ensure rules exist (generate if not)
         try:
@@ -43,6 +78,23 @@ class CollegeRecommender:
         except Exception as e:
             print("Warning: association rules generation failed:", e)
 
+        # admission model: trained once per data version, never on the request path
+        version_tag = f"model-v{MODEL_VERSION}" + (f"-years{self.years}" if self.years is not None else '')
+        self.data_version = fingerprint_files([self._get_file_path(f) for f in self.DATA_FILES + [ALIASES_FILENAME]], extra=version_tag)
+        self.model_registry = None
+        if train_model:
+            self.model_registry = ModelRegistry(
+                train_fn=self._evaluate_and_train_ml,
+                fingerprint=self.data_version,
+                artifact_path=os.path.join(self.data_root_dir, 'results', MODEL_FILENAME)
+            )
+            try:
+                self.model_registry.ensure(background=train_in_background)
+            except Exception as e:
+                print("Warning: admission model training failed:", e)
+
+        self._share_prediction_arrays()
+
         if getattr(self, 'merged_df', pd.DataFrame()).empty:
             print("⚠️ WARNING: Master rank data is empty. Recommendations will fail.")
 
@@ -53,21 +105,45 @@ class CollegeRecommender:
         return os.path.join(self.data_root_dir, 'csv', file_name)
 
     def _load_all_data(self):
-        file_names = [
-            'college.csv', 'rank_2021.csv', 'rank_2022.csv', 'rank_2023.csv',
-            'rank_2024.csv', 'rank_2025.csv', 'placement.csv', 'reviews.csv'
-        ]
-        for file_name in file_names:
+        for file_name in self.DATA_FILES:
             try:
                 df_name = file_name.replace('.csv', '')
                 file_path = self._get_file_path(file_name)
-                self.dataframes[df_name] = pd.read_csv(file_path, dtype='object')
+                self.dataframes[df_name] = load_table(file_path)  # binary snapshot when fresh, else the CSV
             except FileNotFoundError:
                 print(f"Warning: File {file_name} not found and skipped.")
                 continue
             except Exception as e:
                 print(f"Error loading {file_name}: {e}")
 
+    def _load_entities(self):
+        """
+        Institute ids shared by every join (entities.py: compiled once per data version into
+        results/snapshot/entities.json). If that fails, ids are resolved from the loaded tables only.
+        """
+        try:
+            self.entities = load_entities(self.data_root_dir)
+        except Exception as e:
+            print("Warning: entity resolution failed, resolving institutes from the loaded tables:", e)
+            self.entities = EntityResolver()
+            for df_name, df in self.dataframes.items():
+                column = 'Institute' if 'Institute' in df.columns else 'college_name'
+                if column in df.columns:
+                    self.entities.add_source(df_name, df[column].dropna().unique())
+
+    def _institute_ids(self, values):
+        """institute_id of every institute name in values (each distinct name resolved once); UNKNOWN_ID for blanks."""
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        ids = np.append(np.asarray(self.entities.ids(uniques), dtype=np.int64), UNKNOWN_ID)  # code -1 (missing) -> last slot
+        return ids[codes]
+
+    def _canonical_institutes(self, values):
+        """Cleaned institute names -> the (lowercased) canonical name of their institute_id; unmatched names are kept."""
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        names = [self.entities.name(iid).strip().lower() if iid != UNKNOWN_ID else name
+                 for iid, name in zip(self.entities.ids(uniques), uniques)]
+        return np.asarray(names + [''], dtype=object)[codes]
+
     # -------------------------
     # Rank / master data prep
     # -------------------------
@@ -77,11 +153,13 @@ class CollegeRecommender:
 
         for df_name, df in self.dataframes.items():
             if df_name.startswith('rank_20'):
-                df = df.copy()
                 try:
                     year = int(df_name.split('_')[1])
                 except Exception:
                     year = pd.NA
+                if self.years is not None and year not in self.years:
+                    continue
+                df = df.copy()
                 df['Year'] = year
 
                 if 'Seat Type' not in df.columns:
@@ -112,30 +190,277 @@ class CollegeRecommender:
                     master_df[col] = master_df[col].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
                 else:
                     master_df[col] = ''
+            # one spelling per institute across years: the canonical name of its institute_id
+            master_df['Institute'] = self._canonical_institutes(master_df['Institute'])
         else:
             self.merged_df = pd.DataFrame(columns=REQUIRED_COLUMNS + ['District'])
             self.master_rank_df = pd.DataFrame()
+            self.text_dictionaries = {}
+            self._code_lookup = {}
+            self._substring_index = {}
+            self._institute_id_by_code = np.array([], dtype=np.int64)
             return
 
-        # Merge district info from college.csv if available
+        # Merge district info from college.csv if available (joined on institute_id, not on the spelling)
         if 'college' in self.dataframes:
             college_df_for_merge = self.dataframes['college'][['Institute', 'District']].copy()
-            college_df_for_merge['Institute'] = college_df_for_merge['Institute'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
+            college_df_for_merge['institute_id'] = self._institute_ids(college_df_for_merge['Institute'])
             college_df_for_merge['District'] = college_df_for_merge['District'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
-            self.merged_df = pd.merge(master_df, college_df_for_merge, on='Institute', how='left')
+            # UNKNOWN_ID is not one institute: unmatched rank rows fall back to the (cleaned) name
+            known_districts = college_df_for_merge[college_df_for_merge['institute_id'] != UNKNOWN_ID]
+            known_districts = known_districts[['institute_id', 'District']].drop_duplicates('institute_id')
+            college_names = college_df_for_merge['Institute'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
+            district_by_name = college_df_for_merge.assign(Institute=college_names).drop_duplicates('Institute').set_index('Institute')['District']
+            district_by_name = district_by_name[district_by_name.index != '']
+            master_ids = master_df.assign(institute_id=self._institute_ids(master_df['Institute']))
+            self.merged_df = pd.merge(master_ids, known_districts, on='institute_id', how='left')
+            unmatched = (self.merged_df['institute_id'] == UNKNOWN_ID).to_numpy()
+            self.merged_df.loc[unmatched, 'District'] = self.merged_df.loc[unmatched, 'Institute'].map(district_by_name)
+            self.merged_df = self.merged_df.drop(columns='institute_id')
             if 'District' in self.merged_df.columns:
                 self.merged_df['District'] = self.merged_df['District'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
         else:
-            self.merged_df = master_df
+            self.merged_df = master_df.copy()
             if 'District' not in self.merged_df.columns:
-                self.merged_df['District'] = pd.NA
+                self.merged_df['District'] = ''
 
         self.master_rank_df = master_df
 
+        # Text columns are normalized exactly once above; hold them dictionary-encoded from here on
+        self._encode_text_columns([self.master_rank_df, self.merged_df], self.TEXT_COLS)
+        self._encode_text_columns([self.merged_df], ['District'])
+        # Institute dictionary code -> institute_id (the integer key of the quality / enrichment joins)
+        self._institute_id_by_code = self._institute_ids(self.text_dictionaries['Institute'].categories)
+
     # -------------------------
-    # Quality (placement/review)
+    # Dictionary-encoded text columns
+    # -------------------------
+    TEXT_COLS = ['Institute', 'Program', 'Stream', 'Quota', 'Category', 'Seat Type']
+
+    def _encode_text_columns(self, frames, cols):
+        """
+        Convert already-cleaned text columns to categoricals that share one sorted dictionary per column
+        across all given frames, so filters compare small integer codes instead of strings.
+        - self.text_dictionaries[col]: the shared pd.CategoricalDtype
+        - self._code_lookup[col]: value -> integer code
+        - self._substring_index[col]: TrigramIndex over the dictionary values (lenient "contains" matching)
+        """
+        if not hasattr(self, 'text_dictionaries'):
+            self.text_dictionaries = {}
+            self._code_lookup = {}
+            self._substring_index = {}
+        for col in cols:
+            values = set()
+            for frame in frames:
+                values.update(frame[col].dropna().unique().tolist())
+            dtype = pd.CategoricalDtype(sorted(values))
+            for frame in frames:
+                frame[col] = frame[col].astype(dtype)
+            self.text_dictionaries[col] = dtype
+            self._code_lookup[col] = {v: i for i, v in enumerate(dtype.categories)}
+            self._substring_index[col] = TrigramIndex(dtype.categories)
+
+    def _contains_codes(self, col, value):
+        """Codes of the dictionary values of `col` that contain `value` (same semantics as Series.str.contains)."""
+        index = self._substring_index.get(col)
+        if index is None:
+            return np.array([], dtype=np.int64)
+        return index.contains(value)
+
+    def _decode_text_columns(self, df):
+        """Turn categorical columns of a (small) result frame back into plain strings."""
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object)
+        return df
+
     # -------------------------
+    # Precomputed prediction table
+    # -------------------------
+    GROUP_COLS = ['Institute', 'Program', 'Stream', 'Quota', 'Category']
+
+    def _prepare_prediction_table(self):
+        """
+        Build, once at load, the tables the per-request predictor used to recompute with a Python groupby loop:
+        - final_round_df: last counselling round per (Year, Institute, Program, Stream, Quota, Category)
+        - forecaster: per-group closing-rank forecasts (least-squares trend over the years, or mean of the
+            two most recent closing ranks for short histories; see forecast.py), looked up per target_year
+        - prediction_table: one row per (Institute, Program, Stream, Quota, Category) with
+            Predicted Closing Rank (forecast for the year after the latest data year), Forecast Volatility,
+            Forecast Method, Latest Closing Rank / Opening Rank / Seat Type (from the most recent year) and District
+        """
+        grouping_cols = self.GROUP_COLS
+        table_cols = grouping_cols + ['District', 'Seat Type', 'Opening Rank', 'Latest Closing Rank', 'Predicted Closing Rank',
+                                      'Forecast Volatility', 'Forecast Method']
+        df = getattr(self, 'merged_df', pd.DataFrame())
+        if df.empty:
+            self.final_round_df = pd.DataFrame(columns=['Year'] + grouping_cols + ['District', 'Seat Type', 'Opening Rank', 'Closing Rank'])
+            self.prediction_table = pd.DataFrame(columns=table_cols)
+            self._table_codes = {}
+            self.filter_index = InvertedIndex({})
+            self._final_round_offsets = np.zeros(1, dtype=np.int64)
+            self.forecaster = ClosingRankForecast([], [], [], 0)
+            return
+
+        # keep the last round of each year; stable sort so ties resolve deterministically
+        final_ranks = df.sort_values('Round', ascending=False, kind='mergesort').drop_duplicates(
+            subset=['Year'] + grouping_cols, keep='first'
+        )
+        # most recent year first inside each group
+        final_ranks = final_ranks.sort_values(grouping_cols + ['Year'], ascending=[True] * len(grouping_cols) + [False], kind='mergesort')
+        final_ranks = final_ranks.reset_index(drop=True)
+        self.final_round_df = final_ranks
+
+        grouped = final_ranks.groupby(grouping_cols, sort=False, observed=True)
+        latest = grouped.nth(0).set_index(grouping_cols)
+        # group_id is the row position in prediction_table (groups in order of appearance, like `latest`)
+        self.final_round_df['group_id'] = grouped.ngroup().to_numpy()
+
+        # forecasts for all groups at once
+        self.forecaster = ClosingRankForecast(
+            self.final_round_df['group_id'].to_numpy(),
+            pd.to_numeric(final_ranks['Year'], errors='coerce').to_numpy(dtype=float),
+            pd.to_numeric(final_ranks['Closing Rank'], errors='coerce').to_numpy(dtype=float),
+            len(latest)
+        )
+
+        table = pd.DataFrame({
+            'District': latest['District'],
+            'Seat Type': latest['Seat Type'],
+            'Opening Rank': latest['Opening Rank'],
+            'Latest Closing Rank': latest['Closing Rank'],
+        })
+        table['Predicted Closing Rank'] = self.forecaster.forecast(self.forecaster.first_forecast_year)
+        table['Forecast Volatility'] = self.forecaster.coef['volatility']
+        table['Forecast Method'] = self.forecaster.method()
+        self.prediction_table = table.reset_index()[table_cols]
+
+        # integer views used by the request-time filters
+        self._table_codes = {
+            col: self.prediction_table[col].cat.codes.to_numpy()
+            for col in ['Program', 'Stream', 'Quota', 'Category', 'District']
+        }
+        # value -> sorted group ids, so the filter cascade is a few sorted-array intersections
+        self.filter_index = InvertedIndex(self._table_codes)
+        # final_round_df is ordered by group, so each group's year rows are one contiguous slice
+        self._final_round_offsets = np.searchsorted(
+            self.final_round_df['group_id'].to_numpy(), np.arange(len(self.prediction_table) + 1)
+        )
+
+    def _group_ids_of(self, df):
+        """prediction_table row (group id) of every row of a frame with the GROUP_COLS categoricals; -1 when unknown."""
+        def group_keys(frame):
+            # mixed-radix integer over the dictionary codes (shared dictionaries, so keys compare across frames)
+            keys = np.zeros(len(frame), dtype=np.int64)
+            for col in self.GROUP_COLS:
+                keys = keys * (len(self.text_dictionaries[col].categories) + 1) + frame[col].cat.codes.to_numpy(dtype=np.int64) + 1
+            return keys
+        table_keys = group_keys(self.prediction_table)
+        order = np.argsort(table_keys, kind='stable')
+        keys = group_keys(df)
+        pos = np.minimum(np.searchsorted(table_keys[order], keys), max(len(order) - 1, 0))
+        found = table_keys[order][pos] == keys if len(order) else np.zeros(len(keys), dtype=bool)
+        return np.where(found, order[pos] if len(order) else -1, -1)
+
+    def _prepare_round_index(self):
+        """
+        Round-progression index, built once at load (final_round_df keeps only the last round):
+        - _round_years: data years (ascending); rounds are numbered 1.._round_count ('Round 2' -> 2)
+        - _round_opening / _round_closing: float32 [group, year, round - 1] with that round's Opening / Closing Rank
+          (first row per group, year and round, like final_round_df). A round without a row for the group carries
+          the previous round forward (no change); rounds before the group's first row stay NaN (not offered yet),
+          so [group, year, -1] is the final round of that year
+        - _round_ratio: float32 [group, round - 1], median over the years of closing(round) / closing(final round);
+          scales a final-round forecast to that round (NaN: never offered in that round)
+        A lookup is one index into these arrays (round_ranks()).
+        """
+        df = getattr(self, 'merged_df', pd.DataFrame())
+        n_groups = len(getattr(self, 'prediction_table', pd.DataFrame()))
+        self._round_years = np.array([], dtype=np.int64)
+        self._round_count = 0
+        self._round_opening = self._round_closing = np.zeros((n_groups, 0, 0), dtype=np.float32)
+        self._round_ratio = np.zeros((n_groups, 0), dtype=np.float32)
+        if df.empty or not n_groups:
+            return
+
+        rounds = pd.to_numeric(df['Round'].astype(str).str.extract(r'(\d+)', expand=False), errors='coerce').to_numpy(dtype=float)
+        years = pd.to_numeric(df['Year'], errors='coerce').to_numpy(dtype=float)
+        group_ids = self._group_ids_of(df)
+        rows = np.flatnonzero(~np.isnan(rounds) & ~np.isnan(years) & (rounds >= 1) & (group_ids >= 0))
+        if not rows.size:
+            return
+        self._round_years = np.unique(years[rows]).astype(np.int64)
+        self._round_count = int(rounds[rows].max())
+        shape = (n_groups, self._round_years.size, self._round_count)
+
+        # first row (file order) per (group, year, round)
+        flat = np.ravel_multi_index(
+            (group_ids[rows], np.searchsorted(self._round_years, years[rows]), rounds[rows].astype(np.int64) - 1), shape
+        )
+        flat, first = np.unique(flat, return_index=True)
+        rows = rows[first]
+        present = np.zeros(shape, dtype=bool)
+        present.reshape(-1)[flat] = True
+        opening = np.full(shape, np.nan, dtype=np.float32)
+        closing = np.full(shape, np.nan, dtype=np.float32)
+        opening.reshape(-1)[flat] = pd.to_numeric(df['Opening Rank'], errors='coerce').to_numpy(dtype=float)[rows]
+        closing.reshape(-1)[flat] = pd.to_numeric(df['Closing Rank'], errors='coerce').to_numpy(dtype=float)[rows]
+        for r in range(1, self._round_count):
+            carry = ~present[:, :, r] & present[:, :, r - 1]
+            opening[:, :, r][carry] = opening[:, :, r - 1][carry]
+            closing[:, :, r][carry] = closing[:, :, r - 1][carry]
+            present[:, :, r] |= carry
+
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN groups (never offered in a round)
+            ratio = np.nanmedian(closing / closing[:, :, -1:], axis=1)
+        self._round_opening, self._round_closing = opening, closing
+        self._round_ratio = ratio.astype(np.float32)
+
+    def get_counselling_rounds(self):
+        return list(range(1, self._round_count + 1))
+
+    def _normalize_round(self, counselling_round):
+        """None for the final round (None / '' / 'final'), else the round number (capped at the last round); ValueError when invalid."""
+        if counselling_round is None or str(counselling_round).strip().lower() in ('', 'final', 'last'):
+            return None
+        value = int(str(counselling_round).strip().lower().replace('round', '').strip())
+        if value < 1:
+            raise ValueError(counselling_round)
+        return min(value, self._round_count) if self._round_count else None
+
+    def round_ranks(self, group_ids, year, counselling_round):
+        """(Opening Rank, Closing Rank) arrays of the given groups in `year` as of `counselling_round` (NaN when unknown)."""
+        group_ids = np.asarray(group_ids, dtype=np.int64)
+        yi = np.searchsorted(self._round_years, int(year))
+        if not self._round_count or yi >= self._round_years.size or self._round_years[yi] != int(year):
+            nan = np.full(group_ids.size, np.nan)
+            return nan, nan.copy()
+        ri = min(max(int(counselling_round), 1), self._round_count) - 1
+        return (self._round_opening[group_ids, yi, ri].astype(float), self._round_closing[group_ids, yi, ri].astype(float))
+
+    def _share_prediction_arrays(self):
+        """
+        Swap the arrays read on every prediction (forecasts, coefficients, final-round offsets) for
+        memory-mapped copies under results/shared/, so worker processes share one physical copy.
+        Keyed by content: workers loading the same data map the same files. Keeps private arrays on failure.
+        """
+        if not getattr(self.forecaster, 'n_groups', 0):
+            return
+        arrays = self.forecaster.arrays()
+        arrays['final_round_offsets'] = self._final_round_offsets
+        arrays.update({'round_opening': self._round_opening, 'round_closing': self._round_closing, 'round_ratio': self._round_ratio})
+        try:
+            mapped = share_arrays('prediction', content_key(arrays), arrays, self.data_root_dir)
+        except Exception as e:
+            print("Warning: prediction arrays not shared:", e)
+            return
+        self.forecaster.use_arrays(mapped)
+        self._final_round_offsets = mapped['final_round_offsets']
+        self._round_opening, self._round_closing, self._round_ratio = mapped['round_opening'], mapped['round_closing'], mapped['round_ratio']
+
     def _prepare_quality_data(self):
+        # College, placement and review tables are keyed by institute_id (entities.py), whatever their spelling
         # College details
         self.full_college_df = self.dataframes.get('college', pd.DataFrame()).copy().rename(columns={'logo_image_url': 'logo_image'})
         if not self.full_college_df.empty:
@@ -143,9 +468,11 @@ class CollegeRecommender:
             for c in cols:
                 if c not in self.full_college_df.columns:
                     self.full_college_df[c] = ''
-            self.full_college_df = self.full_college_df.reindex(columns=cols)
-        if 'Institute' in self.full_college_df.columns:
-            self.full_college_df['Institute'] = self.full_college_df['Institute'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
+            self.full_college_df['institute_id'] = self._institute_ids(self.full_college_df['Institute'])
+            self.full_college_df = self.full_college_df.drop_duplicates('institute_id').reindex(columns=['institute_id'] + cols[1:])
+            # base64 pictures -> /images/<sha> URLs (decoded once), so results carry only a URL
+            for c in ['logo_image', 'Picture']:
+                self.full_college_df[c] = self.full_college_df[c].map(picture_url)
         if 'District' in self.full_college_df.columns:
             self.full_college_df['District'] = self.full_college_df['District'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
 
@@ -155,7 +482,7 @@ class CollegeRecommender:
         self.placement_max_ctc = pd.DataFrame()
         if not placement_df.empty:
             if 'Institute' in placement_df.columns:
-                placement_df['Institute'] = placement_df['Institute'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
+                placement_df['institute_id'] = self._institute_ids(placement_df['Institute'])
             if 'Program' in placement_df.columns:
                 placement_df['Program'] = placement_df['Program'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
             placement_df = placement_df.rename(columns={'top_recruiters': 'top recruiter', 'job_titles': 'job_title', 'inst_rank': 'institute_rank'})
@@ -165,7 +492,7 @@ class CollegeRecommender:
                     placement_df[col] = pd.to_numeric(placement_df[col], errors='coerce')
             if 'average_ctc' in placement_df.columns:
                 try:
-                    self.placement_max_ctc = placement_df.groupby(['Institute', 'Program'])['average_ctc'].max().reset_index().rename(columns={'average_ctc': 'Max Average CTC'})
+                    self.placement_max_ctc = placement_df.groupby(['institute_id', 'Program'])['average_ctc'].max().reset_index().rename(columns={'average_ctc': 'Max Average CTC'})
                 except Exception:
                     self.placement_max_ctc = pd.DataFrame()
             try:
@@ -176,7 +503,7 @@ class CollegeRecommender:
                 for col in ['top recruiter', 'job_title', 'institute_rank']:
                     if col in placement_df.columns:
                         agg_funcs[col] = 'first'
-                grp_cols = [c for c in ['Institute', 'Program'] if c in placement_df.columns]
+                grp_cols = [c for c in ['institute_id', 'Program'] if c in placement_df.columns]
                 if agg_funcs and grp_cols:
                     self.full_placement_df = placement_df.groupby(grp_cols).agg(agg_funcs).reset_index()
             except Exception:
@@ -189,26 +516,26 @@ class CollegeRecommender:
         if not reviews_df.empty:
             reviews_df = reviews_df.rename(columns={'college_name': 'Institute'})
             if 'Institute' in reviews_df.columns:
-                reviews_df['Institute'] = reviews_df['Institute'].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
+                reviews_df['institute_id'] = self._institute_ids(reviews_df['Institute'])
             review_cols = ['rating', 'sentiment_score', 'mess_score', 'professor_score', 'campus_score', 'placements_score', 'infrastructure_score', 'overall_aspect_score']
             for col in review_cols:
                 if col in reviews_df.columns:
                     reviews_df[col] = pd.to_numeric(reviews_df[col], errors='coerce')
             present_review_cols = [c for c in review_cols if c in reviews_df.columns]
             if present_review_cols:
-                self.full_reviews_df = reviews_df.groupby('Institute').agg({c: 'mean' for c in present_review_cols}).reset_index()
+                self.full_reviews_df = reviews_df.groupby('institute_id').agg({c: 'mean' for c in present_review_cols}).reset_index()
                 if 'placements_score' in self.full_reviews_df.columns:
                     self.full_reviews_df = self.full_reviews_df.rename(columns={'placements_score': 'placement_score'})
                 review_filter_cols = [c for c in ['mess_score', 'professor_score', 'campus_score', 'placements_score', 'infrastructure_score', 'overall_aspect_score'] if c in reviews_df.columns]
                 if review_filter_cols:
-                    tmp = reviews_df[['Institute'] + review_filter_cols].groupby('Institute')[review_filter_cols].mean().reset_index()
+                    tmp = reviews_df[['institute_id'] + review_filter_cols].groupby('institute_id')[review_filter_cols].mean().reset_index()
                     tmp = tmp.rename(columns={'placements_score': 'placements_score_filter', 'overall_aspect_score': 'overall_aspect_score_filter'})
                     self.reviews_avg_for_filter = tmp
 
         # Combine quality metrics
         try:
             if not self.placement_max_ctc.empty and not self.reviews_avg_for_filter.empty:
-                self.combined_quality_df = pd.merge(self.placement_max_ctc, self.reviews_avg_for_filter, on='Institute', how='left')
+                self.combined_quality_df = pd.merge(self.placement_max_ctc, self.reviews_avg_for_filter, on='institute_id', how='left')
             elif not self.placement_max_ctc.empty:
                 self.combined_quality_df = self.placement_max_ctc.copy()
             elif not self.reviews_avg_for_filter.empty:
@@ -218,6 +545,87 @@ class CollegeRecommender:
         except Exception:
             self.combined_quality_df = pd.DataFrame()
 
+    def _prepare_enrichment_table(self):
+        """
+        Denormalized candidate enrichment, built once at load so request-time enrichment is a take():
+        - one row per (Institute, Program) pair of prediction_table, keyed by the integer ids
+          institute_id * n_programs + program_id (institute_id from entities.py, program_id = the
+          Program categorical code; sorted in _enrich_keys)
+        - enrichment_df: college details, placement aggregates and review means (ENRICHMENT_COLUMNS),
+          numeric columns coerced and filled with 0, text columns filled with ''
+        - _enrich_quality: the min-CTC / placement-score filter metrics as float arrays
+          (Max Average CTC -> ctc, placements_score_filter, overall_aspect_score_filter -> overall)
+        - the last row holds the defaults, used for pairs without an entry
+        """
+        table = getattr(self, 'prediction_table', pd.DataFrame())
+        if table.empty:
+            self._enrich_categories = (pd.Index([]), pd.Index([]))
+            self._enrich_keys = np.array([], dtype=np.int64)
+            pairs = pd.DataFrame({'institute_id': pd.Series([], dtype=np.int64), 'Program': pd.Series([], dtype=object)})
+        else:
+            institutes, programs = table['Institute'].cat.categories, table['Program'].cat.categories
+            inst_ids = self._institute_id_by_code[table['Institute'].cat.codes.to_numpy(dtype=np.int64)]
+            keys = np.unique(inst_ids * len(programs) + table['Program'].cat.codes.to_numpy(dtype=np.int64))
+            keys = keys[keys >= 0]  # institutes without an id get the defaults row
+            self._enrich_categories = (institutes, programs)
+            self._enrich_keys = keys
+            pairs = pd.DataFrame({
+                'institute_id': keys // len(programs),
+                'Program': np.asarray(programs, dtype=object)[keys % len(programs)],
+            })
+        # the defaults row: no institute, NaN everywhere else, filled below like unmatched merge rows used to be
+        pairs = pd.concat([pairs, pd.DataFrame({'institute_id': [UNKNOWN_ID - 1], 'Program': [np.nan]})], ignore_index=True)
+
+        # left joins on unique keys: the row count and order of `pairs` are kept
+        details = pairs
+        if not getattr(self, 'full_college_df', pd.DataFrame()).empty:
+            details = pd.merge(details, self.full_college_df, on='institute_id', how='left')
+        if not getattr(self, 'full_placement_df', pd.DataFrame()).empty:
+            merge_on = ['institute_id', 'Program'] if 'Program' in self.full_placement_df.columns else ['institute_id']
+            details = pd.merge(details, self.full_placement_df, on=merge_on, how='left')
+        if not getattr(self, 'full_reviews_df', pd.DataFrame()).empty:
+            details = pd.merge(details, self.full_reviews_df, on='institute_id', how='left')
+        details = details.reindex(columns=self.ENRICHMENT_COLUMNS)
+        for col in self.ENRICHMENT_COLUMNS:
+            if col in self.RESULT_NUMERIC_COLUMNS:
+                values = pd.to_numeric(details[col], errors='coerce')
+                present = pd.to_numeric(details[col].dropna(), errors='coerce')
+                # integer columns (e.g. institute_rank) stay integers, as they were for fully matched pages
+                details[col] = values.fillna(0).astype(np.int64) if present.dtype.kind in 'iu' else values.fillna(0)
+            else:
+                details[col] = details[col].fillna('')
+        self.enrichment_df = details
+
+        quality = getattr(self, 'combined_quality_df', pd.DataFrame())
+        if not quality.empty:
+            merge_on = ['institute_id', 'Program'] if 'Program' in quality.columns else ['institute_id']
+            quality = pd.merge(pairs, quality, on=merge_on, how='left')
+        else:
+            quality = pairs
+
+        def metric(col):
+            values = quality[col] if col in quality.columns else pd.Series(0, index=quality.index)
+            return pd.to_numeric(values, errors='coerce').fillna(0).to_numpy(dtype=float)
+
+        self._enrich_quality = {
+            'ctc': metric('Max Average CTC'),
+            'placements_score': metric('placements_score_filter'),
+            'overall': metric('overall_aspect_score_filter'),
+        }
+
+    def _enrichment_rows(self, df):
+        """enrichment_df row of every (Institute, Program) in df; the defaults row when the pair is unknown."""
+        institutes, programs = self._enrich_categories
+        inst = pd.Categorical(df['Institute'], categories=institutes).codes.astype(np.int64)
+        prog = pd.Categorical(df['Program'], categories=programs).codes.astype(np.int64)
+        if inst.size:
+            inst = np.where(inst >= 0, self._institute_id_by_code[inst], UNKNOWN_ID)
+        keys = inst * len(programs) + prog
+        pos = np.searchsorted(self._enrich_keys, keys)
+        found = (inst >= 0) & (prog >= 0) & (pos < self._enrich_keys.size)
+        found[found] = self._enrich_keys[pos[found]] == keys[found]
+        return np.where(found, pos, self._enrich_keys.size)
+
     # -------------------------
     # Metadata getters
     # -------------------------
@@ -246,6 +654,17 @@ class CollegeRecommender:
         """Try exact match first; if none found, try contains. Series expected to be cleaned already."""
         if value == '':
             return pd.Series([True] * len(series), index=series.index)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # resolve against the dictionary, then compare integer codes
+            categories = series.cat.categories
+            codes = series.cat.codes
+            if value in categories:
+                exact = codes == categories.get_loc(value)
+                if exact.any():
+                    return exact
+            if series.name in self.text_dictionaries and series.dtype == self.text_dictionaries[series.name]:
+                return codes.isin(self._contains_codes(series.name, value))
+            return codes.isin(np.flatnonzero(categories.str.contains(value, na=False)))
         exact = series == value
         if exact.any():
             return exact
@@ -254,8 +673,14 @@ class CollegeRecommender:
     # -------------------------
     # Core prediction logic
     # -------------------------
-    def _predict_top_colleges_rank_only(self, program, stream='', quota='', category='', district='', target_year=2026):
-        df = self.merged_df.copy()
+    def _predict_top_colleges_rank_only(self, program, stream='', quota='', category='', district='', target_year=2026, counselling_round=None):
+        # filters are group-level attributes, so they run over the precomputed table (one row per group)
+        # through the inverted index; nothing is copied until the matching rows are selected
+        # counselling_round (a normalized round number, None = final round) reads the ranks of that round
+        # from the round index instead
+        table = self.prediction_table
+        if table.empty:
+            return pd.DataFrame()
 
         program = self._clean_user_input(program)
         stream = self._clean_user_input(stream)
@@ -263,180 +688,138 @@ class CollegeRecommender:
         category = self._clean_user_input(category)
         district = self._clean_user_input(district)
 
-        for col in ['Program', 'Stream', 'Quota', 'Category', 'District', 'Institute']:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
-            else:
-                df[col] = ''
-
         if program and 'tfw' in program and not category:
             category = 'tuition fee waiver'
 
-        def apply_filters(df_in, prog, strm, qta, cat, dist):
-            tmp = df_in.copy()
-            if prog:
-                exact = tmp[tmp['Program'] == prog].copy()
-                if not exact.empty:
-                    tmp = exact
-                else:
-                    contains = tmp[tmp['Program'].str.contains(prog, na=False)].copy()
-                    tmp = contains
-            if strm:
-                t = tmp[tmp['Stream'] == strm].copy()
-                if t.empty:
-                    t = tmp[tmp['Stream'].str.contains(strm, na=False)].copy()
-                if not t.empty:
-                    tmp = t
-            if qta:
-                t = tmp[tmp['Quota'] == qta].copy()
-                if t.empty:
-                    t = tmp[tmp['Quota'].str.contains(qta, na=False)].copy()
-                if not t.empty:
-                    tmp = t
-            if dist:
-                t = tmp[tmp['District'].fillna('') == dist].copy()
-                if t.empty:
-                    t = tmp[tmp['District'].str.contains(dist, na=False)].copy()
-                if not t.empty:
-                    tmp = t
-            if cat:
-                t = tmp[tmp['Category'] == cat].copy()
-                if t.empty:
-                    t = tmp[tmp['Category'].str.contains(cat, na=False)].copy()
-                if not t.empty:
-                    tmp = t
-            return tmp
-
-        filtered_df = apply_filters(df, program, stream, quota, category, district)
-        if filtered_df.empty:
-            filtered_df = apply_filters(df, program, stream, quota, '', district)
-        if filtered_df.empty:
-            filtered_df = apply_filters(df, program, stream, '', '', district)
-        if filtered_df.empty:
-            filtered_df = apply_filters(df, program, stream, '', '', '')
-        if filtered_df.empty:
-            filtered_df = apply_filters(df, program, '', '', '', '')
-        if filtered_df.empty and program:
-            filtered_df = df[df['Program'].str.contains(program, na=False)].copy()
-
-        if filtered_df.empty:
-            return pd.DataFrame()
-
-        final_ranks = filtered_df.sort_values('Round', ascending=False).drop_duplicates(
-            subset=['Year', 'Institute', 'Stream', 'Quota', 'Category'], keep='first'
-        )
+        index = self.filter_index
 
-        grouping_cols = ['Institute', 'Program', 'Stream', 'Quota', 'Category']
-        historical_years = final_ranks['Year'].dropna().unique() if 'Year' in final_ranks.columns else []
-        if target_year in historical_years:
-            result_df = final_ranks[final_ranks['Year'] == target_year]
-            if not result_df.empty:
-                top_colleges = result_df.sort_values(by='Closing Rank', ascending=True)
-                return top_colleges[['Institute', 'Program', 'Stream', 'Seat Type', 'Quota', 'Category', 'Opening Rank', 'Closing Rank']].rename(columns={'Closing Rank': 'Predicted Closing Rank'})
-
-        prediction_results = []
-        grouped_data = final_ranks.groupby(grouping_cols)
-        for name, group in grouped_data:
-            valid_ranks_group = group.dropna(subset=['Closing Rank'])
-            if len(valid_ranks_group) >= 1:
-                sorted_group = valid_ranks_group.sort_values(by='Year', ascending=False)
-                recent = sorted_group['Closing Rank'].head(2).tolist()
-                recent = [float(x) for x in recent if pd.notna(x)]
-                if len(recent) == 0:
-                    continue
-                predicted_rank = float(np.mean(recent))
-                predicted_rank = max(1.0, predicted_rank)
+        def match(rows, col, value):
+            """Group ids (within rows; None = all) whose `col` equals value, else whose `col` contains value."""
+            exact_code = self._code_lookup[col].get(value)
+            if exact_code is not None:
+                exact = intersect_rows(rows, index.rows(col, exact_code))
+                if exact.size:
+                    return exact
+            return intersect_rows(rows, index.rows(col, self._contains_codes(col, value)))
 
-                latest_data = group.sort_values(by='Year', ascending=False).iloc[0]
-                latest_opening_rank = latest_data['Opening Rank'] if pd.notna(latest_data['Opening Rank']) else np.nan
-                latest_seat_type = latest_data['Seat Type'] if 'Seat Type' in latest_data.index else ''
+        # The relaxation levels share filter prefixes (program, program+stream, ...); memoize them per request
+        memo = {}
 
-                prediction_results.append({
-                    'Institute': name[0], 'Program': name[1], 'Stream': name[2], 'Quota': name[3],
-                    'Category': name[4], 'Predicted Closing Rank': predicted_rank,
-                    'Opening Rank': latest_opening_rank, 'Seat Type': latest_seat_type
-                })
+        def apply_filters(prog, strm, qta, cat, dist):
+            rows = None
+            steps = ()
+            if prog:
+                steps = (('Program', prog),)
+                if steps not in memo:
+                    memo[steps] = match(None, 'Program', prog)
+                rows = memo[steps]
+            for col, value in (('Stream', strm), ('Quota', qta), ('District', dist), ('Category', cat)):
+                if value:
+                    steps = steps + ((col, value),)
+                    if steps not in memo:
+                        t = match(rows, col, value)
+                        memo[steps] = t if t.size else rows
+                    rows = memo[steps]
+            return rows if rows is not None else np.arange(index.n_rows)
+
+        filtered_rows = apply_filters(program, stream, quota, category, district)
+        if not filtered_rows.size:
+            filtered_rows = apply_filters(program, stream, quota, '', district)
+        if not filtered_rows.size:
+            filtered_rows = apply_filters(program, stream, '', '', district)
+        if not filtered_rows.size:
+            filtered_rows = apply_filters(program, stream, '', '', '')
+        if not filtered_rows.size:
+            filtered_rows = apply_filters(program, '', '', '', '')
+        if not filtered_rows.size and program:
+            filtered_rows = index.rows('Program', self._contains_codes('Program', program))
+
+        if not filtered_rows.size:
+            return pd.DataFrame()
 
-        pred_df = pd.DataFrame(prediction_results)
+        # A historical target year answers with that year's final-round rows for the matched groups
+        # (each group's rows are a contiguous slice of final_round_df, so only matched rows are touched)
+        starts = self._final_round_offsets[filtered_rows]
+        lengths = self._final_round_offsets[filtered_rows + 1] - starts
+        year_rows = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        year_rows = year_rows[self.final_round_df['Year'].to_numpy()[year_rows] == target_year]
+        if year_rows.size:
+            top_colleges = self.final_round_df.iloc[year_rows]
+            if counselling_round:
+                opening, closing = self.round_ranks(top_colleges['group_id'].to_numpy(), target_year, counselling_round)
+                top_colleges = top_colleges.assign(**{'Opening Rank': opening, 'Closing Rank': closing})
+            top_colleges = top_colleges.sort_values(by='Closing Rank', ascending=True)
+            top_colleges = top_colleges[['Institute', 'Program', 'Stream', 'Seat Type', 'Quota', 'Category', 'Opening Rank', 'Closing Rank']].rename(columns={'Closing Rank': 'Predicted Closing Rank'})
+            return self._decode_text_columns(top_colleges)
+
+        # otherwise read the precomputed forecast for the target year (the first forecast year for past/gap years)
+        forecaster = self.forecaster
+        forecast_year = max(int(target_year), forecaster.first_forecast_year or int(target_year))
+        predicted = forecaster.forecast(forecast_year)[filtered_rows]
+        if counselling_round:
+            # the forecast is for the final round; earlier rounds close at the group's usual fraction of it
+            predicted = predicted * self._round_ratio[filtered_rows, min(int(counselling_round), self._round_count) - 1]
+        pred_df = table.iloc[filtered_rows].assign(**{'Predicted Closing Rank': predicted})
+        pred_df = pred_df[pred_df['Predicted Closing Rank'].notna()]
         if pred_df.empty:
             return pd.DataFrame()
-        return pred_df
+        pred_df = pred_df[self.GROUP_COLS + ['Predicted Closing Rank', 'Opening Rank', 'Seat Type']].reset_index(drop=True)
+        return self._decode_text_columns(pred_df)
 
     # -------------------------
     # Scoring / ordering helpers
     # -------------------------
-    def _filter_top_colleges_by_metrics(self, df, min_ctc, min_placements_score=0):
-        filtered_df = df.copy()
-        if min_ctc > 0 and 'Max Average CTC' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Max Average CTC'] >= min_ctc]
-        if min_placements_score > 0 and 'placements_score_filter' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['placements_score_filter'] >= min_placements_score]
-
-        if filtered_df.empty:
-            return pd.DataFrame()
-
-        sort_cols = []
-        if 'Max Average CTC' in filtered_df.columns:
-            sort_cols.append('Max Average CTC')
-        if 'overall_aspect_score_filter' in filtered_df.columns:
-            sort_cols.append('overall_aspect_score_filter')
-        sort_cols.append('Predicted Closing Rank')
-
-        ascending = [False if c in ['Max Average CTC', 'overall_aspect_score_filter'] else True for c in sort_cols]
-
-        final_display = filtered_df.sort_values(by=sort_cols, ascending=ascending).drop_duplicates(
-            subset=['Institute', 'Program', 'Stream', 'Quota', 'Category'], keep='first'
-        ).head(10)
-
-        return final_display
-
-    def _finalize_table(self, ranked_filtered_df):
-        final_df = ranked_filtered_df[['Institute', 'Program', 'Stream', 'Seat Type', 'Quota', 'Category', 'Opening Rank', 'Predicted Closing Rank']].copy()
-
-        if not getattr(self, 'full_college_df', pd.DataFrame()).empty:
-            final_df = pd.merge(final_df, self.full_college_df, on='Institute', how='left')
-        else:
-            final_df['District'] = ''
-            final_df['Location'] = ''
-            final_df['Website'] = ''
-            final_df['logo_image'] = ''
-            final_df['Picture'] = ''
-
-        if not getattr(self, 'full_placement_df', pd.DataFrame()).empty:
-            merge_on = ['Institute', 'Program'] if 'Program' in self.full_placement_df.columns else ['Institute']
-            final_df = pd.merge(final_df, self.full_placement_df, on=merge_on, how='left')
-        if not getattr(self, 'full_reviews_df', pd.DataFrame()).empty:
-            final_df = pd.merge(final_df, self.full_reviews_df, on='Institute', how='left')
-
-        all_cols_to_select = [
-            'Institute', 'Program', 'Stream', 'Seat Type', 'Quota', 'Category',
-            'Opening Rank', 'Predicted Closing Rank',
-            'District', 'Location', 'Website', 'logo_image', 'Picture',
-            'average_ctc', 'median_ctc', 'highest_ctc', 'top recruiter', 'job_title', 'institute_rank',
-            'rating', 'sentiment_score', 'mess_score', 'professor_score', 'campus_score', 'placement_score',
-            'infrastructure_score', 'overall_aspect_score'
-        ]
-
-        for c in all_cols_to_select:
-            if c not in final_df.columns:
-                final_df[c] = ''
-
-        final_df = final_df.reindex(columns=all_cols_to_select)
-        final_df = final_df.rename(columns={'Predicted Closing Rank': 'Closing Rank'})
-
-        numeric_cols = ['Opening Rank', 'Closing Rank', 'average_ctc', 'median_ctc', 'highest_ctc',
-                        'institute_rank', 'rating', 'sentiment_score', 'mess_score', 'professor_score',
-                        'campus_score', 'placement_score', 'infrastructure_score', 'overall_aspect_score']
-
-        for col in numeric_cols:
-            if col in final_df.columns:
-                final_df[col] = pd.to_numeric(final_df[col], errors='coerce').fillna(0)
+    def _filter_top_colleges_by_metrics(self, pool, start, min_ctc, min_placements_score=0):
+        """
+        Pool row positions among the eligible rows [start, n_ranked), in quality order:
+        Max Average CTC desc, overall_aspect_score_filter desc, Predicted Closing Rank asc; one row per group.
+        The pool carries that order precomputed (quality_order), so this is a masked scan, not a sort.
+        """
+        order = pool['quality_order']
+        keep = (order >= start) & (order < pool['n_ranked'])
+        if min_ctc > 0:
+            keep &= pool['ctc'][order] >= min_ctc
+        if min_placements_score > 0:
+            keep &= pool['placements_score'][order] >= min_placements_score
+        selected = order[keep]
+        if selected.size == 0:
+            return selected
+
+        # drop_duplicates on the group keys (keep first in quality order)
+        _, first = np.unique(pool['group_codes'][selected], return_index=True)
+        return selected[np.sort(first)]
+
+    # columns of every recommendation record, in order (rendered by static/js/recommendation.js)
+    CANDIDATE_COLUMNS = ['Institute', 'Program', 'Stream', 'Seat Type', 'Quota', 'Category', 'Opening Rank', 'Predicted Closing Rank']
+    ENRICHMENT_COLUMNS = [
+        'District', 'Location', 'Website', 'logo_image', 'Picture',
+        'average_ctc', 'median_ctc', 'highest_ctc', 'top recruiter', 'job_title', 'institute_rank',
+        'rating', 'sentiment_score', 'mess_score', 'professor_score', 'campus_score', 'placement_score',
+        'infrastructure_score', 'overall_aspect_score'
+    ]
+    RESULT_NUMERIC_COLUMNS = ['Opening Rank', 'Closing Rank', 'average_ctc', 'median_ctc', 'highest_ctc',
+                              'institute_rank', 'rating', 'sentiment_score', 'mess_score', 'professor_score',
+                              'campus_score', 'placement_score', 'infrastructure_score', 'overall_aspect_score']
+
+    def _finalize_table(self, ranked_filtered_df, enrich_rows):
+        """
+        Result table for candidate rows: the candidate columns next to their rows of enrichment_df
+        (enrich_rows, from _enrichment_rows), with Predicted Closing Rank renamed to Closing Rank.
+        Numeric columns are filled with 0, text columns with ''.
+        """
+        final_df = self._candidate_table(ranked_filtered_df)
+        details = self.enrichment_df.take(enrich_rows).reset_index(drop=True)
+        return pd.concat([final_df, details], axis=1)
 
+    def _candidate_table(self, ranked_filtered_df):
+        """The candidate columns of a result table (Predicted Closing Rank -> Closing Rank, 0 / '' for missing values)."""
+        final_df = ranked_filtered_df[self.CANDIDATE_COLUMNS].reset_index(drop=True).rename(columns={'Predicted Closing Rank': 'Closing Rank'})
         for col in final_df.columns:
-            if col not in numeric_cols:
+            if col in self.RESULT_NUMERIC_COLUMNS:
+                final_df[col] = pd.to_numeric(final_df[col], errors='coerce').fillna(0)
+            else:
                 final_df[col] = final_df[col].fillna('')
-
-        return final_df.head(10)
+        return final_df
 
     # -------------------------
     # Association rule mining
@@ -451,9 +834,10 @@ class CollegeRecommender:
 
         if os.path.exists(rules_path):
             try:
-                rules_df = pd.read_csv(rules_path, dtype='object')
-                # store in memory
+                rules_df = load_table(rules_path)
+                # store in memory, compiled once for request-time matching
                 self.assoc_rules_df = rules_df
+                self.compiled_rules = CompiledRules(rules_df)
                 return
             except Exception:
                 pass
@@ -465,108 +849,42 @@ class CollegeRecommender:
         except Exception as e:
             print("Warning: failed to save association rules to csv:", e)
         self.assoc_rules_df = rules_df
+        self.compiled_rules = CompiledRules(rules_df)
 
-    def _generate_association_rules(self, min_support=0.02, max_itemset_size=3):
+    def _generate_association_rules(self, min_support=0.02, max_itemset_size=3, attributes=None, n_jobs=1):
         """
-        Simple Apriori-like miner:
-        - Build transactions from merged_df rows using attributes: Program, Stream, Quota, Category, District
+        Frequent-itemset rule miner (vertical Eclat, see association_rules.generate_rules):
+        - Build transactions from merged_df rows using attributes (default: Program, Stream, Quota, Category, District;
+          others such as 'Seat Type' or 'Year' can be added)
         - Items are strings like "program=computer science & engineering"
+        - n_jobs > 1 counts first-level subtrees on a process pool
         - Returns DataFrame of rules: antecedent (semicolon-separated), consequent (single item), support, confidence, lift
         """
-        df = getattr(self, 'merged_df', pd.DataFrame()).copy()
-        if df.empty:
-            return pd.DataFrame(columns=['antecedent', 'consequent', 'support', 'confidence', 'lift'])
-
-        attributes = ['Program', 'Stream', 'Quota', 'Category', 'District']
-        transactions = []
-        for _, row in df.iterrows():
-            items = set()
-            for a in attributes:
-                if a in row and pd.notna(row[a]) and str(row[a]).strip() != '':
-                    val = str(row[a]).strip().lower()
-                    items.add(f"{a.lower()}={val}")
-            if items:
-                transactions.append(sorted(items))
-
-        N = len(transactions)
-        if N == 0:
-            return pd.DataFrame(columns=['antecedent', 'consequent', 'support', 'confidence', 'lift'])
-
-        # count frequent itemsets for sizes 1..max_itemset_size
-        itemset_counts = Counter()
-        for t in transactions:
-            # generate combinations up to max size
-            for k in range(1, max_itemset_size + 1):
-                for comb in itertools.combinations(t, k):
-                    itemset_counts[frozenset(comb)] += 1
-
-        # filter by min_support
-        frequent_itemsets = {iset: cnt for iset, cnt in itemset_counts.items() if (cnt / N) >= min_support}
-
-        # compute support map
-        support_map = {iset: cnt / N for iset, cnt in frequent_itemsets.items()}
-
-        # generate rules: for each frequent itemset with size>=2, consider all splits where consequent size=1
-        rules = []
-        for iset in frequent_itemsets:
-            if len(iset) < 2:
-                continue
-            items_list = list(iset)
-            for consequent_item in items_list:
-                antecedent = frozenset(iset - {consequent_item})
-                consequent = frozenset([consequent_item])
-                if antecedent in support_map and consequent in support_map:
-                    sup_ab = support_map[iset]
-                    sup_a = support_map[antecedent]
-                    sup_b = support_map[consequent]
-                    # confidence and lift
-                    confidence = sup_ab / sup_a if sup_a > 0 else 0.0
-                    lift = confidence / sup_b if sup_b > 0 else 0.0
-                    rules.append({
-                        'antecedent': ';'.join(sorted(list(antecedent))),
-                        'consequent': ';'.join(sorted(list(consequent))),
-                        'support': round(sup_ab, 6),
-                        'confidence': round(confidence, 6),
-                        'lift': round(lift, 6)
-                    })
-
-        rules_df = pd.DataFrame(rules)
-        # sort by confidence desc then support desc
-        if not rules_df.empty:
-            rules_df = rules_df.sort_values(by=['confidence', 'support'], ascending=[False, False]).reset_index(drop=True)
-        else:
-            rules_df = pd.DataFrame(columns=['antecedent', 'consequent', 'support', 'confidence', 'lift'])
-        return rules_df
+        df = getattr(self, 'merged_df', pd.DataFrame())
+        return generate_rules(
+            df, attributes=attributes or RULE_ATTRIBUTES, min_support=min_support,
+            max_itemset_size=max_itemset_size, n_jobs=n_jobs
+        )
 
     # -------------------------
     # Rule-boosting helper
     # -------------------------
     def _compute_boosts_from_rules(self, candidates_df, user_filters):
         """
-        Given candidates_df (with Institute, Program, Stream, Quota, Category, District columns cleaned)
+        Given candidates_df (with Institute, Program, Stream, Quota, Category, District columns)
         and user_filters dict (program/stream/quota/category/district cleaned),
         compute a boost score per candidate using matching rules.
 
         Strategy:
         - For each rule whose antecedent is fully present in user_filters (i.e., user provided matching values),
-          check the rule's consequent (single item). If the candidate matches the consequent, add boost += confidence * support.
-        - Return dict: institute_program_key -> boost_score
-        """
-        boosts = defaultdict(float)
-        rules_df = getattr(self, 'assoc_rules_df', pd.DataFrame())
-        if rules_df is None or rules_df.empty:
-            return boosts
-
-        # Pre-build candidate attribute sets for quick check
-        cand_attrs = {}
-        for _, row in candidates_df.iterrows():
-            key = (row.get('Institute', ''), row.get('Program', ''))
-            items = set()
-            for a in ['Program', 'Stream', 'Quota', 'Category', 'District']:
-                v = row.get(a, '')
-                if pd.notna(v) and str(v).strip() != '':
-                    items.add(f"{a.lower()}={str(v).strip().lower()}")
-            cand_attrs[key] = items
+          check the rule's consequent. If the candidate matches the consequent, add boost += confidence * support.
+        - Rules are compiled at load (see association_rules.CompiledRules), so this is a few dict lookups
+          plus one vectorized pass over the candidates.
+        - Returns a float array aligned with candidates_df rows.
+        """
+        compiled = getattr(self, 'compiled_rules', None)
+        if compiled is None or candidates_df.empty:
+            return np.zeros(len(candidates_df), dtype=float)
 
         # Build user-provided item set from filters (only include filters the user provided non-empty)
         user_items = set()
@@ -574,120 +892,134 @@ class CollegeRecommender:
             if v and str(v).strip() != '':
                 user_items.add(f"{k.lower()}={str(v).strip().lower()}")
 
-        # For each rule, check if antecedent subset of user_items
-        for _, r in rules_df.iterrows():
-            antecedent_items = set(filter(None, [s.strip() for s in (r.get('antecedent') or '').split(';')]))
-            consequent_items = set(filter(None, [s.strip() for s in (r.get('consequent') or '').split(';')]))
-            if not antecedent_items:
-                continue
-            # antecedent must be fully present in user_items to apply
-            if antecedent_items.issubset(user_items):
-                for cand_key, cand_set in cand_attrs.items():
-                    # if candidate contains all consequent items, apply boost
-                    if consequent_items.issubset(cand_set):
-                        try:
-                            boost_value = float(r.get('confidence', 0.0)) * float(r.get('support', 0.0))
-                        except Exception:
-                            boost_value = 0.0
-                        boosts[cand_key] += boost_value
-        return boosts
+        return compiled.boosts(compiled.encode_items(candidates_df, RULE_ATTRIBUTES), user_items)
 
     # -------------------------
     # Helper to build group-level predictions across entire dataset for ML training/eval
     # -------------------------
     def _build_group_predictions_all(self):
         """
-        Build a grouped DataFrame across entire master_rank_df similar to the per-program predictor.
+        Group-level predictions across the entire dataset for ML training/eval, read from the precomputed table.
         Output columns: Institute, Program, Stream, Quota, Category, Predicted Closing Rank, Latest Closing Rank, Opening Rank
         """
-        df = getattr(self, 'master_rank_df', pd.DataFrame()).copy()
-        if df.empty:
+        table = getattr(self, 'prediction_table', pd.DataFrame())
+        if table.empty:
             return pd.DataFrame()
-
-        grouping_cols = ['Institute', 'Program', 'Stream', 'Quota', 'Category']
-        df['Closing Rank'] = pd.to_numeric(df['Closing Rank'], errors='coerce')
-        prediction_results = []
-        grouped = df.groupby(grouping_cols)
-
-        for name, group in grouped:
-            valid_ranks_group = group.dropna(subset=['Closing Rank'])
-            if len(valid_ranks_group) >= 1:
-                sorted_group = valid_ranks_group.sort_values(by='Year', ascending=False)
-                recent = sorted_group['Closing Rank'].head(2).tolist()
-                recent = [float(x) for x in recent if pd.notna(x)]
-                if len(recent) == 0:
-                    continue
-                predicted_rank = float(np.mean(recent))
-                predicted_rank = max(1.0, predicted_rank)
-
-                latest_row = group.sort_values(by='Year', ascending=False).iloc[0]
-                latest_closing = latest_row['Closing Rank'] if pd.notna(latest_row['Closing Rank']) else np.nan
-                latest_opening = latest_row['Opening Rank'] if 'Opening Rank' in latest_row.index and pd.notna(latest_row['Opening Rank']) else np.nan
-
-                prediction_results.append({
-                    'Institute': name[0], 'Program': name[1], 'Stream': name[2], 'Quota': name[3],
-                    'Category': name[4],
-                    'Predicted Closing Rank': predicted_rank,
-                    'Latest Closing Rank': latest_closing,
-                    'Opening Rank': latest_opening
-                })
-
-        return pd.DataFrame(prediction_results)
+        table = table.dropna(subset=['Predicted Closing Rank'])
+        return table[self.GROUP_COLS + ['Predicted Closing Rank', 'Latest Closing Rank', 'Opening Rank']].reset_index(drop=True)
 
     # -------------------------
     # Evaluate heuristic vs Decision Tree and return chosen model info
     # -------------------------
-    def _evaluate_and_train_ml(self, user_rank_threshold):
+    ML_FEATURES = ['Institute', 'Program', 'Stream', 'Quota', 'Category']
+    ML_RANK_QUANTILES = [0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95]
+
+    def _expand_with_rank_thresholds(self, grouped_df, thresholds):
+        """
+        Repeat every group once per rank threshold so a single model can take the user rank as a feature.
+        Adds columns: user_rank, true_label (Latest Closing Rank >= user_rank), heuristic_pred.
+        """
+        parts = []
+        for t in thresholds:
+            part = grouped_df.copy()
+            part['user_rank'] = float(t)
+            parts.append(part)
+        expanded = pd.concat(parts, ignore_index=True)
+        expanded['true_label'] = (expanded['Latest Closing Rank'] >= expanded['user_rank']).astype(int)
+        expanded['heuristic_pred'] = (expanded['Predicted Closing Rank'] >= expanded['user_rank']).astype(int)
+        return expanded
+
+    def _ml_feature_frame(self, encoded_df, predicted_closing_rank, user_rank):
+        """Numeric feature frame in training column order: encoded categoricals + rank features."""
+        X = encoded_df.copy()
+        X['predicted_closing_rank'] = np.asarray(predicted_closing_rank, dtype=float)
+        X['user_rank'] = np.asarray(user_rank, dtype=float)
+        X['rank_margin'] = X['predicted_closing_rank'] - X['user_rank']
+        return X
+
+    # code given to labels the encoders never saw (every real label code is >= 0)
+    ML_UNSEEN_CODE = -1
+
+    def _ml_code_maps(self, bundle):
+        """
+        Per feature: label -> code dict equal to the fitted LabelEncoder's transform.
+        Built once per bundle (stored on it) so scoring never calls LabelEncoder.transform.
         """
-        Build a dataset and evaluate two approaches:
-        - Heuristic: predicted closing rank >= user_rank_threshold (binary)
-        - Decision Tree: trained to predict the same target (Latest Closing Rank >= user_rank_threshold)
+        code_maps = bundle.get('code_maps')
+        if code_maps is None:
+            code_maps = {}
+            for col, le in (bundle.get('label_encoders') or {}).items():
+                classes = getattr(le, 'classes_', None)
+                code_maps[col] = {str(v): i for i, v in enumerate(classes)} if classes is not None else None
+            bundle['code_maps'] = code_maps
+        return code_maps
+
+    def _encode_ml_features(self, df, code_maps):
+        """
+        Integer-coded ML_FEATURES for a candidates frame (normalized like training: stripped, lower-cased).
+        - unseen labels -> ML_UNSEEN_CODE
+        - features trained without an encoder (constant column) -> 0, as in training
+        """
+        encoded = pd.DataFrame(index=range(len(df)))
+        for col in self.ML_FEATURES:
+            codes = code_maps.get(col)
+            if codes is None or col not in df.columns:
+                encoded[col] = 0
+                continue
+            values = df[col].astype(object).where(df[col].notna(), '').astype(str).str.strip().str.lower()
+            encoded[col] = values.map(codes).fillna(self.ML_UNSEEN_CODE).to_numpy(dtype=np.int64)
+        return encoded
+
+    def _evaluate_and_train_ml(self):
+        """
+        Build a dataset once and evaluate two approaches over a grid of rank thresholds
+        (quantiles of the latest closing ranks), so no retraining is needed per user rank:
+        - Heuristic: predicted closing rank >= user_rank (binary)
+        - Decision Tree: trained to predict Latest Closing Rank >= user_rank, with user_rank as a feature
         Prints accuracy, precision, recall, f1 for both to console.
-        Returns:
-            chosen_method: 'heuristic' or 'decision_tree'
-            dt_model: trained DecisionTreeClassifier or None
+        Returns a model bundle dict (see model_registry.py):
+            chosen: 'heuristic' or 'decision_tree'
+            model: trained DecisionTreeClassifier or None
             label_encoders: dict of LabelEncoders used (for later encoding) or {}
         """
+        heuristic_bundle = {'chosen': 'heuristic', 'model': None, 'label_encoders': {}, 'metrics': {}}
+
         # Prepare grouped data
         grouped_df = self._build_group_predictions_all()
         if grouped_df.empty:
             print("ML Eval: no grouped historical data available. Skipping ML evaluation.")
-            return 'heuristic', None, {}
+            return heuristic_bundle
 
-        # Truth label: was the latest closing rank >= user_rank_threshold (consistent with earlier filter logic)
-        grouped_df = grouped_df.dropna(subset=['Latest Closing Rank'])
         grouped_df['Latest Closing Rank'] = pd.to_numeric(grouped_df['Latest Closing Rank'], errors='coerce')
-        grouped_df = grouped_df.dropna(subset=['Latest Closing Rank']).copy()
+        grouped_df = grouped_df.dropna(subset=['Latest Closing Rank', 'Predicted Closing Rank']).reset_index(drop=True)
         if grouped_df.empty:
             print("ML Eval: no entries with latest closing rank. Skipping ML evaluation.")
-            return 'heuristic', None, {}
+            return heuristic_bundle
 
-        grouped_df['true_label'] = (grouped_df['Latest Closing Rank'] >= float(user_rank_threshold)).astype(int)
+        thresholds = sorted(set(float(round(v)) for v in grouped_df['Latest Closing Rank'].quantile(self.ML_RANK_QUANTILES).tolist()))
 
-        # Heuristic predictions (using predicted closing rank)
-        grouped_df['heuristic_pred'] = (grouped_df['Predicted Closing Rank'] >= float(user_rank_threshold)).astype(int)
-
-        # Print heuristic metrics
+        # Heuristic metrics over every (group, threshold) pair
+        expanded_all = self._expand_with_rank_thresholds(grouped_df, thresholds)
         try:
-            h_acc = metrics.accuracy_score(grouped_df['true_label'], grouped_df['heuristic_pred'])
-            h_prec = metrics.precision_score(grouped_df['true_label'], grouped_df['heuristic_pred'], zero_division=0)
-            h_rec = metrics.recall_score(grouped_df['true_label'], grouped_df['heuristic_pred'], zero_division=0)
-            h_f1 = metrics.f1_score(grouped_df['true_label'], grouped_df['heuristic_pred'], zero_division=0)
+            h_acc = metrics.accuracy_score(expanded_all['true_label'], expanded_all['heuristic_pred'])
+            h_prec = metrics.precision_score(expanded_all['true_label'], expanded_all['heuristic_pred'], zero_division=0)
+            h_rec = metrics.recall_score(expanded_all['true_label'], expanded_all['heuristic_pred'], zero_division=0)
+            h_f1 = metrics.f1_score(expanded_all['true_label'], expanded_all['heuristic_pred'], zero_division=0)
         except Exception:
             h_acc = h_prec = h_rec = h_f1 = 0.0
 
         print(f"[Heuristic] accuracy: {h_acc:.4f}, precision: {h_prec:.4f}, recall: {h_rec:.4f}, f1: {h_f1:.4f}")
+        heuristic_bundle['metrics'] = {'heuristic': {'accuracy': h_acc, 'precision': h_prec, 'recall': h_rec, 'f1': h_f1}}
 
         # If sklearn not available, return heuristic
         if not SKLEARN_AVAILABLE:
             print("scikit-learn not available. Using heuristic for ranking.")
-            return 'heuristic', None, {}
+            return heuristic_bundle
 
         # Build features for DT: encode Program, Stream, Quota, Category, Institute (label encode)
-        features = ['Institute', 'Program', 'Stream', 'Quota', 'Category']
-        X = grouped_df[features].fillna('').astype(str).apply(lambda col: col.str.strip().str.lower())
+        X = grouped_df[self.ML_FEATURES].fillna('').astype(str).apply(lambda col: col.str.strip().str.lower())
         label_encoders = {}
-        X_enc = pd.DataFrame()
+        X_enc = pd.DataFrame(index=grouped_df.index)
         for col in X.columns:
             le = LabelEncoder()
             try:
@@ -698,16 +1030,20 @@ class CollegeRecommender:
                 le = None
             label_encoders[col] = le
 
-        # Optionally include predicted closing rank as numeric feature
-        X_enc['predicted_closing_rank'] = grouped_df['Predicted Closing Rank'].astype(float).fillna(grouped_df['Predicted Closing Rank'].median())
-
-        y = grouped_df['true_label'].astype(int)
-
-        # train/test split
+        # split by group (not by expanded row) so the same group never appears in both train and test
         try:
-            X_train, X_test, y_train, y_test = train_test_split(X_enc, y, test_size=0.2, random_state=42, stratify=y if len(y.unique())>1 else None)
+            train_idx, test_idx = train_test_split(grouped_df.index.values, test_size=0.2, random_state=42)
         except Exception:
-            X_train, X_test, y_train, y_test = X_enc, X_enc, y, y
+            train_idx = test_idx = grouped_df.index.values
+
+        def build_xy(idx):
+            part = self._expand_with_rank_thresholds(grouped_df.loc[idx], thresholds)
+            enc = pd.concat([X_enc.loc[idx]] * len(thresholds), ignore_index=True)
+            X_part = self._ml_feature_frame(enc, part['Predicted Closing Rank'], part['user_rank'])
+            return X_part, part['true_label'].astype(int)
+
+        X_train, y_train = build_xy(train_idx)
+        X_test, y_test = build_xy(test_idx)
 
         # Train Decision Tree
         try:
@@ -720,7 +1056,7 @@ class CollegeRecommender:
             dt_f1 = metrics.f1_score(y_test, y_pred, zero_division=0)
         except Exception as e:
             print("Decision Tree training failed:", e)
-            return 'heuristic', None, {}
+            return heuristic_bundle
 
         print(f"[DecisionTree] accuracy: {dt_acc:.4f}, precision: {dt_prec:.4f}, recall: {dt_rec:.4f}, f1: {dt_f1:.4f}")
 
@@ -728,25 +1064,131 @@ class CollegeRecommender:
         chosen = 'decision_tree' if dt_acc > h_acc else 'heuristic'
         print(f"Chosen model for further ranking: {chosen} (heuristic acc {h_acc:.4f} vs dt acc {dt_acc:.4f})")
 
-        return chosen, dt if chosen == 'decision_tree' else None, label_encoders if chosen == 'decision_tree' else {}
+        heuristic_bundle['metrics']['decision_tree'] = {'accuracy': dt_acc, 'precision': dt_prec, 'recall': dt_rec, 'f1': dt_f1}
+        if chosen != 'decision_tree':
+            return heuristic_bundle
+        return {'chosen': chosen, 'model': dt, 'label_encoders': label_encoders, 'metrics': heuristic_bundle['metrics']}
 
     # -------------------------
     # Public recommend method
     # -------------------------
-    def recommend(self, user_rank, user_program, user_stream='', user_quota='', user_category='', user_location='', min_ctc=0, min_placements_score=0, target_year=2026):
+    def _user_filters(self, user_program, user_stream='', user_quota='', user_category='', user_location=''):
+        """Cleaned user filter values keyed the way association-rule items are named."""
+        return {
+            'program': self._clean_user_input(user_program),
+            'stream': self._clean_user_input(user_stream),
+            'quota': self._clean_user_input(user_quota),
+            'category': self._clean_user_input(user_category),
+            'district': self._clean_user_input(user_location)
+        }
+
+    def _candidate_pool(self, user_program, user_stream='', user_quota='', user_category='', user_location='', target_year=2026, counselling_round=None):
+        """
+        Rank-independent part of recommend(): predictions for the filters merged with the quality metrics,
+        ordered by Predicted Closing Rank (see _build_candidate_pool; pool['df'] is empty when no historical data matches).
+        Pools are cached (LRU + TTL) on the normalized filters; they cover every rank, so a hit only
+        needs the rank cut re-applied. Callers must treat the returned pool as read-only.
+        counselling_round must already be normalized (_normalize_round).
+        """
+        cache_key = tuple(self._user_filters(user_program, user_stream, user_quota, user_category, user_location).values()) + (target_year, counselling_round)
+        version = getattr(self, 'data_version', None)
+        with self.timings.stage('pool_cache'):
+            pool = self.pool_cache.get(cache_key, version=version)
+        if pool is None:
+            pool = self._build_candidate_pool(user_program, user_stream, user_quota, user_category, user_location, target_year, counselling_round)
+            self.pool_cache.put(cache_key, pool, version=version)
+        return pool
+
+    def warm_from(self, other, limit=64):
+        """
+        Prebuild the candidate pools `other` (the recommender being replaced) used most recently,
+        so a hot reload does not turn the first requests after the swap into cache misses.
+        Returns the number of pools built.
+        """
+        built = 0
+        for key in reversed(other.pool_cache.keys()[-limit:]):
+            try:
+                self._candidate_pool(*key)
+                built += 1
+            except Exception as e:
+                print("Warning: could not warm candidate pool", key, ":", e)
+        return built
+
+    def _build_candidate_pool(self, user_program, user_stream='', user_quota='', user_category='', user_location='', target_year=2026, counselling_round=None):
+        """
+        Returns a dict:
+        - df: candidates sorted by Predicted Closing Rank (stable; missing ranks last)
+        - enrich_rows: each candidate's row in enrichment_df (and the quality-metric arrays)
+        - ranks: that column as a float array, n_ranked: number of non-missing ranks
+          -> the eligible rows for a user rank are the contiguous slice [searchsorted(ranks, rank), n_ranked)
+        - quality_order: row order used by the min CTC / placement-score path, precomputed once
+        - ctc / placements_score / group_codes: arrays used by that path
+        """
+        with self.timings.stage('filter'):
+            ranked_predictions_df = self._predict_top_colleges_rank_only(
+                program=user_program, stream=user_stream, quota=user_quota, category=user_category, district=user_location,
+                target_year=target_year, counselling_round=counselling_round
+            )
+        if ranked_predictions_df.empty:
+            return {'df': ranked_predictions_df, 'enrich_rows': np.array([], dtype=np.int64), 'ranks': np.array([], dtype=float), 'n_ranked': 0}
+
+        with self.timings.stage('quality_lookup'):
+            return self._pool_from_predictions(ranked_predictions_df)
+
+    def _pool_from_predictions(self, ranked_predictions_df):
+        """Sort by Predicted Closing Rank, look up each candidate's enrichment row and precompute the pool arrays."""
+        df = ranked_predictions_df.sort_values(by='Predicted Closing Rank', ascending=True, kind='mergesort').reset_index(drop=True)
+
+        # quality metrics come from the enrichment table by row id (no per-request merge)
+        enrich_rows = self._enrichment_rows(df)
+        quality = self._enrich_quality
+        ranks = df['Predicted Closing Rank'].to_numpy(dtype=float)
+        ctc = quality['ctc'][enrich_rows]
+        overall = quality['overall'][enrich_rows]
+        return {
+            'df': df,
+            'enrich_rows': enrich_rows,
+            'ranks': ranks,
+            'n_ranked': int(np.count_nonzero(~np.isnan(ranks))),
+            # np.lexsort is stable and its last key is the primary one
+            'quality_order': np.lexsort((ranks, -overall, -ctc)),
+            'ctc': ctc,
+            'placements_score': quality['placements_score'][enrich_rows],
+            'group_codes': df.groupby(self.GROUP_COLS, sort=False).ngroup().to_numpy(),
+        }
+
+    def _rank_cut(self, pool, user_rank_vals):
+        """First eligible row (Predicted Closing Rank >= user rank) for one rank or an array of ranks."""
+        return np.searchsorted(pool['ranks'][:pool['n_ranked']], user_rank_vals, side='left')
+
+    def timing_stats(self):
+        """Per-stage recommend() histograms (empty unless timings are enabled)."""
+        return {'enabled': self.timings.enabled, 'stages': self.timings.snapshot()}
+
+    def cache_stats(self):
+        """Hit/miss/eviction counters of the candidate-pool cache."""
+        stats = self.pool_cache.stats()
+        stats['data_version'] = getattr(self, 'data_version', None)
+        return stats
+
+    def recommend(self, user_rank, user_program, user_stream='', user_quota='', user_category='', user_location='', min_ctc=0, min_placements_score=0, target_year=2026, top_n=10,
+                  counselling_round=None):
         """
         Returns recommendations (status, message, data)
         - user_rank: numeric
         - user_program: mandatory
         - optional filters: user_stream, user_quota, user_category, user_location
         - min_ctc & min_placements_score can be used to reorder/filter when desired
+        - top_n: number of recommendations (first page of recommend_page())
+        - counselling_round: closing ranks as of this round (1, 2, ...) instead of the final round (None)
         """
+        try:
+            counselling_round = self._normalize_round(counselling_round)
+        except Exception:
+            return {'status': 'error', 'message': 'Invalid value for counselling_round.'}
+        pool = self._candidate_pool(user_program, user_stream, user_quota, user_category, user_location, target_year, counselling_round)
 
-        ranked_predictions_df = self._predict_top_colleges_rank_only(
-            program=user_program, stream=user_stream, quota=user_quota, category=user_category, district=user_location, target_year=target_year
-        )
-
-        if ranked_predictions_df.empty:
+        if pool['df'].empty:
             return {'status': 'error', 'message': "No historical data found for the specified filters."}
 
         try:
@@ -754,127 +1196,288 @@ class CollegeRecommender:
         except Exception:
             return {'status': 'error', 'message': 'Invalid value for user_rank.'}
 
-        ranked_results_df = ranked_predictions_df[ranked_predictions_df['Predicted Closing Rank'] >= user_rank_val].sort_values(by='Predicted Closing Rank', ascending=True)
+        user_filters = self._user_filters(user_program, user_stream, user_quota, user_category, user_location)
+        return self._recommend_from_pool(pool, self._rank_cut(pool, user_rank_val), user_rank_val, user_filters, min_ctc, min_placements_score, top_n)
 
-        if ranked_results_df.empty:
-            return {'status': 'error', 'message': f"No colleges found with a predicted closing rank ≥ {user_rank_val}. Consider increasing your expected rank (higher number) or broadening filters."}
+    def recommend_many(self, profiles):
+        """
+        Batch version of recommend() for many student profiles.
+        - profiles: list of dicts using recommend()'s keyword names (user_rank, user_program, user_stream, ...)
+        - profiles sharing the same filters (program/stream/quota/category/location/target_year/counselling_round) share one candidate pool;
+          every student's rank threshold is applied to it with one vectorized binary search
+        Returns a list of result dicts in the same order, each identical to what recommend() returns for that profile.
+        """
+        results = [None] * len(profiles)
+        groups = {}
+        for i, profile in enumerate(profiles):
+            profile = profile or {}
+            try:
+                counselling_round = self._normalize_round(profile.get('counselling_round'))
+            except Exception:
+                results[i] = {'status': 'error', 'message': 'Invalid value for counselling_round.'}
+                continue
+            key = tuple(self._user_filters(
+                profile.get('user_program', ''), profile.get('user_stream', ''), profile.get('user_quota', ''),
+                profile.get('user_category', ''), profile.get('user_location', '')
+            ).values()) + (profile.get('target_year', 2026), counselling_round)
+            groups.setdefault(key, []).append(i)
+
+        for key, members in groups.items():
+            first = profiles[members[0]] or {}
+            try:
+                pool = self._candidate_pool(
+                    first.get('user_program', ''), first.get('user_stream', ''), first.get('user_quota', ''),
+                    first.get('user_category', ''), first.get('user_location', ''), first.get('target_year', 2026), key[-1]
+                )
+            except Exception as e:
+                for i in members:
+                    results[i] = {'status': 'error', 'message': str(e)}
+                continue
+            if pool['df'].empty:
+                for i in members:
+                    results[i] = {'status': 'error', 'message': "No historical data found for the specified filters."}
+                continue
 
-        # Merge quality metrics
-        if not getattr(self, 'combined_quality_df', pd.DataFrame()).empty:
-            combined_filter_df = pd.merge(ranked_results_df, self.combined_quality_df, on=['Institute', 'Program'], how='left')
-        else:
-            combined_filter_df = ranked_results_df.copy()
-
-        # ensure filter columns exist
-        score_cols_filter = [
-            'Max Average CTC', 'mess_score', 'professor_score', 'campus_score',
-            'placements_score_filter', 'infrastructure_score', 'overall_aspect_score_filter'
-        ]
-        for col in score_cols_filter:
-            if col not in combined_filter_df.columns:
-                combined_filter_df[col] = 0
-            combined_filter_df[col] = combined_filter_df[col].fillna(0)
-
-        # Apply optional min_ctc/min_placements_score only if user requested (>0)
-        if (min_ctc > 0 or min_placements_score > 0):
-            final_filtered_results = self._filter_top_colleges_by_metrics(combined_filter_df, min_ctc=min_ctc, min_placements_score=min_placements_score)
-        else:
-            final_filtered_results = combined_filter_df
+            rank_vals = np.full(len(members), np.nan)
+            for j, i in enumerate(members):
+                try:
+                    rank_vals[j] = float((profiles[i] or {}).get('user_rank'))
+                except Exception:
+                    results[i] = {'status': 'error', 'message': 'Invalid value for user_rank.'}
 
-        if final_filtered_results.empty:
+            # every student's first eligible row in one searchsorted call
+            cuts = self._rank_cut(pool, rank_vals)
+            user_filters = dict(zip(['program', 'stream', 'quota', 'category', 'district'], key[:5]))
+            for j, i in enumerate(members):
+                if results[i] is not None:
+                    continue
+                profile = profiles[i]
+                try:
+                    results[i] = self._recommend_from_pool(
+                        pool, int(cuts[j]), rank_vals[j], user_filters,
+                        profile.get('min_ctc', 0) or 0, profile.get('min_placements_score', 0) or 0, profile.get('top_n', 10)
+                    )
+                except Exception as e:
+                    results[i] = {'status': 'error', 'message': str(e)}
+        return results
+
+    def _ranked_rows(self, pool, start, min_ctc=0, min_placements_score=0):
+        """
+        Pool row positions of every eligible candidate in presentation order:
+        - default: closest predicted closing ranks first, i.e. the contiguous slice [start, n_ranked)
+        - with min_ctc / min_placements_score (>0): quality order (see _filter_top_colleges_by_metrics)
+        """
+        if min_ctc > 0 or min_placements_score > 0:
+            return self._filter_top_colleges_by_metrics(pool, start, min_ctc=min_ctc, min_placements_score=min_placements_score)
+        return np.arange(start, pool['n_ranked'])
+
+    def _eligible_rows(self, pool, start, user_rank_val, min_ctc=0, min_placements_score=0):
+        """(ranked row positions, None), or (None, error/warning result) when nothing is eligible."""
+        if start >= pool['n_ranked']:
+            return None, {'status': 'error', 'message': f"No colleges found with a predicted closing rank ≥ {user_rank_val}. Consider increasing your expected rank (higher number) or broadening filters."}
+
+        rows = self._ranked_rows(pool, start, min_ctc, min_placements_score)
+        if rows.size == 0:
             # If filtering by CTC/score removed everything, return warning with empty data (you asked to remove "global fallback")
-            return {'status': 'warning', 'message': "Quality filters removed all candidates. Try lowering min CTC/score or broadening other filters.", 'data': []}
+            return None, {'status': 'warning', 'message': "Quality filters removed all candidates. Try lowering min CTC/score or broadening other filters.", 'data': []}
+        return rows, None
 
-        # Prepare final merged table
-        final_table_candidates = self._finalize_table(final_filtered_results)
+    def _recommend_from_pool(self, pool, start, user_rank_val, user_filters, min_ctc=0, min_placements_score=0, top_n=10):
+        """
+        Per-student part of recommend(): eligible rows are the slice [start, n_ranked) of the presorted pool;
+        the first top_n of them (after the optional quality filters) are enriched and re-ordered.
+        """
+        with self.timings.stage('eligibility'):
+            rows, failure = self._eligible_rows(pool, start, user_rank_val, min_ctc, min_placements_score)
+        if failure is not None:
+            return failure
 
-        # Build user filter items to match rules
-        user_filters = {
-            'program': self._clean_user_input(user_program),
-            'stream': self._clean_user_input(user_stream),
-            'quota': self._clean_user_input(user_quota),
-            'category': self._clean_user_input(user_category),
-            'district': self._clean_user_input(user_location)
-        }
+        return {'status': 'success', 'message': 'Top college recommendations based on rank, quality and association-rule boosting:',
+                'data': self._enrich_page(pool, rows[:max(0, int(top_n))], user_rank_val, user_filters)}
 
-        # compute rule-based boosts
-        # Note: final_table_candidates has Institute & Program columns in their cleaned (lowercase) form; ensure keys
-        # Build a candidates DataFrame for the boosting function with cleaned textual columns
-        cand_df_for_boost = final_table_candidates.copy()
-        for col in ['Program', 'Stream', 'Quota', 'Category', 'District', 'Institute']:
-            if col in cand_df_for_boost.columns:
-                cand_df_for_boost[col] = cand_df_for_boost[col].astype(str).str.strip().str.lower().replace('nan', '').fillna('')
-            else:
-                cand_df_for_boost[col] = ''
-        # compute boosts (map keyed by (Institute, Program))
-        boosts = self._compute_boosts_from_rules(cand_df_for_boost, user_filters)
+    def _enrich_page(self, pool, page_rows, user_rank_val, user_filters):
+        """
+        Enrichment of one page of pool rows: details merge, association-rule boosts and ML re-ordering
+        within the page. Returns the page as a list of records.
+        """
+        final_filtered_results = pool['df'].iloc[page_rows]
+        if final_filtered_results.empty:
+            return []
 
-        # attach boost column and sort: higher boost first, then by Closing Rank ascending (better rank)
-        def cand_key(row):
-            return (row.get('Institute', ''), row.get('Program', ''))
+        # Prepare final table: candidate columns + their precomputed enrichment rows
+        with self.timings.stage('finalize_table'):
+            final_table_candidates = self._finalize_table(final_filtered_results, pool['enrich_rows'][page_rows])
 
-        final_table_candidates['_boost'] = final_table_candidates.apply(lambda r: boosts.get(cand_key(r), 0.0), axis=1)
+        # compute rule-based boosts, one per candidate row, then sort: higher boost first, then by Closing Rank ascending (better rank)
+        with self.timings.stage('rule_boost'):
+            final_table_candidates['_boost'] = self._compute_boosts_from_rules(final_table_candidates, user_filters)
 
         # -------------------------
-        # New ML evaluation/training step
+        # ML re-ranking with the cached admission model (trained once per data version)
         # -------------------------
-        # Use the provided user_rank_val as the threshold for evaluation/training
-        chosen_model, dt_model, label_encoders = self._evaluate_and_train_ml(user_rank_val)
+        bundle = self.model_registry.get() if getattr(self, 'model_registry', None) is not None else None
+        chosen_model = bundle.get('chosen', 'heuristic') if bundle else 'heuristic'
+        dt_model = bundle.get('model') if bundle else None
 
         # If decision_tree chosen and model available, compute model probability per candidate and use as additional sort key
         if chosen_model == 'decision_tree' and dt_model is not None and SKLEARN_AVAILABLE:
-            # Build features same as training
-            def encode_feature_value(col, val):
-                le = label_encoders.get(col)
-                try:
-                    if le is None:
-                        return 0
-                    return int(le.transform([str(val).strip().lower()])[0])
-                except Exception:
-                    # unseen label -> attempt to add via fit? we cannot change encoder; fallback to -1 or 0
-                    return 0
-
-            ml_probs = []
-            for _, row in final_table_candidates.iterrows():
-                inst = str(row.get('Institute', '')).strip().lower()
-                prog = str(row.get('Program', '')).strip().lower()
-                strm = str(row.get('Stream', '')).strip().lower()
-                qta = str(row.get('Quota', '')).strip().lower()
-                cat = str(row.get('Category', '')).strip().lower()
-                pred_rank = float(row.get('Closing Rank', 0) if pd.notna(row.get('Closing Rank', None)) else 0)
-
-                feat_inst = encode_feature_value('Institute', inst)
-                feat_prog = encode_feature_value('Program', prog)
-                feat_strm = encode_feature_value('Stream', strm)
-                feat_qta = encode_feature_value('Quota', qta)
-                feat_cat = encode_feature_value('Category', cat)
-
-                X_row = pd.DataFrame([{
-                    'Institute': feat_inst, 'Program': feat_prog, 'Stream': feat_strm, 'Quota': feat_qta, 'Category': feat_cat,
-                    'predicted_closing_rank': pred_rank
-                }])
+            # Build features same as training: one code matrix for all candidates, one predict_proba call
+            with self.timings.stage('ml_scoring'):
+                X_cand = self._ml_feature_frame(
+                    self._encode_ml_features(final_table_candidates, self._ml_code_maps(bundle)),
+                    final_table_candidates['Closing Rank'].fillna(0).to_numpy(dtype=float),
+                    np.full(len(final_table_candidates), user_rank_val, dtype=float)
+                )
                 try:
-                    prob = float(dt_model.predict_proba(X_row)[:, 1][0])
+                    ml_probs = dt_model.predict_proba(X_cand)[:, 1]
                 except Exception:
                     try:
-                        prob = float(dt_model.predict(X_row)[0])
+                        ml_probs = dt_model.predict(X_cand).astype(float)
                     except Exception:
-                        prob = 0.0
-                ml_probs.append(prob)
+                        ml_probs = np.zeros(len(final_table_candidates))
 
             final_table_candidates['_ml_prob'] = ml_probs
-            # sort by boost desc, ml_prob desc, then Closing Rank asc
-            final_table_candidates = final_table_candidates.sort_values(by=['_boost', '_ml_prob', 'Closing Rank'], ascending=[False, False, True])
-            # remove helper ml column after sorting if you wish to keep output clean; but user asked to "use" model, not to remove, so leave it out of returned records
-            final_table_candidates = final_table_candidates.drop(columns=['_ml_prob'])
+            sort_by, ascending = ['_boost', '_ml_prob', 'Closing Rank'], [False, False, True]  # boost desc, ml_prob desc, then Closing Rank asc
         else:
             # Heuristic chosen (or sklearn not available). keep existing sorting: by _boost then Closing Rank asc
-            final_table_candidates = final_table_candidates.sort_values(by=['_boost', 'Closing Rank'], ascending=[False, True])
+            sort_by, ascending = ['_boost', 'Closing Rank'], [False, True]
 
-        # drop helper column after sorting
-        final_table_candidates = final_table_candidates.drop(columns=['_boost'])
+        with self.timings.stage('sort_and_serialize'):
+            final_table_candidates = final_table_candidates.sort_values(by=sort_by, ascending=ascending)
+            # drop helper columns after sorting
+            final_table_candidates = final_table_candidates.drop(columns=[c for c in ['_boost', '_ml_prob'] if c in final_table_candidates.columns])
+            return final_table_candidates.to_dict('records')
 
-        # Return top 10 (already limited in _finalize_table but ensure)
-        result_list = final_table_candidates.head(10).to_dict('records')
+    # -------------------------
+    # Cursor pagination
+    # -------------------------
+    def recommend_page(self, cursor=None, page_size=10, **kwargs):
+        """
+        Paginated recommend().
+        - first call: recommend() keyword arguments (+ page_size); the full ranked candidate list is kept
+          server-side (cursor_cache, short TTL) and the first page is returned
+        - next calls: only `cursor` (the next_cursor of the previous page); the page is a slice of the stored
+          list, enriched on its own — nothing upstream is recomputed
+        Returns recommend()'s dict plus next_cursor (None on the last page) and total (eligible candidates).
+        Page 1 with page_size=n equals recommend(top_n=n).
+        """
+        page_size = max(1, int(page_size or 10))
+        if cursor:
+            try:
+                token, offset = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(':')
+                offset = int(offset)
+            except Exception:
+                return {'status': 'error', 'message': 'Invalid cursor.'}
+            state = self.cursor_cache.get(token, version=getattr(self, 'data_version', None))
+            if state is None:
+                return {'status': 'error', 'message': 'Cursor expired. Start again without a cursor.'}
+        else:
+            kwargs.pop('top_n', None)
+            first = self._ranked_state(**kwargs)
+            if 'rows' not in first:
+                return first
+            token, offset, state = secrets.token_urlsafe(12), 0, first
+            self.cursor_cache.put(token, state, version=getattr(self, 'data_version', None))
+
+        rows = state['rows']
+        end = min(offset + page_size, rows.size)
+        data = self._enrich_page(state['pool'], rows[offset:end], state['user_rank_val'], state['user_filters']) if offset < rows.size else []
+        next_cursor = base64.urlsafe_b64encode(f"{token}:{end}".encode('ascii')).decode('ascii') if end < rows.size else None
+        return {'status': 'success', 'message': 'Top college recommendations based on rank, quality and association-rule boosting:',
+                'data': data, 'next_cursor': next_cursor, 'total': int(rows.size)}
+
+    def _ranked_state(self, user_rank, user_program, user_stream='', user_quota='', user_category='', user_location='', min_ctc=0, min_placements_score=0, target_year=2026,
+                      counselling_round=None):
+        """Ranked candidate list behind a cursor, or recommend()'s error/warning dict."""
+        try:
+            counselling_round = self._normalize_round(counselling_round)
+        except Exception:
+            return {'status': 'error', 'message': 'Invalid value for counselling_round.'}
+        pool = self._candidate_pool(user_program, user_stream, user_quota, user_category, user_location, target_year, counselling_round)
+        if pool['df'].empty:
+            return {'status': 'error', 'message': "No historical data found for the specified filters."}
+        try:
+            user_rank_val = float(user_rank)
+        except Exception:
+            return {'status': 'error', 'message': 'Invalid value for user_rank.'}
+        rows, failure = self._eligible_rows(pool, self._rank_cut(pool, user_rank_val), user_rank_val, min_ctc, min_placements_score)
+        if failure is not None:
+            return failure
+        return {
+            'pool': pool, 'rows': rows, 'user_rank_val': user_rank_val,
+            'user_filters': self._user_filters(user_program, user_stream, user_quota, user_category, user_location)
+        }
 
-        return {'status': 'success', 'message': 'Top college recommendations based on rank, quality and association-rule boosting:', 'data': result_list}
+    # -------------------------
+    # Rank sweep (admission curve)
+    # -------------------------
+    def _eligibility_intervals(self, pool, min_ctc=0, min_placements_score=0):
+        """
+        (rows, eligible_to): pool row i is recommended exactly for the user ranks <= eligible_to[i],
+        its Predicted Closing Rank (the rank cut keeps rows with Predicted Closing Rank >= rank).
+        Rows dropped by the min_ctc / min_placements_score filters are left out.
+        """
+        ranks = pool['ranks'][:pool['n_ranked']]
+        keep = np.ones(ranks.size, dtype=bool)
+        if min_ctc > 0:
+            keep &= pool['ctc'][:ranks.size] >= min_ctc
+        if min_placements_score > 0:
+            keep &= pool['placements_score'][:ranks.size] >= min_placements_score
+        rows = np.flatnonzero(keep)
+        return rows, ranks[rows]
+
+    def rank_sweep(self, rank_from, rank_to, user_program, user_stream='', user_quota='', user_category='', user_location='',
+                   min_ctc=0, min_placements_score=0, target_year=2026, buckets=10, limit=200, counselling_round=None):
+        """
+        How the eligible set changes over a range of user ranks, from one candidate pool. A candidate is
+        eligible for a rank when it passes recommend()'s rank cut and min_ctc / min_placements_score filters,
+        i.e. it is in the full list recommend() ranks for that rank, before the ML / association-rule
+        ordering and the top_n cut (so this is not the top-n list the form shows):
+        - candidates: the candidates eligible for some rank in the range (at most `limit`, in Predicted
+          Closing Rank order), each with eligible_to (the worst rank it is eligible for; every better rank
+          is too); total: how many there are
+        - buckets: `buckets` equal rank intervals [rank_from, rank_to) with the number of candidates eligible at
+          each end and the number leaving the eligible set inside it
+        - counselling_round: as in recommend()
+        Errors carry 'error': 'invalid_input' (bad rank / round values) or 'no_data' next to the message.
+        """
+        try:
+            counselling_round = self._normalize_round(counselling_round)
+        except Exception:
+            return {'status': 'error', 'error': 'invalid_input', 'message': 'Invalid value for counselling_round.'}
+        pool = self._candidate_pool(user_program, user_stream, user_quota, user_category, user_location, target_year, counselling_round)
+        if pool['df'].empty:
+            return {'status': 'error', 'error': 'no_data', 'message': "No historical data found for the specified filters."}
+        try:
+            low, high = sorted((float(rank_from), float(rank_to)))
+        except Exception:
+            return {'status': 'error', 'error': 'invalid_input', 'message': 'Invalid value for rank_from / rank_to.'}
+        buckets = max(1, int(buckets))
+
+        with self.timings.stage('sweep'):
+            rows, eligible_to = self._eligibility_intervals(pool, min_ctc, min_placements_score)
+            ends = np.sort(eligible_to)  # already sorted (pool order); cheap either way
+
+            edges = np.linspace(low, high, buckets + 1)
+            counts = ends.size - np.searchsorted(ends, edges, side='left')  # eligible at rank: eligible_to >= rank
+            leaving = np.diff(np.searchsorted(ends, edges, side='left'))
+
+            in_range = eligible_to >= low
+            rows, eligible_to = rows[in_range], eligible_to[in_range]
+            total = int(rows.size)
+            shown = slice(0, max(0, int(limit)))
+            table = self._candidate_table(pool['df'].iloc[rows[shown]])
+            table['District'] = self.enrichment_df['District'].to_numpy()[pool['enrich_rows'][rows[shown]]]
+            table['eligible_to'] = eligible_to[shown]
+
+        return {
+            'status': 'success',
+            'message': f"Recommendations for ranks {low:g} to {high:g}.",
+            'rank_from': low, 'rank_to': high, 'total': total,
+            'candidates': table.to_dict('records'),
+            'buckets': [
+                {'rank_from': float(edges[k]), 'rank_to': float(edges[k + 1]), 'eligible_at_start': int(counts[k]),
+                 'eligible_at_end': int(counts[k + 1]), 'leaving': int(leaving[k])}
+                for k in range(buckets)
+            ],
+        }
@@ -0,0 +1,84 @@
+# backend/result_cache.py
+"""
+Small thread-safe LRU cache with TTL and data-version stamping.
+
+Every entry remembers the data version it was computed from. A lookup made with a
+different version is a miss and drops the entry, so a new CSV snapshot invalidates
+everything cached from the old one without an explicit flush.
+
+Counters (hits, misses, evictions, expirations, invalidations) are returned by stats().
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, maxsize=256, ttl=600, clock=time.monotonic):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl  # seconds; None or 0 disables expiry
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (version, stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, version=None, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            entry_version, stored_at, value = entry
+            if entry_version != version:
+                del self._data[key]
+                self.invalidations += 1
+                self.misses += 1
+                return default
+            if self.ttl and self._clock() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (version, self._clock(), value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def keys(self):
+        """Keys from least to most recently used (no counters touched)."""
+        with self._lock:
+            return list(self._data.keys())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
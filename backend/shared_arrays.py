@@ -0,0 +1,106 @@
+# backend/shared_arrays.py
+"""
+Read-only NumPy arrays shared by every worker process through memory-mapped .npy files.
+
+    arrays = share_arrays('doc_vectors', key, {'data': m.data, 'indices': m.indices, ...}, root)
+
+ - the first process to publish a (name, key) pair writes results/shared/<name>-<key16>/<array>.npy
+   (to a temporary directory first, then one rename, so readers never see partial files)
+ - every process then maps those files with np.load(mmap_mode='r'): N workers share one
+   physical copy in the OS page cache instead of N private heap copies
+ - key must identify the content (a data fingerprint or content_key(arrays)); publishing a new
+   key for the same name removes the older directories (processes that still map them keep
+   their pages until they drop the arrays)
+
+memory_status() reports this process's resident memory from /proc/self/status; file-backed
+pages (RssFile) are the shared part, anonymous pages (RssAnon) are private to the worker.
+"""
+import os
+import shutil
+import hashlib
+import threading
+import numpy as np
+
+SHARED_DIRNAME = 'shared'
+STATUS_FIELDS = ('VmRSS', 'VmHWM', 'RssAnon', 'RssFile', 'RssShmem')
+
+_lock = threading.Lock()
+_mapped = {}  # directory -> {array name: memmap}
+
+
+def shared_dir_for(project_root):
+    return os.path.join(os.path.abspath(project_root), 'results', SHARED_DIRNAME)
+
+
+def content_key(arrays):
+    """SHA256 over the names, dtypes, shapes and bytes of `arrays` (for content-derived keys)."""
+    h = hashlib.sha256()
+    for array_name in sorted(arrays):
+        values = np.ascontiguousarray(arrays[array_name])
+        h.update(f"{array_name}:{values.dtype.str}:{values.shape};".encode('utf-8'))
+        h.update(values.tobytes())
+    return h.hexdigest()
+
+
+def load_arrays(directory):
+    """{array name: read-only memmap} for every .npy file in directory (mapped once per process)."""
+    with _lock:
+        hit = _mapped.get(directory)
+        if hit is not None:
+            return hit
+        arrays = {
+            fname[:-4]: np.load(os.path.join(directory, fname), mmap_mode='r')
+            for fname in sorted(os.listdir(directory)) if fname.endswith('.npy')
+        }
+        _mapped[directory] = arrays
+        return arrays
+
+
+def share_arrays(name, key, arrays, project_root):
+    """
+    Publish `arrays` (dict name -> ndarray; may be None when only mapping an existing copy)
+    under (name, key) and return them memory-mapped. Returns None when nothing is published
+    yet and no arrays were given.
+    """
+    base = shared_dir_for(project_root)
+    directory = os.path.join(base, f"{name}-{str(key)[:16]}")
+    if not os.path.isdir(directory):
+        if arrays is None:
+            return None
+        os.makedirs(base, exist_ok=True)
+        tmp_dir = directory + f".tmp{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        for array_name, values in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{array_name}.npy"), np.ascontiguousarray(values))
+        try:
+            os.rename(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)  # another worker published the same content first
+        for other in os.listdir(base):
+            other_dir = os.path.join(base, other)
+            if other.startswith(f"{name}-") and '.tmp' not in other and other_dir != directory:
+                shutil.rmtree(other_dir, ignore_errors=True)
+                with _lock:
+                    _mapped.pop(other_dir, None)
+    return load_arrays(directory)
+
+
+def mapped_bytes():
+    """Total size of the arrays this process has mapped."""
+    with _lock:
+        return int(sum(a.nbytes for arrays in _mapped.values() for a in arrays.values()))
+
+
+def memory_status():
+    """This process's memory figures in kB (VmRSS, VmHWM, RssAnon, RssFile, RssShmem) plus pid and mapped array bytes."""
+    out = {'pid': os.getpid()}
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                field, _, value = line.partition(':')
+                if field in STATUS_FIELDS:
+                    out[field + '_kb'] = int(value.split()[0])
+    except OSError:
+        pass  # not Linux: only the mapped figure is available
+    out['shared_mapped_bytes'] = mapped_bytes()
+    return out
@@ -0,0 +1,239 @@
+# backend/snapshot.py
+"""
+Binary snapshots of the CSV data files ("compile data" step).
+
+Every CSV under csv/ can be compiled into results/snapshot/<table>-<hash>/:
+ - every column is dictionary-encoded: <i>.codes.npy (int32 codes, -1 = missing)
+   plus the distinct strings as one NUL-separated UTF-8 blob (<i>.dict.bin)
+ - columns that pandas infers as numeric/bool also get their typed values (<i>.values.npy)
+results/snapshot/manifest.json records, per table, the SHA256 of the source CSV, the
+column names and the inferred dtypes. compile_data() also resolves institute names to ids
+(entities.py -> results/snapshot/entities.json).
+
+load_table(csv_path) returns the same DataFrame as pd.read_csv(csv_path, dtype=object)
+(typed=True: the same as pd.read_csv(csv_path)) from the snapshot when the CSV content
+hash still matches the manifest, and falls back to parsing the CSV otherwise
+(re-compiling that table on the way when write=True).
+
+The .npy files are memory-mapped (np.load(mmap_mode='r')): the typed numeric columns kept in
+the per-process memo are file-backed pages, shared by every worker that loads the same snapshot.
+
+Compile everything up front with:  python backend/snapshot.py [project_root]
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_FORMAT = 2
+MANIFEST_FILENAME = 'manifest.json'
+DICT_SEPARATOR = '\x00'
+
+_lock = threading.Lock()
+_memo = {}  # table name -> (table dir, decoded columns: name -> (object values, typed values or None))
+
+
+# -------------------------
+# Paths / hashing
+# -------------------------
+def snapshot_dir_for(csv_path):
+    """project-root/csv/x.csv -> project-root/results/snapshot"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(csv_path)))
+    return os.path.join(project_root, 'results', 'snapshot')
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_manifest(snapshot_dir):
+    path = os.path.join(snapshot_dir, MANIFEST_FILENAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') == SNAPSHOT_FORMAT:
+            return manifest
+    except Exception:
+        pass
+    return {'format': SNAPSHOT_FORMAT, 'tables': {}}
+
+
+def _write_manifest(snapshot_dir, manifest):
+    path = os.path.join(snapshot_dir, MANIFEST_FILENAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)  # atomic, readers never see a half-written manifest
+
+
+# -------------------------
+# Column encoding
+# -------------------------
+def _encode_strings(values):
+    """object array (str or NaN) -> (int32 codes, utf-8 blob of the distinct strings separated by NUL)"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    uniques = [str(u) for u in uniques]
+    if any(DICT_SEPARATOR in u for u in uniques):
+        raise ValueError("value contains the dictionary separator")
+    return codes.astype(np.int32), DICT_SEPARATOR.join(uniques).encode('utf-8'), len(uniques)
+
+
+def _decode_strings(codes, blob, size):
+    uniques = np.empty(size + 1, dtype=object)
+    if size:
+        uniques[:size] = blob.decode('utf-8').split(DICT_SEPARATOR)  # one C-level split, no per-value loop
+    uniques[-1] = np.nan  # code -1 (missing) indexes the last slot
+    return uniques[codes]
+
+
+# -------------------------
+# Compile
+# -------------------------
+def compile_table(csv_path, snapshot_dir=None, sha=None):
+    """
+    Write the snapshot of one CSV and register it in the manifest.
+    Returns (object-view DataFrame, typed-view DataFrame) parsed from the CSV.
+    """
+    snapshot_dir = snapshot_dir or snapshot_dir_for(csv_path)
+    sha = sha or file_sha256(csv_path)
+    raw = pd.read_csv(csv_path, dtype='object')
+    typed = pd.read_csv(csv_path)
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    table_dir_name = f"{name}-{sha[:16]}"
+    table_dir = os.path.join(snapshot_dir, table_dir_name)
+
+    encoded = [_encode_strings(raw[col].to_numpy(dtype=object)) for col in raw.columns]
+    if not os.path.isdir(table_dir):
+        tmp_dir = table_dir + f".tmp{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        for i, col in enumerate(raw.columns):
+            codes, blob, _ = encoded[i]
+            np.save(os.path.join(tmp_dir, f"{i}.codes.npy"), codes)
+            with open(os.path.join(tmp_dir, f"{i}.dict.bin"), 'wb') as f:
+                f.write(blob)
+            if typed[col].dtype.kind in 'biuf':
+                np.save(os.path.join(tmp_dir, f"{i}.values.npy"), typed[col].to_numpy())
+        try:
+            os.rename(tmp_dir, table_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)  # another writer got there first; same content
+    columns = [
+        {'name': str(col), 'dtype': str(typed[col].dtype), 'numeric': typed[col].dtype.kind in 'biuf', 'dict_size': int(encoded[i][2])}
+        for i, col in enumerate(raw.columns)
+    ]
+
+    with _lock:
+        manifest = read_manifest(snapshot_dir)
+        old = manifest['tables'].get(name)
+        manifest['tables'][name] = {
+            'source': os.path.basename(csv_path),
+            'sha256': sha,
+            'dir': table_dir_name,
+            'rows': int(len(raw)),
+            'columns': columns,
+        }
+        _write_manifest(snapshot_dir, manifest)
+        if old and old.get('dir') != table_dir_name:
+            shutil.rmtree(os.path.join(snapshot_dir, old['dir']), ignore_errors=True)
+    return raw, typed
+
+
+def compile_data(project_root='.', files=None):
+    """Compile every CSV under project_root/csv (or just `files`). Returns the manifest."""
+    csv_dir = os.path.join(project_root, 'csv')
+    if files is None:
+        files = sorted(f for f in os.listdir(csv_dir) if f.endswith('.csv')) if os.path.isdir(csv_dir) else []
+    snapshot_dir = os.path.join(project_root, 'results', 'snapshot')
+    os.makedirs(snapshot_dir, exist_ok=True)
+    for fname in files:
+        path = os.path.join(csv_dir, fname)
+        if not os.path.exists(path):
+            continue
+        try:
+            compile_table(path, snapshot_dir)
+            print("Snapshot: compiled", fname)
+        except Exception as e:
+            print(f"Snapshot: failed to compile {fname}: {e}")
+    try:
+        from entities import compile_entities
+        print("Snapshot: resolved", len(compile_entities(project_root)), "institutes")
+    except Exception as e:
+        print("Snapshot: entity resolution failed:", e)
+    return read_manifest(snapshot_dir)
+
+
+# -------------------------
+# Load
+# -------------------------
+def _load_columns(name, table_dir, entry):
+    cached = _memo.get(name)
+    if cached is not None and cached[0] == table_dir:
+        return cached[1]
+    out = {}
+    for i, meta in enumerate(entry['columns']):
+        codes = np.load(os.path.join(table_dir, f"{i}.codes.npy"), mmap_mode='r')
+        with open(os.path.join(table_dir, f"{i}.dict.bin"), 'rb') as f:
+            blob = f.read()
+        values = np.load(os.path.join(table_dir, f"{i}.values.npy"), mmap_mode='r') if meta['numeric'] else None
+        out[meta['name']] = (_decode_strings(codes, blob, meta['dict_size']), values)
+    _memo[name] = (table_dir, out)
+    return out
+
+
+def _frame_from_columns(entry, columns, typed):
+    data = {}
+    for meta in entry['columns']:
+        obj_values, values = columns[meta['name']]
+        if typed and values is not None:
+            data[meta['name']] = pd.Series(values, dtype=meta['dtype'])
+        elif typed:
+            data[meta['name']] = pd.Series(obj_values, dtype=object).astype(meta['dtype'])
+        else:
+            data[meta['name']] = pd.Series(obj_values, dtype=object)
+    return pd.DataFrame(data, columns=[m['name'] for m in entry['columns']])
+
+
+def load_table(csv_path, typed=False, write=True):
+    """
+    DataFrame for csv_path from its snapshot when fresh, else parsed from the CSV.
+    - typed=False: same as pd.read_csv(csv_path, dtype=object)
+    - typed=True:  same as pd.read_csv(csv_path)
+    - write=True: a missing/stale snapshot is (re)compiled from the CSV that was just parsed
+    Raises FileNotFoundError like pd.read_csv when the CSV does not exist.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(csv_path)
+    snapshot_dir = snapshot_dir_for(csv_path)
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    try:
+        sha = file_sha256(csv_path)
+        entry = read_manifest(snapshot_dir)['tables'].get(name)
+        if entry and entry.get('sha256') == sha:
+            table_dir = os.path.join(snapshot_dir, entry['dir'])
+            return _frame_from_columns(entry, _load_columns(name, table_dir, entry), typed)
+    except Exception as e:
+        print(f"Snapshot: unusable snapshot for {name}, reading CSV: {e}")
+        sha = None
+
+    if write:
+        try:
+            os.makedirs(snapshot_dir, exist_ok=True)
+            raw, typed_df = compile_table(csv_path, snapshot_dir, sha=sha)
+            return typed_df if typed else raw
+        except Exception as e:
+            print(f"Snapshot: failed to compile {name}: {e}")
+    return pd.read_csv(csv_path) if typed else pd.read_csv(csv_path, dtype='object')
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    m = compile_data(root)
+    print(json.dumps({k: {'rows': v['rows'], 'sha256': v['sha256'][:12]} for k, v in m['tables'].items()}, indent=2))
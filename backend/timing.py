@@ -0,0 +1,114 @@
+# backend/timing.py
+"""
+Lightweight per-stage timing for the recommendation hot path.
+
+    timings = StageTimings(enabled=True)
+    with timings.stage('finalize_table'):
+        ...
+
+ - enabled: every stage duration is added to a per-stage histogram (snapshot() for reporting)
+ - collect(): context manager that also records the stages of the current request / call
+   into a dict (stage -> milliseconds), even when the aggregate histograms are disabled;
+   used for the optional debug_timings block of /recommend_colleges
+ - disabled and not collecting: stage() returns a shared no-op context manager, so the cost
+   is one attribute check and one context-variable lookup per stage
+"""
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# histogram bucket upper bounds, milliseconds (the last bucket is open-ended)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_current = contextvars.ContextVar('recommender_stage_record', default=None)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('owner', 'name', 'record', 'started')
+
+    def __init__(self, owner, name, record):
+        self.owner = owner
+        self.name = name
+        self.record = record
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        if self.record is not None:
+            ms = elapsed * 1000.0
+            self.record[self.name] = round(self.record.get(self.name, 0.0) + ms, 3)
+        if self.owner.enabled:
+            self.owner.observe(self.name, elapsed)
+        return False
+
+
+class StageTimings:
+    def __init__(self, enabled=False):
+        self.enabled = bool(enabled)
+        self._lock = threading.Lock()
+        self._stats = {}  # stage -> [count, total_seconds, max_seconds, bucket counts]
+
+    def stage(self, name):
+        record = _current.get()
+        if not self.enabled and record is None:
+            return _NULL_STAGE
+        return _Stage(self, name, record)
+
+    def observe(self, name, seconds):
+        ms = seconds * 1000.0
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = [0, 0.0, 0.0, [0] * (len(BUCKETS_MS) + 1)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3][bisect_left(BUCKETS_MS, ms)] += 1
+
+    def snapshot(self):
+        """{stage: {count, total_ms, mean_ms, max_ms, histogram: {'<=0.1': n, ..., '>2500': n}}}"""
+        labels = [f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+        with self._lock:
+            return {
+                name: {
+                    'count': count,
+                    'total_ms': round(total * 1000.0, 3),
+                    'mean_ms': round(total * 1000.0 / count, 3) if count else 0.0,
+                    'max_ms': round(peak * 1000.0, 3),
+                    'histogram': dict(zip(labels, buckets)),
+                }
+                for name, (count, total, peak, buckets) in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+@contextmanager
+def collect():
+    """Record the stages run inside the block: `with collect() as stages: ...` -> {stage: ms}."""
+    record = {}
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
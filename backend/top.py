@@ -15,6 +15,9 @@ import os
 import json
 from flask import Flask, jsonify, render_template, send_from_directory
 import pandas as pd
+from snapshot import load_table
+from images import picture_url
+from entities import load_entities, UNKNOWN_ID
 
 # Update these paths if your CSVs are stored elsewhere relative to this file.
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -31,12 +34,12 @@ def load_top10():
     # Read CSVs
     # Use try/except to provide reasonable fallback if files missing
     try:
-        placement = pd.read_csv(PLACEMENT_CSV)
+        placement = load_table(PLACEMENT_CSV, typed=True)
     except Exception as e:
         raise RuntimeError(f"Failed to read placement CSV at {PLACEMENT_CSV}: {e}")
 
     try:
-        college = pd.read_csv(COLLEGE_CSV)
+        college = load_table(COLLEGE_CSV, typed=True)
     except Exception as e:
         raise RuntimeError(f"Failed to read college CSV at {COLLEGE_CSV}: {e}")
 
@@ -56,10 +59,14 @@ def load_top10():
     # Convert inst_rank to numeric for sorting. Coerce errors to NaN and drop them.
     placement['inst_rank'] = pd.to_numeric(placement['inst_rank'], errors='coerce')
 
-    # Join using 'Institute' column if present; else try inst_key.
+    # Join on the institute_id of the 'Institute' column if present (entities.py: same institute
+    # whatever the spelling in each file); else try inst_key.
     join_col = None
     if 'Institute' in placement.columns and 'Institute' in college.columns:
-        join_col = 'Institute'
+        resolver = load_entities(BASE_DIR)
+        placement['institute_id'] = resolver.ids(placement['Institute'])
+        college['institute_id'] = resolver.ids(college['Institute'])
+        join_col = 'institute_id'
     elif 'inst_key' in placement.columns and 'inst_key' in college.columns:
         join_col = 'inst_key'
     else:
@@ -71,15 +78,32 @@ def load_top10():
             raise RuntimeError("Could not find a common join column between placement.csv and college.csv")
 
     # Merge dataframes
-    merged = pd.merge(placement, college, on=join_col, how='left', suffixes=('', '_c'))
+    if join_col == 'institute_id':
+        # unmatched names (UNKNOWN_ID on either side) are not one institute: join those on the name instead
+        known = placement['institute_id'] != UNKNOWN_ID
+        college_known = college[college['institute_id'] != UNKNOWN_ID].drop_duplicates(subset=['institute_id'])
+        by_name = college.drop(columns=['institute_id'])
+        by_name['Institute'] = by_name['Institute'].astype(str).str.strip()
+        unmatched = placement[~known].copy()
+        unmatched['Institute'] = unmatched['Institute'].astype(str).str.strip()
+        merged = pd.concat([
+            pd.merge(placement[known], college_known, on='institute_id', how='left', suffixes=('', '_c')),
+            pd.merge(unmatched, by_name.drop_duplicates(subset=['Institute']), on='Institute', how='left', suffixes=('', '_c')),
+        ], ignore_index=True)
+    else:
+        merged = pd.merge(placement, college, on=join_col, how='left', suffixes=('', '_c'))
 
     # Pick rows with numeric inst_rank and sort ascending (rank 1 is top)
     merged = merged[merged['inst_rank'].notna()]
     merged = merged.sort_values(by='inst_rank', ascending=True)
 
     # Take top 10 unique institutes (in case duplicates across years exist)
-    # Keep the first occurrence per institute name
-    if 'Institute' in merged.columns:
+    # Keep the first occurrence per institute
+    if 'institute_id' in merged.columns:
+        # unmatched institutes are told apart by their name
+        names = merged['Institute'].astype(str).str.strip().str.lower()
+        merged = merged[~merged['institute_id'].astype(object).where(merged['institute_id'] != UNKNOWN_ID, names).duplicated()]
+    elif 'Institute' in merged.columns:
         merged = merged.drop_duplicates(subset=['Institute'])
     top = merged.head(10).copy()
 
@@ -117,7 +141,7 @@ def load_top10():
             'rank': int(row['inst_rank']) if pd.notna(row['inst_rank']) else None,
             'Institute': inst_name,
             'Website': website_val,
-            'Picture': picture_val,
+            'Picture': picture_url(picture_val),  # data URIs are served from /images/
             'District': row.get('District', '') if 'District' in row else '',
         }
         out.append(item)
@@ -0,0 +1,248 @@
+# backend/worker_pool.py
+"""
+Warm process pool for the CPU-bound recommender calls.
+
+recommend() runs pandas / scikit-learn code that holds the GIL; on the request thread one slow
+call stalls /explore/api/* and /top/data on the same server. RecommenderPool runs those calls in
+worker processes instead:
+ - workers are started eagerly when the pool is created, and the pool is only ready once every
+   worker has answered (a barrier keeps one worker from answering for the others). With the
+   'fork' start method (default where available) they inherit the recommender the server already
+   built, so no worker loads data on the request path; with 'spawn' each worker builds its own
+   recommender at startup (from the binary snapshots, the saved model and the memory-mapped arrays)
+ - workers never load data on a call: after a hot reload app.py calls replace(new recommender)
+   from data_manager's swap hook (off the request path), which starts a new set of workers on
+   the new recommender and retires the old ones once their calls have finished
+ - at most max_pending calls are queued or running; further calls raise PoolSaturated at once
+   (app.py answers 503 with a Retry-After estimated from the recent call durations)
+ - a caller waits at most `timeout` seconds (PoolTimeout; app.py answers 504). A queued call is
+   cancelled; a running one finishes in its worker and keeps its slot until then
+ - a worker that dies breaks the executor; the next call starts a new one on the current
+   recommender (forked workers inherit it, so nothing is reloaded)
+
+Create the pool before any other thread starts (fork copies only the calling thread). replace()
+forks from the data manager's watcher thread; the workers only ever run recommender code.
+"""
+import os
+import math
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from timing import collect as collect_timings
+
+_worker = {'recommender': None, 'root': None, 'barrier': None}  # per worker process (inherited on fork)
+STARTUP_TIMEOUT = 600.0  # seconds the workers may take to start and load their data
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when max_pending calls are already queued or running; retry_after is in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Recommender pool is saturated, retry in {retry_after} s.")
+        self.retry_after = retry_after
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when a call did not finish within the pool timeout."""
+
+
+# -------------------------
+# Worker side
+# -------------------------
+def _load_recommender():
+    from recommendation import CollegeRecommender
+    _worker['recommender'] = CollegeRecommender(data_root_dir=_worker['root'])
+    return _worker['recommender']
+
+
+def _init_worker(project_root, barrier):
+    _worker['root'] = project_root
+    _worker['barrier'] = barrier
+    if _worker['recommender'] is None:  # spawn: nothing inherited, load the data now
+        _load_recommender()
+
+
+def _worker_ready():
+    # every worker holds one ready call until all have one, so each call is answered by a different process
+    _worker['barrier'].wait(STARTUP_TIMEOUT)
+    rec = _worker['recommender']
+    return os.getpid(), getattr(rec, 'data_version', None)
+
+
+def _worker_call(method, kwargs, collect_stages=False):
+    """Run rec.<method>(**kwargs) in the worker. Returns (result, stage milliseconds or None)."""
+    rec = _worker['recommender']  # loaded (or inherited) before the pool reported ready
+    if not collect_stages:
+        return getattr(rec, method)(**kwargs), None
+    with collect_timings() as stages:
+        result = getattr(rec, method)(**kwargs)
+    return result, stages
+
+
+# -------------------------
+# Server side
+# -------------------------
+class RecommenderPool:
+    """
+    - project_root: passed to CollegeRecommender in the workers
+    - workers: number of worker processes
+    - max_pending: calls queued or running at most (default: 4 per worker)
+    - timeout: seconds a caller waits for its result
+    - recommender: the server's recommender, inherited by forked workers (optional)
+    - start_method: 'fork' (default where available) or 'spawn' / 'forkserver'
+    """
+
+    def __init__(self, project_root, workers=2, max_pending=None, timeout=30.0, recommender=None, start_method=None):
+        self.project_root = os.path.abspath(project_root)
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending or 4 * self.workers))
+        self.timeout = float(timeout)
+        if start_method is None:
+            start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._pending = 0
+        self._mean_seconds = None  # exponential moving average of call durations
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.restarts = 0
+        self.reloads = 0
+        self.pids = []
+        self.data_version = None
+        self._recommender = recommender  # inherited by the workers of every (re)started executor
+        self._executor = self._start(recommender)
+
+    def _start(self, recommender=None):
+        _worker['recommender'] = recommender  # what forked workers inherit (None: they load the data themselves)
+        context = multiprocessing.get_context(self.start_method)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.project_root, context.Barrier(self.workers)),
+        )
+        # one ready call per worker, all submitted before any can finish: the executor starts a process
+        # for each, and the barrier makes every process answer one, so all are started (and loaded)
+        # before the first request
+        ready = [executor.submit(_worker_ready) for _ in range(self.workers)]
+        try:
+            answers = [f.result(timeout=STARTUP_TIMEOUT + 30) for f in ready]
+            pids = sorted({pid for pid, _ in answers})
+            if len(pids) != self.workers:
+                raise RuntimeError(f"only {len(pids)} of {self.workers} recommender workers started")
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            _worker['recommender'] = None  # the server process keeps no extra reference
+        self.pids = pids
+        self.data_version = answers[0][1]
+        print(f"Recommender pool: {self.workers} {self.start_method} workers ready (pids {self.pids})")
+        return executor
+
+    def _restart(self, broken):
+        with self._restart_lock:
+            if self._executor is not broken:
+                return  # another request already restarted it
+            self.restarts += 1
+            print("Recommender pool: a worker died, starting a new pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._start(self._recommender)
+
+    def replace(self, recommender):
+        """
+        Serve from workers that hold `recommender` (called after a hot reload, off the request path).
+        Calls already submitted finish on the old workers, which then exit. Raises if the new
+        workers do not start; the old ones keep serving until then.
+        """
+        with self._restart_lock:
+            executor = self._start(recommender)
+            old, self._executor, self._recommender = self._executor, executor, recommender
+            self.reloads += 1
+        old.shutdown(wait=False)
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: pending calls x mean duration / workers (at least 1)."""
+        mean = self._mean_seconds or 1.0
+        return max(1, int(math.ceil(mean * max(self._pending, 1) / self.workers)))
+
+    def _release(self, started):
+        def done(future):
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._pending -= 1
+                if not future.cancelled() and future.exception() is None:
+                    self.completed += 1
+                    self._mean_seconds = elapsed if self._mean_seconds is None else 0.8 * self._mean_seconds + 0.2 * elapsed
+            self._slots.release()
+        return done
+
+    def call(self, method, kwargs, collect_stages=False):
+        """
+        rec.<method>(**kwargs) in a worker. Returns (result, stage milliseconds or None).
+        Raises PoolSaturated when full and PoolTimeout after `timeout` seconds.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(self.retry_after())
+        executor = self._executor
+        started = time.perf_counter()
+        try:
+            try:
+                future = executor.submit(_worker_call, method, kwargs, collect_stages)
+            except BrokenProcessPool:
+                self._restart(executor)
+                executor = self._executor
+                future = executor.submit(_worker_call, method, kwargs, collect_stages)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending += 1
+        future.add_done_callback(self._release(started))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()  # only succeeds while still queued
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"Recommendation timed out after {self.timeout:g} s.")
+        except BrokenProcessPool:
+            with self._lock:
+                self.failures += 1
+            self._restart(executor)
+            raise
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'start_method': self.start_method,
+                'pids': self.pids,
+                'data_version': self.data_version,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'timeout': self.timeout,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'failures': self.failures,
+                'restarts': self.restarts,
+                'reloads': self.reloads,
+                'mean_ms': round(self._mean_seconds * 1000.0, 3) if self._mean_seconds is not None else None,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)